@@ -0,0 +1,220 @@
+import os
+import sys
+import operator
+import argparse
+import functools
+from datetime import datetime, timedelta
+
+import database as db
+
+# Tiered storage for closed months. archive_closed_months() moves rows dated before the current
+# month out of the hot SQLite tables into zstd-compressed Parquet, one file per (table, month,
+# department): archive/<table>/month=YYYY-MM/department=DEPT/part-0.parquet next to the database.
+# archive_manifest records every partition with its id range, so readers open only the files
+# that can contain rows they need, and only the columns they ask for. daily_rollup is not
+# archived, so dashboard totals and charts still cover all history. Bakery and farm line items
+# (db.ITEM_TABLES) go with their shifts, into archive/<item table>/month=.../ keyed by record_id;
+# product_rollup is not archived either.
+# pyarrow is optional: without it nothing is archived and reads see only the hot tables.
+# Usage: python archive.py [--before YYYY-MM]   |   python archive.py status
+
+ARCHIVE_TABLES = ["daily_sales", "pos_records", "fuel_records", "bakery_records", "farm_records"]
+DEPARTMENT_OF = {"pos_records": "POS", "fuel_records": "FUEL", "bakery_records": "BAKERY", "farm_records": "FARM"}
+COMPRESSION = "zstd"
+ARROW_TYPES = {"INTEGER": "int64", "REAL": "float64", "TEXT": "string"}
+# Line item tables have no id: their primary key, record_id first (the manifest's id range is record ids)
+ITEM_KEYS = {"bakery_items": ["record_id", "product_id"], "farm_items": ["record_id", "line"]}
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError: return None
+
+def archive_root():
+    return os.path.join(os.path.dirname(os.path.abspath(db.DB_NAME)), "archive")
+
+def _next_month(month):
+    year, mon = map(int, month.split("-"))
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}-01"
+
+def _schema(pa, table):
+    with db.get_conn() as conn:
+        cols = [(r[1], r[2].upper()) for r in conn.execute(f"PRAGMA table_info({table})")]
+    return pa.schema([(name, getattr(pa, ARROW_TYPES.get(decl, "string"))()) for name, decl in cols])
+
+# --- WRITING ---
+def _write_partition(pa, path, frame, schema, keys=("id",)):
+    import pandas as pd
+    keys = list(keys)
+    if os.path.exists(path):
+        # Late rows for a month that is already archived: merge, one copy per id
+        old = pa.parquet.read_table(path).to_pandas()
+        frame = pd.concat([old, frame], ignore_index=True).drop_duplicates(keys, keep="last")
+    frame = frame.sort_values(keys)
+    for field in schema:
+        if field.type == pa.int64(): frame[field.name] = frame[field.name].astype("Int64")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Without the pandas metadata, reads come back as plain int64/float64/str like read_sql_query
+    data = pa.Table.from_pandas(frame, schema=schema, preserve_index=False).replace_schema_metadata(None)
+    pa.parquet.write_table(data, path + ".tmp", compression=COMPRESSION)
+    os.replace(path + ".tmp", path)
+    return len(frame), int(frame[keys[0]].min()), int(frame[keys[0]].max())
+
+def _write_items(pa, conn, item_table, month, dept, items):
+    rel = os.path.join(item_table, f"month={month}", f"department={dept}", "part-0.parquet")
+    path = os.path.join(archive_root(), rel)
+    rows, min_id, max_id = _write_partition(pa, path, items, _schema(pa, item_table), ITEM_KEYS[item_table])
+    conn.execute("INSERT OR REPLACE INTO archive_manifest VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                 (item_table, month, dept, rel, rows, min_id, max_id, os.path.getsize(path), db._today()))
+
+def _archive_month(pa, table, month, schema):
+    # Reading, writing the files and deleting the hot rows share one transaction, so no write
+    # can land in between. If the commit fails the files still hold the rows; readers and the
+    # next run drop the duplicate ids.
+    import pandas as pd
+    start, end = f"{month}-01", _next_month(month)
+    with db.transaction() as conn:
+        df = pd.read_sql_query(f"SELECT * FROM {table} WHERE date >= ? AND date < ?", conn, params=(start, end))
+        if df.empty: return 0
+        if table == "daily_sales": groups = df.groupby(df["department"].fillna("UNKNOWN"))
+        else: groups = [(DEPARTMENT_OF[table], df)]
+        for dept, part in groups:
+            rel = os.path.join(table, f"month={month}", f"department={dept}", "part-0.parquet")
+            path = os.path.join(archive_root(), rel)
+            rows, min_id, max_id = _write_partition(pa, path, part, schema)
+            conn.execute("INSERT OR REPLACE INTO archive_manifest VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (table, month, dept, rel, rows, min_id, max_id, os.path.getsize(path), db._today()))
+        item_table = db.ITEM_TABLES.get(table)
+        if item_table:
+            items = pd.read_sql_query(f"""SELECT i.* FROM {item_table} i JOIN {table} r ON r.id = i.record_id
+                                          WHERE r.date >= ? AND r.date < ?""", conn, params=(start, end))
+            if len(items): _write_items(pa, conn, item_table, month, DEPARTMENT_OF[table], items)
+            conn.execute(f"DELETE FROM {item_table} WHERE record_id IN (SELECT id FROM {table} WHERE date >= ? AND date < ?)", (start, end))
+            db.touch(conn, item_table)
+        conn.execute(f"DELETE FROM {table} WHERE date >= ? AND date < ?", (start, end))
+        db.touch(conn, table)
+    return len(df)
+
+def archive_closed_months(before=None, tables=ARCHIVE_TABLES):
+    # Moves every row dated before `before` (YYYY-MM, default: this month) to the archive.
+    # Returns {table: rows moved}.
+    pa = _pyarrow()
+    if pa is None: raise RuntimeError("Archiving needs pyarrow: pip install pyarrow")
+    cutoff = (before or datetime.now().strftime("%Y-%m"))[:7] + "-01"
+    moved = {}
+    for table in tables:
+        schema = _schema(pa, table)
+        with db.get_conn() as conn:
+            months = [r[0] for r in conn.execute(f"SELECT DISTINCT substr(date, 1, 7) FROM {table} WHERE date < ?", (cutoff,))]
+        moved[table] = sum(_archive_month(pa, table, month, schema) for month in months)
+        if table in db.ITEM_TABLES: _archive_orphan_items(pa, table)
+    return moved
+
+def _archive_orphan_items(pa, table):
+    # Line items whose shift is already archived: left behind by runs from before items were
+    # archived with their shifts. Each goes to the month whose partition holds its record id.
+    import pandas as pd
+    item_table = db.ITEM_TABLES[table]
+    with db.transaction() as conn:
+        parts = conn.execute("SELECT month, department, min_id, max_id FROM archive_manifest WHERE table_name = ? ORDER BY month",
+                             (table,)).fetchall()
+        if not parts: return 0
+        # Only ids up to the last archived one can belong to an archived shift: a primary key range, not a scan
+        items = pd.read_sql_query(f"""SELECT i.* FROM {item_table} i WHERE i.record_id <= ?
+                                        AND NOT EXISTS (SELECT 1 FROM {table} r WHERE r.id = i.record_id)""",
+                                  conn, params=[max(p[3] for p in parts)])
+        if items.empty: return 0
+        placed = pd.Series(False, index=items.index)
+        for month, dept, min_id, max_id in parts:
+            mine = ~placed & items["record_id"].between(min_id, max_id)
+            if mine.any(): _write_items(pa, conn, item_table, month, dept, items[mine]); placed |= mine
+        conn.executemany(f"DELETE FROM {item_table} WHERE record_id = ?", [(int(r),) for r in items.loc[placed, "record_id"].unique()])
+        db.touch(conn, item_table)
+    return int(placed.sum())
+
+# --- READING ---
+def _paths(table, start=None, end=None, below=None, above=None, departments=None):
+    # Partition files that can hold rows with start <= date < end and above < id < below
+    where, params = ["table_name = ?"], [table]
+    if start: where.append("month >= ?"); params.append(start[:7])
+    if end: where.append("month <= ?"); params.append(end[:7])
+    if below is not None: where.append("min_id < ?"); params.append(below)
+    if above is not None: where.append("max_id > ?"); params.append(above)
+    if departments: where.append(f"department IN ({', '.join('?' for _ in departments)})"); params += list(departments)
+    with db.get_conn() as conn:
+        rels = [r[0] for r in conn.execute(f"SELECT path FROM archive_manifest WHERE {' AND '.join(where)} ORDER BY month, department", params)]
+    return [os.path.join(archive_root(), rel) for rel in rels]
+
+def _filter(ds, start=None, end=None, below=None, above=None, equals=None):
+    conds = []
+    if start: conds.append(ds.field("date") >= start)
+    if end: conds.append(ds.field("date") < end)
+    if below is not None: conds.append(ds.field("id") < below)
+    if above is not None: conds.append(ds.field("id") > above)
+    conds += [ds.field(col) == value for col, value in (equals or {}).items()]
+    return functools.reduce(operator.and_, conds) if conds else None
+
+def read_page(table, columns, before_id=None, floor=None, limit=50, start=None, end=None, equals=None):
+    # Archived rows for a history page: the `limit` highest ids with floor < id < before_id,
+    # start <= date < end and column == value for each of `equals`. Newest first.
+    import pandas as pd
+    paths = _paths(table, start, end, before_id, floor)
+    pa = _pyarrow() if paths else None
+    if pa is None: return pd.DataFrame(columns=columns)
+    dataset = pa.dataset.dataset(paths, format="parquet", schema=_schema(pa, table))
+    filt = _filter(pa.dataset, start, end, before_id, floor, equals)
+    # Two passes: ids only to find the page, then the requested columns for just those rows
+    ids = dataset.to_table(columns=["id"], filter=filt).column("id").to_pandas()
+    if ids.empty: return pd.DataFrame(columns=columns)
+    top = ids.nlargest(limit).tolist()
+    rows = dataset.to_table(columns=columns, filter=pa.dataset.field("id").isin(top)).to_pandas()
+    return rows.sort_values("id", ascending=False).reset_index(drop=True)
+
+def read_table(table, columns=None, date_from=None, date_to=None, departments=None, **equals):
+    # Rows from both tiers in id order (id is always included); date_to is inclusive.
+    # For reports and exports: only the months in range are opened, only `columns` are read.
+    import pandas as pd
+    if columns and "id" not in columns: columns = ["id"] + list(columns)
+    start = db.normalise_date(date_from, db.DAY_FMT) if date_from else None
+    end = (datetime.strptime(db.normalise_date(date_to, db.DAY_FMT), db.DAY_FMT) + timedelta(days=1)).strftime(db.DAY_FMT) if date_to else None
+    if table != "daily_sales": departments = None
+    where, params = [], []
+    if start: where.append("date >= ?"); params.append(start)
+    if end: where.append("date < ?"); params.append(end)
+    if departments: where.append(f"department IN ({', '.join('?' for _ in departments)})"); params += list(departments)
+    for col, value in equals.items(): where.append(f"{col} = ?"); params.append(value)
+    sql = f"SELECT {', '.join(columns) if columns else '*'} FROM {table}"
+    if where: sql += " WHERE " + " AND ".join(where)
+    with db.get_conn() as conn:
+        hot = pd.read_sql_query(sql + " ORDER BY id", conn, params=params)
+    paths = _paths(table, start, end, departments=departments)
+    pa = _pyarrow() if paths else None
+    if pa is None: return hot
+    # The table's current schema: partitions written before a column was added read it as null
+    cold = pa.dataset.dataset(paths, format="parquet", schema=_schema(pa, table)).to_table(columns=columns, filter=_filter(pa.dataset, start, end, equals=equals)).to_pandas()
+    if cold.empty: return hot
+    if hot.empty: return cold.sort_values("id").reset_index(drop=True)
+    df = pd.concat([cold, hot], ignore_index=True)
+    return df.drop_duplicates("id", keep="last").sort_values("id").reset_index(drop=True)
+
+def status():
+    with db.get_conn() as conn:
+        return conn.execute("""SELECT table_name, COUNT(*), MIN(month), MAX(month), SUM(rows), SUM(bytes)
+                               FROM archive_manifest GROUP BY table_name ORDER BY table_name""").fetchall()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move closed months to the Parquet archive.")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "status"])
+    parser.add_argument("--before", help="archive months before this one (YYYY-MM, default: current month)")
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        for table, rows in archive_closed_months(args.before).items(): print(f"{table}: {rows:,} rows archived")
+    for table, parts, first, last, rows, size in status():
+        print(f"{table}: {rows:,} rows in {parts} partitions, {first} to {last}, {size / 1e6:.1f} MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
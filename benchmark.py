@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+import database as db
+import synthetic
+import charts
+import credentials
+
+# Benchmarks for database.py hot paths on synthetic data at several table sizes.
+# Reads are timed with the read cache cleared before every call, so they measure SQLite.
+# Output is JSON; pass an earlier run to --compare to list regressions.
+# Usage: python benchmark.py [--scales 10000 100000 1000000] [--repeat 20] [--out run.json] [--compare old.json]
+
+SCALES = [10_000, 100_000, 1_000_000]
+REGRESSION_RATIO = 1.2
+REGRESSION_FLOOR_MS = 1.0  # ignore sub-millisecond jitter
+
+@contextmanager
+def temp_database():
+    original = db.DB_NAME
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_NAME = os.path.join(tmp, "bench.db")
+        try:
+            db.init_db()
+            yield db.DB_NAME
+        finally:
+            db.close_all()
+            db.invalidate()
+            db.DB_NAME = original
+
+def _commits(fn, *args):
+    # Every transaction() opens with BEGIN IMMEDIATE, so counting those counts commits
+    db.query_log.clear()
+    fn(*args)
+    return sum(1 for q in db.query_log if q["sql"].startswith("BEGIN"))
+
+def _timed(name, scale, fn, repeat, before=None):
+    runs = []
+    for i in range(repeat):
+        args = before(i) if before else ()
+        start = time.perf_counter()
+        fn(*args)
+        runs.append((time.perf_counter() - start) * 1000)
+    return _summary(name, scale, runs)
+
+def _summary(name, scale, runs):
+    runs = sorted(runs)
+    return {"name": name, "scale": scale, "runs": len(runs), "median_ms": round(statistics.median(runs), 3),
+            "p95_ms": round(runs[min(len(runs) - 1, int(len(runs) * 0.95))], 3), "min_ms": round(runs[0], 3)}
+
+STARTUP_IMPORTS = ["auth", "database", "views.dashboard", "views.pos", "views.fuel", "views.bakery",
+                   "views.farm", "views.debt_recovery", "views.price_settings", "views.db_admin"]
+
+def bench_startup(repeat=5):
+    # Cold start cost per entry point: a fresh interpreter imports one module (the login screen
+    # only needs auth). Runs in a scratch directory so database.py works on a throwaway file;
+    # the first run creates the schema, the rest find it current.
+    repo = os.path.dirname(os.path.abspath(__file__))
+    code = "import time; t = time.perf_counter(); import {}; print((time.perf_counter() - t) * 1000)"
+    env = {**os.environ, "PYTHONPATH": repo}
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mod in STARTUP_IMPORTS:
+            runs = [float(subprocess.run([sys.executable, "-c", code.format(mod)], cwd=tmp, env=env,
+                                         capture_output=True, text=True, check=True).stdout) for _ in range(repeat)]
+            results.append(_summary(f"import:{mod}", 0, runs))
+    with temp_database():
+        # Schema check on a database that is already at SCHEMA_VERSION
+        def current(i): db._initialised.discard(db.DB_NAME); return ()
+        results.append(_timed("init_db:current", 0, db.init_db, repeat, current))
+    return results
+
+def sample_submissions(i):
+    now = db.datetime.now().strftime(db.STAMP_FMT)
+    return [
+        (db.save_pos_entry, {"date": now, "staff": "BENCH", "machine": f"T{i % 4}", "open_cash": 50000, "open_wallet": 20000, "capital": 0, "deposits": 30000, "withdrawals": 45000, "free": 0, "volume": 75000, "expected": 1500, "actual": 1600, "bank": 100, "profit": 1500, "close_cash": 40000, "close_wallet": 31500, "balance": 0, "status": "✅ BALANCED"}),
+        (db.save_fuel_entry, {"date": now, "staff": "BENCH", "p1_name": "Pump 1", "pA_open": i * 40, "pA_close": i * 40 + 40, "p2_name": "Pump 2", "pB_open": i * 30, "pB_close": i * 30 + 30, "total_liters": 70, "price": 700, "expected": 49000, "cash": 30000, "pos": 17000, "credit": 2000, "diff": 0, "debtors_list": [{"name": f"Driver {i % 50}", "amount": 2000}]}),
+        (db.save_bakery_entry, {"date": now, "staff": "BENCH", "sold_qty": 120, "damaged_qty": 2, "expected": 96000, "actual": 95000, "diff": -1000, "note": "", "credit": 0, "debtors_list": []}),
+        (db.save_farm_entry, {"date": now, "staff": "BENCH", "customer": f"Customer {i % 80}", "items": "2x Crates of Eggs", "total": 7000, "paid": 5000, "mode": "Cash", "balance": 2000, "note": ""}),
+    ]
+
+def bench_submissions(n=500):
+    # Department submissions plus one debt repayment per round; reports commits per submission
+    # and submissions per second.
+    with db.get_conn() as conn:
+        open_ids = [r[0] for r in conn.execute("SELECT id FROM debts WHERE status='Unpaid' AND amount >= 500 LIMIT ?", (n,))]
+    count, commits = 0, 0
+    start = time.perf_counter()
+    for i in range(n):
+        for fn, data in sample_submissions(i):
+            commits += _commits(fn, data); count += 1
+        if i < len(open_ids): commits += _commits(db.process_debt_repayment, open_ids[i], 500, "BENCH"); count += 1
+    elapsed = time.perf_counter() - start
+    return {"name": "submissions", "submissions": count, "seconds": round(elapsed, 4),
+            "submissions_per_second": round(count / elapsed, 1), "commits_per_submission": round(commits / count, 3)}
+
+def bench_reads(scale, repeat):
+    def cold(i): db.invalidate(); return ()
+    reads = [("get_dashboard_metrics", db.get_dashboard_metrics), ("get_revenue_trend", db.get_revenue_trend),
+             ("get_unpaid_debts", db.get_unpaid_debts), ("get_prices", db.get_prices),
+             ("charts.revenue_chart", charts.revenue_chart)]
+    reads += [(f"_get_history:{t}", lambda t=t: db._get_history(t)) for t in ["pos_records", "fuel_records", "bakery_records", "farm_records"]]
+    return [_timed(name, scale, fn, repeat, cold) for name, fn in reads]
+
+def bench_writes(scale, repeat):
+    results = []
+    for fn, _ in sample_submissions(0):
+        results.append(_timed(fn.__name__, scale, fn, repeat, lambda i, fn=fn: (dict(sample_submissions(i))[fn],)))
+    with db.get_conn() as conn:
+        open_ids = [r[0] for r in conn.execute("SELECT id FROM debts WHERE status='Unpaid' AND amount >= 100")]
+    random.Random(7).shuffle(open_ids)
+    if len(open_ids) >= repeat:
+        results.append(_timed("process_debt_repayment", scale, db.process_debt_repayment, repeat,
+                              lambda i: (open_ids[i], 100, "BENCH")))
+    return results
+
+def bench_login(repeat=5, burst=5000, ips=2):
+    # CPU per login attempt (one PBKDF2 hash), a rerun's session check, and a credential-stuffing
+    # burst: `burst` wrong passwords for random emails from `ips` addresses. Reports how many
+    # attempts reached the hash and how big the throttle table got.
+    results = []
+    credentials.set_password("bench@okeb.com", "Bench#Pass1", "STAFF", "Fuel")
+    def cpu(fn, *args):
+        start = time.process_time(); fn(*args); return (time.process_time() - start) * 1000
+    for name, password in [("login:correct", "Bench#Pass1"), ("login:wrong", "nope")]:
+        credentials._failures.clear()
+        results.append(_summary(name, 0, [cpu(credentials.authenticate, "bench@okeb.com", password) for _ in range(repeat)]))
+    token = credentials.start_session({"email": "bench@okeb.com", "role": "STAFF", "dept": "Fuel"})
+    results.append(_timed("login:session_check", 0, credentials.session_user, 1000, lambda i: (token,)))
+    credentials._failures.clear()
+    hashed, start = 0, time.process_time()
+    for i in range(burst):
+        email, ip = f"victim{i}@example.com", f"203.0.113.{i % ips}"
+        if not credentials.throttled(email, ip): hashed += 1
+        credentials.authenticate(email, "password123", ip)
+    results.append({"name": "login:stuffing_burst", "scale": 0, "attempts": burst, "ips": ips, "hashed": hashed,
+                    "cpu_seconds": round(time.process_time() - start, 3), "throttle_entries": credentials.throttle_size(),
+                    "throttle_cap": credentials.THROTTLE_SIZE})
+    credentials._failures.clear()
+    return results
+
+def _git_rev():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError: return None
+
+def run(scales=SCALES, repeat=20, years=3, debtors=500, submissions=200):
+    report = {"meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": _git_rev(),
+                       "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                       "schema_version": db.SCHEMA_VERSION, "repeat": repeat, "years": years, "debtors": debtors},
+              "results": bench_startup()}
+    with temp_database():
+        report["results"] += bench_login()
+    for scale in scales:
+        with temp_database():
+            start = time.perf_counter()
+            synthetic.generate(scale, years=years, debtors=debtors)
+            print(f"scale {scale:,}: generated in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            report["results"] += bench_reads(scale, repeat)
+            report["results"] += bench_writes(scale, repeat)
+            report["results"].append({**bench_submissions(submissions), "scale": scale})
+    return report
+
+def compare(old, new, ratio=REGRESSION_RATIO, floor_ms=REGRESSION_FLOOR_MS):
+    # Entries whose median got slower by more than `ratio` (and by at least floor_ms) between two reports
+    before = {(r["name"], r["scale"]): r for r in old["results"] if "median_ms" in r}
+    slower = []
+    for r in new["results"]:
+        prev = before.get((r["name"], r["scale"]))
+        if not prev or "median_ms" not in r or r["median_ms"] - prev["median_ms"] < floor_ms: continue
+        if prev["median_ms"] > 0 and r["median_ms"] / prev["median_ms"] > ratio:
+            slower.append({"name": r["name"], "scale": r["scale"], "before_ms": prev["median_ms"],
+                           "after_ms": r["median_ms"], "ratio": round(r["median_ms"] / prev["median_ms"], 2)})
+    return slower
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark database.py on synthetic data.")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES, help="rows per department table")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--debtors", type=int, default=500)
+    parser.add_argument("--out", help="write the JSON report here as well as stdout")
+    parser.add_argument("--compare", help="earlier JSON report; exit 1 if anything regressed")
+    args = parser.parse_args(argv)
+    report = run(args.scales, args.repeat, args.years, args.debtors)
+    if args.compare:
+        with open(args.compare) as f: report["regressions"] = compare(json.load(f), report)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f: f.write(text)
+    print(text)
+    return 1 if report.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import csv
+import sys
+import json
+import time
+import argparse
+from itertools import islice
+
+import database as db
+
+# Bulk/backfill ingestion of shift records from CSV or JSONL.
+# Rows use the detail table's column names (e.g. fuel_records: date, staff_name, pump_a_open, ...).
+# Credit sales for fuel/bakery go in a "debtors" field: a JSON list of {"name", "amount"} in JSONL,
+# or "Name:amount;Name:amount" in CSV. Farm rows with balance_due > 0 become a debt for customer_name.
+# Bakery and farm line items go in an "items" field: a JSON list (in CSV, the list as JSON text) of
+# {"product", ...} with the item table's columns, as the save_* functions take them. Farm rows
+# without one get their lines from items_summary, as migration 10 did for existing sales.
+# Each chunk writes detail rows, line items, debts and daily_sales/rollup rows in one transaction.
+# Usage: python bulk_import.py fuel ledger.csv [--chunk 5000]
+
+CHUNK_SIZE = 5000
+DEPARTMENTS = {"pos": ("pos_records", "POS"), "fuel": ("fuel_records", "FUEL"),
+               "bakery": ("bakery_records", "BAKERY"), "farm": ("farm_records", "FARM")}
+REQUIRED = ["date", "staff_name"]
+
+def _revenue(dept, row):
+    # Same figure the save_* functions report to daily_sales
+    if dept == "pos": return row.get("net_profit") or 0
+    if dept == "fuel": return (row.get("cash_collected") or 0) + (row.get("pos_collected") or 0)
+    if dept == "bakery": return row.get("actual_revenue") or 0
+    return row.get("amount_paid") or 0
+
+def _schema(table):
+    with db.get_conn() as conn:
+        return {r[1]: r[2].upper() for r in conn.execute(f"PRAGMA table_info({table})") if r[1] != "id"}
+
+def _coerce(value, decl):
+    if value is None or value == "": return None
+    if decl == "REAL": return float(value)
+    if decl == "INTEGER": return int(float(value))
+    return str(value)
+
+def _parse_debtors(value):
+    if not value: return []
+    if isinstance(value, list): return [{"name": d["name"], "amount": float(d["amount"])} for d in value]
+    pairs = [p.rsplit(":", 1) for p in str(value).split(";") if p.strip()]
+    return [{"name": name.strip(), "amount": float(amount)} for name, amount in pairs]
+
+def _parse_items(dept, value, row):
+    item_table = db.ITEM_TABLES.get(DEPARTMENTS[dept][0])
+    if not item_table:
+        if value: raise ValueError(f"{dept} rows have no line items")
+        return []
+    if not value: return db.parse_items_summary(row.get("items_summary"), row.get("total_value")) if dept == "farm" else []
+    if isinstance(value, str):
+        try: value = json.loads(value)
+        except json.JSONDecodeError: raise ValueError("items is not a JSON list")
+    if not isinstance(value, list) or not all(isinstance(i, dict) and i.get("product") for i in value):
+        raise ValueError('items must be a list of {"product": ...} objects')
+    try: return [{"product": str(i["product"]), **{c: _coerce(i.get(c), "REAL") for c in db.ITEM_COLUMNS[item_table]}} for i in value]
+    except (TypeError, ValueError): raise ValueError("items has a non-numeric quantity or price")
+
+def validate(dept, raw, schema):
+    # Returns (row, debtors, items) or raises ValueError with a readable reason
+    if not isinstance(raw, dict): raise ValueError("not a JSON object")
+    if None in raw: raise ValueError("more fields than the header")  # csv.DictReader keeps the extras under None
+    unknown = set(raw) - set(schema) - {"debtors", "items"}
+    if unknown: raise ValueError(f"unknown column(s): {', '.join(sorted(unknown))}")
+    row = {}
+    for col, decl in schema.items():
+        try: row[col] = _coerce(raw.get(col), decl)
+        except (TypeError, ValueError): raise ValueError(f"{col}={raw.get(col)!r} is not {decl}")
+    missing = [c for c in REQUIRED if not row.get(c)]
+    if missing: raise ValueError(f"missing {', '.join(missing)}")
+    row["date"] = db.normalise_date(row["date"])
+    if not row["date"][:4].isdigit(): raise ValueError(f"unreadable date {raw.get('date')!r}")
+    debtors = _parse_debtors(raw.get("debtors"))
+    if dept in ("fuel", "bakery") and not row.get("customer_name"):
+        row["customer_name"] = "Multiple Debtors" if debtors else "None"
+    if dept == "farm" and (row.get("balance_due") or 0) > 0:
+        debtors = [{"name": row.get("customer_name") or "Unknown", "amount": row["balance_due"]}]
+    return row, debtors, _parse_items(dept, raw.get("items"), row)
+
+def read_rows(path):
+    # Yields (line_no, dict) without loading the file into memory
+    # utf-8-sig: files saved by Excel, and exports.write_csv, start with a BOM
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".csv"):
+            for line_no, raw in enumerate(csv.DictReader(f), start=2): yield line_no, raw
+        else:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip(): continue
+                try: yield line_no, json.loads(line)
+                except json.JSONDecodeError: yield line_no, None
+
+def _write_chunk(dept, table, label, columns, rows, on_chunk=None, last_line=None):
+    debts, sales = [], []
+    for row, debtors, _ in rows:
+        day = row["date"][:10]
+        debts += [(day, label, d["name"], d["amount"], "Unpaid") for d in debtors if d["amount"] > 0]
+        rev = _revenue(dept, row)
+        sales.append((day, label, rev, 0, rev, row["staff_name"]))
+    marks = ", ".join("?" for _ in columns)
+    with db.transaction() as conn:
+        conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks})", [[r[c] for c in columns] for r, _, _ in rows])
+        # Ids of one executemany are consecutive (see db.log_inserts)
+        first = conn.execute("SELECT last_insert_rowid()").fetchone()[0] - len(rows) + 1
+        for offset, (row, _, items) in enumerate(rows):
+            if items: db.record_items(conn, table, first + offset, row["date"], items)
+        # Logged after the items, as in save_*: the change carries them to other sites
+        if rows: db.log_changes(conn, table, "insert", range(first, first + len(rows)))
+        if debts:
+            conn.executemany("INSERT INTO debts (date, department, customer_name, amount, status) VALUES (?, ?, ?, ?, ?)", debts)
+            db.log_inserts(conn, "debts", len(debts))
+        db.record_daily_sales(conn, sales)
+        db.touch(conn, table, "debts")
+        if on_chunk: on_chunk(conn, last_line)
+
+def ingest(dept, rows, chunk_size=CHUNK_SIZE, start_after=0, on_chunk=None):
+    # rows: iterable of (line_no, raw dict). Bad rows are skipped and reported, good rows are committed per chunk.
+    # Resuming: lines up to start_after are skipped; on_chunk(conn, last_line_no) runs inside each
+    # chunk's transaction, so a checkpoint saved there commits together with the rows.
+    if dept not in DEPARTMENTS: raise ValueError(f"Unknown department {dept!r}; expected one of {', '.join(DEPARTMENTS)}")
+    table, label = DEPARTMENTS[dept]
+    schema = _schema(table)
+    columns = list(schema)
+    start = time.perf_counter()
+    written, errors = 0, []
+    rows = (r for r in rows if r[0] > start_after)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk: break
+        batch = []
+        for line_no, raw in chunk:
+            try: batch.append(validate(dept, raw, schema))
+            except ValueError as e: errors.append((line_no, str(e)))
+        if batch or on_chunk:
+            _write_chunk(dept, table, label, columns, batch, on_chunk, chunk[-1][0])
+            written += len(batch)
+    elapsed = time.perf_counter() - start
+    return {"department": dept, "rows": written, "errors": errors, "seconds": round(elapsed, 3),
+            "rows_per_second": round(written / elapsed, 1) if elapsed else 0.0}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import shift records from CSV or JSONL.")
+    parser.add_argument("department", choices=sorted(DEPARTMENTS))
+    parser.add_argument("path", help=".csv or .jsonl file")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="rows per transaction")
+    args = parser.parse_args(argv)
+    report = ingest(args.department, read_rows(args.path), args.chunk)
+    for line_no, reason in report["errors"][:20]: print(f"line {line_no}: {reason}", file=sys.stderr)
+    if len(report["errors"]) > 20: print(f"... {len(report['errors']) - 20} more", file=sys.stderr)
+    print(f"{report['rows']:,} {args.department} rows in {report['seconds']}s ({report['rows_per_second']:,.0f} rows/s), {len(report['errors'])} rejected")
+    return 1 if report["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
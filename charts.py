@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import database as db
+
+# Chart data for the dashboard. Revenue is grouped in SQL from daily_rollup into day, week,
+# month, quarter or year buckets, so the frame handed to Plotly has at most MAX_POINTS periods
+# per department no matter how much history the range covers.
+
+MAX_POINTS = 120
+RESOLUTIONS = {
+    # name: (SQL expression for the bucket's first day, bucket number of a date; neighbours differ by one)
+    "day": ("date", lambda d: d.toordinal()),
+    "week": ("date(date, '-6 days', 'weekday 1')", lambda d: (d.toordinal() - 1) // 7),  # Monday of the week
+    "month": ("substr(date, 1, 7) || '-01'", lambda d: d.year * 12 + d.month),
+    "quarter": ("substr(date, 1, 5) || printf('%02d', (CAST(substr(date, 6, 2) AS INTEGER) - 1) / 3 * 3 + 1) || '-01'",
+                lambda d: d.year * 4 + (d.month - 1) // 3),
+    "year": ("substr(date, 1, 4) || '-01-01'", lambda d: d.year),
+}
+
+def buckets(date_from, date_to, resolution):
+    # Number of buckets the range touches at this resolution, partial ones at either end included
+    number = RESOLUTIONS[resolution][1]
+    return number(datetime.strptime(date_to, db.DAY_FMT)) - number(datetime.strptime(date_from, db.DAY_FMT)) + 1
+
+def pick_resolution(date_from, date_to, max_points=MAX_POINTS):
+    # Finest resolution that keeps the range within max_points buckets
+    for name in RESOLUTIONS:
+        if buckets(date_from, date_to, name) <= max_points: return name
+    return "year"
+
+def bounded(date_from, date_to, resolution="auto", max_points=MAX_POINTS):
+    # (date_from, resolution) to query with. A requested resolution is a minimum: too fine for the
+    # range and it is coarsened. Past max_points years even that is too many, so the range is cut
+    # to the latest max_points years.
+    if resolution != "auto" and resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {resolution!r}; expected auto or one of {', '.join(RESOLUTIONS)}")
+    names = list(RESOLUTIONS)
+    finest = names.index(pick_resolution(date_from, date_to, max_points))
+    resolution = names[finest if resolution == "auto" else max(finest, names.index(resolution))]
+    if buckets(date_from, date_to, resolution) > max_points:
+        date_from = f"{int(date_to[:4]) - max_points + 1:04d}-01-01"
+    return date_from, resolution
+
+@db.cached("daily_rollup")
+def revenue_range():
+    # First and last day with sales, or (None, None) on an empty database
+    with db.get_conn() as conn:
+        return conn.execute("SELECT MIN(date), MAX(date) FROM daily_rollup").fetchone()
+
+@db.cached("daily_rollup")
+def revenue_chart(date_from=None, date_to=None, resolution="auto"):
+    # Returns (frame, resolution actually used). Frame columns: period, department, gross_revenue, net_cash.
+    import pandas as pd
+    first, last = revenue_range()
+    date_to = db.normalise_date(date_to, db.DAY_FMT) if date_to else (last or db._today())
+    date_from = db.normalise_date(date_from, db.DAY_FMT) if date_from else \
+        (first or (datetime.now() - timedelta(days=30)).strftime(db.DAY_FMT))
+    date_from, resolution = bounded(date_from, date_to, resolution)
+    bucket = RESOLUTIONS[resolution][0]
+    sql = f"""SELECT {bucket} AS period, department, SUM(revenue) AS gross_revenue, SUM(net_cash) AS net_cash
+              FROM daily_rollup WHERE date >= ? AND date <= ?
+              GROUP BY period, department ORDER BY period, department"""
+    with db.get_conn() as conn:
+        df = pd.read_sql_query(sql, conn, params=(date_from, date_to))
+    return df, resolution
@@ -0,0 +1,148 @@
+import sys
+import hmac
+import time
+import getpass
+import hashlib
+import secrets
+import threading
+from collections import deque, OrderedDict
+
+import database as db
+
+# Password checks for the login screen. Passwords are salted PBKDF2-SHA256 hashes in the users
+# table. A successful login issues a session token; reruns check the token with a dict lookup
+# instead of hashing again. Failed attempts are counted per email and per client IP in a bounded
+# LRU table, and a key over its limit is refused before any hashing, so a credential-stuffing
+# burst cannot pin the CPU.
+# Usage: python credentials.py set <email> [ROLE] [Department]   (prompts for the password)
+
+ALGORITHM = "pbkdf2_sha256"
+ITERATIONS = 600_000
+SALT_BYTES = 16
+
+SESSION_TTL = 12 * 3600
+MAX_SESSIONS = 1000
+
+THROTTLE_WINDOW = 15 * 60
+MAX_FAILURES = {"email": 5, "ip": 20}
+THROTTLE_SIZE = 10_000
+
+_lock = threading.Lock()
+_sessions = OrderedDict()   # token -> (expires, user)
+_failures = OrderedDict()   # (kind, value) -> deque of failure times
+_dummy = []
+
+# --- HASHING ---
+def hash_password(password, iterations=ITERATIONS):
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"{ALGORITHM}${iterations}${salt.hex()}${digest.hex()}"
+
+def verify_password(password, stored):
+    try:
+        algorithm, iterations, salt, digest = stored.split("$")
+        iterations, salt = int(iterations), bytes.fromhex(salt)
+    except (AttributeError, ValueError): return False
+    if algorithm != ALGORITHM: return False
+    check = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return hmac.compare_digest(check.hex(), digest)
+
+def _dummy_hash():
+    # Unknown emails are checked against this, so they take as long as a wrong password
+    if not _dummy: _dummy.append(hash_password(secrets.token_hex(8)))
+    return _dummy[0]
+
+# --- USERS ---
+def get_user(email):
+    with db.get_conn() as conn:
+        return conn.execute("SELECT email, password_hash, role, department FROM users WHERE email=?",
+                            (email.lower().strip(),)).fetchone()
+
+def set_password(email, password, role=None, department=None):
+    # Creates the account if it does not exist; role/department are kept when not given
+    email = email.lower().strip()
+    hashed = hash_password(password)  # outside the transaction, it takes a while
+    with db.transaction() as conn:
+        conn.execute("""INSERT INTO users (email, password_hash, role, department, updated_at) VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(email) DO UPDATE SET password_hash=excluded.password_hash,
+                            role=COALESCE(excluded.role, role), department=COALESCE(excluded.department, department),
+                            updated_at=excluded.updated_at""",
+                     (email, hashed, role, department, db._today()))
+    revoke_user(email)
+
+# --- THROTTLE ---
+def _keys(email, ip):
+    return [("email", email)] + ([("ip", ip)] if ip else [])
+
+def throttled(email, ip=None, now=None):
+    # Seconds until the next attempt is allowed, 0 if it is allowed now
+    now = now or time.monotonic()
+    with _lock:
+        for key in _keys(email, ip):
+            times = _failures.get(key)
+            if not times: continue
+            while times and now - times[0] > THROTTLE_WINDOW: times.popleft()
+            if len(times) >= MAX_FAILURES[key[0]]:
+                return int(THROTTLE_WINDOW - (now - times[0])) + 1
+    return 0
+
+def _record_failure(email, ip, now):
+    with _lock:
+        for key in _keys(email, ip):
+            times = _failures.get(key)
+            if times is None: times = _failures[key] = deque(maxlen=MAX_FAILURES[key[0]])
+            times.append(now)
+            _failures.move_to_end(key)
+        while len(_failures) > THROTTLE_SIZE: _failures.popitem(last=False)
+
+def throttle_size():
+    return len(_failures)
+
+# --- LOGIN ---
+def authenticate(email, password, ip=None):
+    # Returns (user dict, None) or (None, message for the login form)
+    email = email.lower().strip()
+    now = time.monotonic()
+    wait = throttled(email, ip, now)
+    if wait: return None, f"Too many failed attempts. Try again in {wait // 60 + 1} minute(s)."
+    row = get_user(email)
+    ok = verify_password(password, row[1] if row else _dummy_hash())
+    if not (row and ok):
+        _record_failure(email, ip, now)
+        return None, "Incorrect email or password."
+    with _lock: _failures.pop(("email", email), None)
+    if int(row[1].split("$")[1]) < ITERATIONS: set_password(email, password)  # rehash at the current cost
+    return {"email": email, "role": row[2], "dept": row[3]}, None
+
+def start_session(user):
+    token = secrets.token_urlsafe(32)
+    with _lock:
+        _sessions[token] = (time.monotonic() + SESSION_TTL, user)
+        while len(_sessions) > MAX_SESSIONS: _sessions.popitem(last=False)
+    return token
+
+def session_user(token):
+    # The user for a live token, or None. No hashing, so it is cheap enough for every rerun.
+    if not token: return None
+    with _lock:
+        hit = _sessions.get(token)
+        if hit and hit[0] > time.monotonic(): return hit[1]
+        _sessions.pop(token, None)
+    return None
+
+def end_session(token):
+    with _lock: _sessions.pop(token, None)
+
+def revoke_user(email):
+    # Sign out every session of this user, e.g. after a password change
+    with _lock:
+        for token in [t for t, (_, user) in _sessions.items() if user["email"] == email]:
+            del _sessions[token]
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "set":
+        print("Usage: python credentials.py set <email> [ROLE] [Department]"); sys.exit(2)
+    password = getpass.getpass("New password: ")
+    if password != getpass.getpass("Repeat: "): print("Passwords do not match."); sys.exit(1)
+    set_password(sys.argv[2], password, *sys.argv[3:5])
+    print(f"Password set for {sys.argv[2].lower().strip()}")
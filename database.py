@@ -1,232 +1,1065 @@
-import sqlite3
-import pandas as pd
-from datetime import datetime
-
-DB_NAME = "okeb_data.db"
-
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
-    # 1. Daily Sales
-    c.execute('''CREATE TABLE IF NOT EXISTS daily_sales (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT, department TEXT, gross_revenue REAL, 
-                    total_expenses REAL, net_cash REAL, submitted_by TEXT
-                )''')
-    
-    # 2. POS Records (UPDATED COLUMNS)
-    c.execute('''CREATE TABLE IF NOT EXISTS pos_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT, staff_name TEXT, machine_id TEXT, 
-                    opening_cash REAL, opening_wallet REAL, capital_given REAL, 
-                    total_deposits REAL, total_withdrawals REAL, free_vol REAL,
-                    total_volume REAL, expected_comm REAL, actual_comm REAL, 
-                    bank_charges REAL, net_profit REAL,
-                    closing_cash REAL, closing_wallet REAL, calculated_balance REAL, status TEXT
-                )''')
-
-    # 3. Fuel Records
-    c.execute('''CREATE TABLE IF NOT EXISTS fuel_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT, staff_name TEXT, 
-                    p1_name TEXT, pump_a_open REAL, pump_a_close REAL,
-                    p2_name TEXT, pump_b_open REAL, pump_b_close REAL,
-                    total_liters REAL, unit_price REAL, expected_revenue REAL, 
-                    cash_collected REAL, pos_collected REAL, credit_sales REAL, 
-                    shortage_surplus REAL, customer_name TEXT
-                )''')
-    
-    # 4. Bakery Records
-    c.execute('''CREATE TABLE IF NOT EXISTS bakery_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT, staff_name TEXT, total_bread_sold INTEGER, 
-                    total_damaged INTEGER, expected_revenue REAL, actual_revenue REAL, 
-                    shortage_surplus REAL, note TEXT, credit_sales REAL, customer_name TEXT
-                )''')
-
-    # 5. Farm Records
-    c.execute('''CREATE TABLE IF NOT EXISTS farm_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT, staff_name TEXT, customer_name TEXT, 
-                    items_summary TEXT, total_value REAL, amount_paid REAL, 
-                    payment_mode TEXT, balance_due REAL, note TEXT
-                )''')
-
-    # 6. Debts Table
-    c.execute('''CREATE TABLE IF NOT EXISTS debts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT, department TEXT, customer_name TEXT, 
-                    amount REAL, status TEXT
-                )''')
-
-    # 7. PRODUCT PRICES
-    c.execute('''CREATE TABLE IF NOT EXISTS prices (
-                    item_name TEXT PRIMARY KEY,
-                    price REAL
-                )''')
-    
-    c.execute("SELECT count(*) FROM prices")
-    if c.fetchone()[0] == 0:
-        defaults = [
-            ("Big Jumbo", 1500), ("Small Jumbo", 800), ("Big Milk", 1200),
-            ("Family Loaf", 1000), ("Sardine Bread", 2000), ("Big Toast", 1000),
-            ("Small Toast", 500), ("Round Bread", 400),
-            ("Fuel Unit Price", 700)
-        ]
-        c.executemany("INSERT INTO prices VALUES (?, ?)", defaults)
-        conn.commit()
-    
-    conn.commit()
-    conn.close()
-
-# --- PRICE FUNCTIONS ---
-def get_prices():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT * FROM prices")
-    data = dict(c.fetchall())
-    conn.close()
-    return data
-
-def update_price(item_name, new_price):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("UPDATE prices SET price=? WHERE item_name=?", (new_price, item_name))
-    conn.commit()
-    conn.close()
-
-# --- SAVE FUNCTIONS ---
-
-def save_daily_report(dept, revenue, expenses, net_cash, user):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    c.execute("INSERT INTO daily_sales (date, department, gross_revenue, total_expenses, net_cash, submitted_by) VALUES (?, ?, ?, ?, ?, ?)",
-              (date_str, dept, revenue, expenses, net_cash, user))
-    conn.commit()
-    conn.close()
-
-def save_pos_entry(data):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    # Updated insert to match new columns
-    c.execute("""INSERT INTO pos_records 
-                 (date, staff_name, machine_id, opening_cash, opening_wallet, capital_given, 
-                  total_deposits, total_withdrawals, free_vol, total_volume, 
-                  expected_comm, actual_comm, bank_charges, net_profit,
-                  closing_cash, closing_wallet, calculated_balance, status) 
-                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-              (data['date'], data['staff'], data['machine'], data['open_cash'], data['open_wallet'], data['capital'], 
-               data['deposits'], data['withdrawals'], data['free'], data['volume'],
-               data['expected'], data['actual'], data['bank'], data['profit'],
-               data['close_cash'], data['close_wallet'], data['balance'], data['status']))
-    conn.commit()
-    conn.close()
-    # We save Net Profit as the revenue for the dashboard
-    save_daily_report("POS", data['profit'], 0, data['profit'], data['staff'])
-
-def save_fuel_entry(data):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    cust_label = "Multiple Debtors" if len(data.get('debtors_list', [])) > 0 else "None"
-    c.execute("""INSERT INTO fuel_records (date, staff_name, p1_name, pump_a_open, pump_a_close, p2_name, pump_b_open, pump_b_close, total_liters, unit_price, expected_revenue, cash_collected, pos_collected, credit_sales, shortage_surplus, customer_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-              (data['date'], data['staff'], data['p1_name'], data['pA_open'], data['pA_close'], data['p2_name'], data['pB_open'], data['pB_close'], data['total_liters'], data['price'], data['expected'], data['cash'], data['pos'], data['credit'], data['diff'], cust_label))
-    
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    for debtor in data.get('debtors_list', []):
-        if debtor['amount'] > 0:
-            c.execute("INSERT INTO debts (date, department, customer_name, amount, status) VALUES (?, ?, ?, ?, ?)",
-                      (date_str, "FUEL", debtor['name'], debtor['amount'], "Unpaid"))
-    conn.commit()
-    conn.close()
-    actual_rev = data['cash'] + data['pos']
-    save_daily_report("FUEL", actual_rev, 0, actual_rev, data['staff'])
-
-def save_bakery_entry(data):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    cust_label = "Multiple Debtors" if len(data.get('debtors_list', [])) > 0 else "None"
-    c.execute("""INSERT INTO bakery_records (date, staff_name, total_bread_sold, total_damaged, expected_revenue, actual_revenue, shortage_surplus, note, credit_sales, customer_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-              (data['date'], data['staff'], data['sold_qty'], data['damaged_qty'], data['expected'], data['actual'], data['diff'], data['note'], data['credit'], cust_label))
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    for debtor in data.get('debtors_list', []):
-        if debtor['amount'] > 0:
-            c.execute("INSERT INTO debts (date, department, customer_name, amount, status) VALUES (?, ?, ?, ?, ?)",
-                      (date_str, "BAKERY", debtor['name'], debtor['amount'], "Unpaid"))
-    conn.commit()
-    conn.close()
-    save_daily_report("BAKERY", data['actual'], 0, data['actual'], data['staff'])
-
-def save_farm_entry(data):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("""INSERT INTO farm_records (date, staff_name, customer_name, items_summary, total_value, amount_paid, payment_mode, balance_due, note) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-              (data['date'], data['staff'], data['customer'], data['items'], data['total'], data['paid'], data['mode'], data['balance'], data['note']))
-    if data['balance'] > 0:
-        date_str = datetime.now().strftime("%Y-%m-%d")
-        c.execute("INSERT INTO debts (date, department, customer_name, amount, status) VALUES (?, ?, ?, ?, ?)",
-                  (date_str, "FARM", data['customer'], data['balance'], "Unpaid"))
-    conn.commit()
-    conn.close()
-    save_daily_report("FARM", data['paid'], 0, data['paid'], data['staff'])
-
-# --- HISTORY FUNCTIONS ---
-
-def get_dashboard_metrics():
-    conn = sqlite3.connect(DB_NAME)
-    try:
-        df_sales = pd.read_sql_query("SELECT * FROM daily_sales", conn)
-        rev = df_sales['gross_revenue'].sum() if not df_sales.empty else 0
-        exp = df_sales['total_expenses'].sum() if not df_sales.empty else 0
-        net = df_sales['net_cash'].sum() if not df_sales.empty else 0
-        df_debts = pd.read_sql_query("SELECT * FROM debts WHERE status='Unpaid'", conn)
-        total_debt = df_debts['amount'].sum() if not df_debts.empty else 0
-        recent_debts = df_debts.tail(5)
-    except:
-        rev, exp, net, total_debt = 0, 0, 0, 0
-        recent_debts = pd.DataFrame()
-    conn.close()
-    return rev, exp, net, total_debt, recent_debts
-
-def get_unpaid_debts():
-    conn = sqlite3.connect(DB_NAME)
-    try: df = pd.read_sql_query("SELECT id, date, department, customer_name, amount FROM debts WHERE status='Unpaid' AND amount > 0 ORDER BY id DESC", conn)
-    except: df = pd.DataFrame()
-    conn.close()
-    return df
-
-def process_debt_repayment(debt_id, payment_amount, staff_name):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT amount, customer_name FROM debts WHERE id=?", (debt_id,))
-    result = c.fetchone()
-    if not result:
-        conn.close(); return False, "Debt record not found."
-    current_amount, customer = result
-    if payment_amount > current_amount:
-        conn.close(); return False, f"Error: Payment (₦{payment_amount}) is more than debt (₦{current_amount})."
-    new_balance = current_amount - payment_amount
-    if new_balance <= 0: c.execute("UPDATE debts SET amount=0, status='Paid' WHERE id=?", (debt_id,))
-    else: c.execute("UPDATE debts SET amount=? WHERE id=?", (new_balance, debt_id))
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    c.execute("INSERT INTO daily_sales (date, department, gross_revenue, total_expenses, net_cash, submitted_by) VALUES (?, ?, ?, ?, ?, ?)", (date_str, "DEBT_RECOVERY", payment_amount, 0, payment_amount, staff_name))
-    conn.commit(); conn.close()
-    return True, f"Repayment of ₦{payment_amount:,.2f} recorded for {customer}!"
-
-def get_pos_history(): 
-    # Fetch detailed POS history
-    return _get_history("pos_records")
-
-def get_fuel_history(): return _get_history("fuel_records")
-def get_bakery_history(): return _get_history("bakery_records")
-def get_farm_history(): return _get_history("farm_records")
-
-def _get_history(table):
-    conn = sqlite3.connect(DB_NAME)
-    try: df = pd.read_sql_query(f"SELECT * FROM {table} ORDER BY id DESC LIMIT 50", conn)
-    except: df = pd.DataFrame()
-    conn.close()
-    return df
-
-init_db()
\ No newline at end of file
+import sqlite3
+import threading
+import time
+import queue
+import functools
+import inspect
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+DB_NAME = "okeb_data.db"
+
+# --- CONNECTION MANAGER ---
+# One pool of WAL-mode connections per database file. A thread checks a connection out for
+# the duration of a `get_conn()` / `transaction()` block; nested blocks on the same thread
+# reuse it, so helpers can call each other without opening a second connection.
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+LOCK_RETRIES = 5
+PRAGMAS = [
+    "PRAGMA auto_vacuum=INCREMENTAL",  # only takes on a new file, or on the next full VACUUM (maintenance.py)
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+]
+
+# Last N statements: {"sql", "wait_ms", "run_ms", "ts", "thread"}. wait_ms is time spent getting a
+# connection and backing off on locks before the statement could run.
+query_log = deque(maxlen=1000)
+
+# Write-lock contention since start (or reset_lock_stats()): `waits` counts BEGINs that sat in
+# SQLite's busy handler for more than LOCK_WAIT_MS behind another writer, `retries` our backoffs
+# on standalone statements, `errors` lock errors that were given up on and raised.
+LOCK_WAIT_MS = 2.0
+lock_stats = {"waits": 0, "wait_ms": 0.0, "retries": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+_pools = {}
+_pools_lock = threading.Lock()
+_local = threading.local()
+
+def _is_lock_error(e):
+    msg = str(e).lower()
+    return "locked" in msg or "busy" in msg
+
+class _TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        return self._timed(super().execute, sql, params, retry=True)
+
+    def executemany(self, sql, seq_of_params):
+        return self._timed(super().executemany, sql, seq_of_params, retry=False)
+
+    def _timed(self, fn, sql, params, retry):
+        conn = self.connection
+        wait = conn.pending_wait; conn.pending_wait = 0.0
+        # Inside a transaction we already hold the lock we need, so only retry standalone statements
+        attempts = LOCK_RETRIES if retry and not conn.in_transaction else 1
+        for attempt in range(attempts):
+            start = time.perf_counter()
+            try:
+                result = fn(sql, params)
+                break
+            except sqlite3.OperationalError as e:
+                if not _is_lock_error(e): raise
+                with _stats_lock: lock_stats["errors" if attempt == attempts - 1 else "retries"] += 1
+                if attempt == attempts - 1: raise
+                backoff = 0.05 * (2 ** attempt)
+                time.sleep(backoff)
+                wait += (time.perf_counter() - start) * 1000
+        run = (time.perf_counter() - start) * 1000
+        if run > LOCK_WAIT_MS and sql.startswith("BEGIN"):
+            with _stats_lock: lock_stats["waits"] += 1; lock_stats["wait_ms"] += run
+        query_log.append({"sql": " ".join(sql.split()), "wait_ms": round(wait, 3), "run_ms": round(run, 3), "ts": time.time(),
+                          "thread": threading.get_ident()})
+        return result
+
+class _PooledConnection(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pending_wait = 0.0
+        self.dirty = set()  # tables written in the open transaction, see touch()
+
+    def cursor(self, factory=_TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                           check_same_thread=False, factory=_PooledConnection)
+    for pragma in PRAGMAS: conn.execute(pragma)
+    return conn
+
+def _pool(path):
+    with _pools_lock:
+        if path not in _pools: _pools[path] = queue.LifoQueue(maxsize=POOL_SIZE)
+        return _pools[path]
+
+@contextmanager
+def get_conn():
+    held = getattr(_local, "held", None)
+    if held is None: held = _local.held = {}
+    path = DB_NAME
+    if path in held:
+        conn, depth = held[path]
+        held[path] = (conn, depth + 1)
+        try: yield conn
+        finally: held[path] = (conn, depth)
+        return
+    start = time.perf_counter()
+    pool = _pool(path)
+    try: conn = pool.get_nowait()
+    except queue.Empty: conn = _connect(path)
+    conn.pending_wait += (time.perf_counter() - start) * 1000
+    held[path] = (conn, 1)
+    try: yield conn
+    finally:
+        del held[path]
+        if conn.in_transaction: conn.rollback()
+        try: pool.put_nowait(conn)
+        except queue.Full: conn.close()
+
+@contextmanager
+def transaction():
+    # The unit of work: everything written inside one block, including nested save_* calls on the
+    # same thread, commits once or not at all. BEGIN IMMEDIATE takes the write lock up front so we
+    # never fail half-way through.
+    with get_conn() as conn:
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            versions = _bump_versions(conn, conn.dirty) if conn.dirty else {}
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            dirty = conn.dirty; conn.dirty = set()
+        # Only drop cached reads once the new rows are visible to other connections
+        if dirty: invalidate(*dirty); _saw_versions(versions)
+
+def close_all():
+    with _pools_lock:
+        pools = list(_pools.values()); _pools.clear()
+    for pool in pools:
+        while True:
+            try: pool.get_nowait().close()
+            except queue.Empty: break
+
+def get_query_stats():
+    return list(query_log)
+
+def get_lock_stats():
+    with _stats_lock: return dict(lock_stats, wait_ms=round(lock_stats["wait_ms"], 1))
+
+def reset_lock_stats():
+    with _stats_lock: lock_stats.update(waits=0, wait_ms=0.0, retries=0, errors=0)
+
+# --- READ CACHE ---
+# Read functions are memoised per database file and tagged with the tables they read.
+# Writers call touch(conn, table) inside their transaction; the matching entries are
+# dropped after commit, so reruns between writes never hit SQLite. Cached values are
+# shared between sessions: treat them as read-only.
+CACHE_TTL = 300
+CACHE_SIZE = 256
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def cached(*tables, by_table=False):
+    # by_table=True: the function's first argument is the table it reads, use that as the tag
+    def wrap(fn):
+        signature = inspect.signature(fn) if by_table else None
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if by_table:
+                # The table may come by keyword; bind so f("t") and f(table="t") share an entry
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                args, kwargs = tuple(bound.arguments.values()), {}
+            key = (DB_NAME, fn.__name__, args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with _cache_lock:
+                hit = _cache.get(key)
+                if hit and now - hit[0] < CACHE_TTL:
+                    _cache.move_to_end(key)
+                    return hit[1]
+            value = fn(*args, **kwargs)
+            tags = frozenset(tables) | ({args[0]} if by_table else set())
+            with _cache_lock:
+                _cache[key] = (now, value, tags)
+                while len(_cache) > CACHE_SIZE: _cache.popitem(last=False)
+            return value
+        inner.tables = frozenset(tables)
+        return inner
+    return wrap
+
+def touch(conn, *tables):
+    conn.dirty.update(tables)
+
+def invalidate(*tables):
+    # No arguments clears everything (e.g. after raw edits from the Database Admin page)
+    with _cache_lock:
+        for key in [k for k, v in _cache.items() if not tables or v[2].intersection(tables)]:
+            del _cache[key]
+
+# --- DATA VERSIONS ---
+# A write counter per table in data_versions, bumped in the same commit as every transaction
+# that touch()es the table. Pages poll data_version() (one primary-key read) and only re-query
+# when it moved. Other processes (job workers, sync imports) bump it too, so polling also drops
+# cached reads they made stale, which the in-process invalidation above cannot see.
+_seen_versions = {}  # DB_NAME -> {table: last version this process knows about}
+
+def _bump_versions(conn, tables):
+    tables = sorted(tables)
+    rows = conn.execute(f"""INSERT INTO data_versions (table_name, version) VALUES {', '.join('(?, 1)' for _ in tables)}
+                            ON CONFLICT(table_name) DO UPDATE SET version = version + 1
+                            RETURNING table_name, version""", tables).fetchall()
+    return dict(rows)
+
+def _saw_versions(versions):
+    seen = _seen_versions.setdefault(DB_NAME, {})
+    with _cache_lock:
+        for table, version in versions.items(): seen[table] = max(seen.get(table, 0), version)
+
+def data_version(*tables):
+    # Sum of the tables' counters (every table when none are given). Counters only go up, so the
+    # sum moves whenever one of them was written, here or in another process.
+    with get_conn() as conn:
+        sql = "SELECT table_name, version FROM data_versions"
+        if tables: sql += f" WHERE table_name IN ({', '.join('?' for _ in tables)})"
+        current = dict(conn.execute(sql, tables).fetchall())
+    seen = _seen_versions.get(DB_NAME, {})
+    moved = [t for t, v in current.items() if seen.get(t) != v]
+    if moved: invalidate(*moved); _saw_versions({t: current[t] for t in moved})
+    return sum(current.values())
+
+# --- DATES ---
+# Detail tables store a shift timestamp, ledger tables (daily_sales, debts) a plain day.
+# Both are ISO text so they sort and range-compare on the same "YYYY-MM-DD" prefix.
+DAY_FMT = "%Y-%m-%d"
+STAMP_FMT = "%Y-%m-%d %H:%M"
+_DATE_INPUT_FORMATS = ["%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M",
+                       "%Y-%m-%d", "%Y/%m/%d %H:%M", "%Y/%m/%d", "%d/%m/%Y %H:%M", "%d/%m/%Y"]
+
+def normalise_date(value, fmt=STAMP_FMT):
+    if isinstance(value, datetime): return value.strftime(fmt)
+    text = str(value).strip()
+    for f in _DATE_INPUT_FORMATS:
+        try: return datetime.strptime(text, f).strftime(fmt)
+        except ValueError: pass
+    return text
+
+def _today():
+    return datetime.now().strftime(DAY_FMT)
+
+# --- SCHEMA ---
+# Pandas is imported inside the functions that build frames, so importing this module (and the
+# login screen) stays light. init_db() does DDL only when the file's schema version is behind.
+_initialised = set()
+
+def init_db():
+    if DB_NAME in _initialised: return
+    with get_conn() as conn:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+    if current < SCHEMA_VERSION: _create_schema()
+    _initialised.add(DB_NAME)
+
+def _create_schema():
+    with transaction() as conn:
+        c = conn.cursor()
+
+        # 1. Daily Sales
+        c.execute('''CREATE TABLE IF NOT EXISTS daily_sales (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT, department TEXT, gross_revenue REAL, 
+                        total_expenses REAL, net_cash REAL, submitted_by TEXT
+                    )''')
+
+        # 2. POS Records (UPDATED COLUMNS)
+        c.execute('''CREATE TABLE IF NOT EXISTS pos_records (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT, staff_name TEXT, machine_id TEXT, 
+                        opening_cash REAL, opening_wallet REAL, capital_given REAL, 
+                        total_deposits REAL, total_withdrawals REAL, free_vol REAL,
+                        total_volume REAL, expected_comm REAL, actual_comm REAL, 
+                        bank_charges REAL, net_profit REAL,
+                        closing_cash REAL, closing_wallet REAL, calculated_balance REAL, status TEXT
+                    )''')
+
+        # 3. Fuel Records
+        c.execute('''CREATE TABLE IF NOT EXISTS fuel_records (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT, staff_name TEXT, 
+                        p1_name TEXT, pump_a_open REAL, pump_a_close REAL,
+                        p2_name TEXT, pump_b_open REAL, pump_b_close REAL,
+                        total_liters REAL, unit_price REAL, expected_revenue REAL, 
+                        cash_collected REAL, pos_collected REAL, credit_sales REAL, 
+                        shortage_surplus REAL, customer_name TEXT
+                    )''')
+
+        # 4. Bakery Records
+        c.execute('''CREATE TABLE IF NOT EXISTS bakery_records (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT, staff_name TEXT, total_bread_sold INTEGER, 
+                        total_damaged INTEGER, expected_revenue REAL, actual_revenue REAL, 
+                        shortage_surplus REAL, note TEXT, credit_sales REAL, customer_name TEXT
+                    )''')
+
+        # 5. Farm Records
+        c.execute('''CREATE TABLE IF NOT EXISTS farm_records (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT, staff_name TEXT, customer_name TEXT, 
+                        items_summary TEXT, total_value REAL, amount_paid REAL, 
+                        payment_mode TEXT, balance_due REAL, note TEXT
+                    )''')
+
+        # 6. Debts Table
+        c.execute('''CREATE TABLE IF NOT EXISTS debts (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT, department TEXT, customer_name TEXT, 
+                        amount REAL, status TEXT
+                    )''')
+
+        # 7. PRODUCT PRICES
+        c.execute('''CREATE TABLE IF NOT EXISTS prices (
+                        item_name TEXT PRIMARY KEY,
+                        price REAL
+                    )''')
+
+        # 8. Dashboard rollup, one row per (date, department), kept in step with daily_sales
+        c.execute('''CREATE TABLE IF NOT EXISTS daily_rollup (
+                        date TEXT, department TEXT, revenue REAL, expenses REAL,
+                        net_cash REAL, row_count INTEGER,
+                        PRIMARY KEY (date, department)
+                    )''')
+        if c.execute("SELECT count(*) FROM daily_rollup").fetchone()[0] == 0:
+            rebuild_rollup()
+
+        c.execute("SELECT count(*) FROM prices")
+        if c.fetchone()[0] == 0:
+            defaults = [
+                ("Big Jumbo", 1500), ("Small Jumbo", 800), ("Big Milk", 1200),
+                ("Family Loaf", 1000), ("Sardine Bread", 2000), ("Big Toast", 1000),
+                ("Small Toast", 500), ("Round Bread", 400),
+                ("Fuel Unit Price", 700)
+            ]
+            c.executemany("INSERT INTO prices VALUES (?, ?)", defaults)
+
+        migrate(conn)
+
+# --- MIGRATIONS ---
+# Each step runs once, in order, inside init_db's transaction; PRAGMA user_version records
+# the last applied step. Append new steps, never edit or reorder shipped ones.
+def _m001_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_debts_status_amount ON debts (status, amount)")
+    # Open debts are a small slice of the table; this keeps the unpaid list in id order without a sort
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_debts_unpaid ON debts (id, amount, customer_name, department, date, status) WHERE status='Unpaid'")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_debts_customer ON debts (customer_name, status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_daily_sales_dept_date ON daily_sales (department, date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_farm_customer ON farm_records (customer_name)")
+    for table in ["pos_records", "fuel_records", "bakery_records", "farm_records"]:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table} (date)")
+
+def _m002_normalise_dates(conn):
+    day_glob = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+    targets = [("daily_sales", DAY_FMT, day_glob), ("debts", DAY_FMT, day_glob)]
+    targets += [(t, STAMP_FMT, day_glob + " [0-9][0-9]:[0-9][0-9]") for t in ["pos_records", "fuel_records", "bakery_records", "farm_records"]]
+    for table, fmt, pattern in targets:
+        rows = conn.execute(f"SELECT id, date FROM {table} WHERE date IS NOT NULL AND date NOT GLOB ?", (pattern,)).fetchall()
+        fixed = [(normalise_date(d, fmt), i) for i, d in rows]
+        conn.executemany(f"UPDATE {table} SET date=? WHERE id=?", fixed)
+        if fixed: touch(conn, table)
+    rebuild_rollup()
+
+def _m003_history_filter_indexes(conn):
+    for table in ["pos_records", "fuel_records", "bakery_records", "farm_records"]:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_staff ON {table} (staff_name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pos_records_machine ON pos_records (machine_id)")
+
+def _m004_users(conn):
+    # Login accounts; password_hash is "pbkdf2_sha256$iterations$salt$hash" (see credentials.py)
+    conn.execute('''CREATE TABLE IF NOT EXISTS users (
+                        email TEXT PRIMARY KEY, password_hash TEXT NOT NULL,
+                        role TEXT, department TEXT, updated_at TEXT
+                    )''')
+    # The accounts that used to be hard-coded in auth.py, same passwords, stored hashed
+    seed = [
+        ("admin@okeb.com", "pbkdf2_sha256$600000$8436581f8158164c960942e050b245ac$785739ba21c5a8488c7a402be23b760c25ce6aee2409d6d1c2347cc7e827e94e", "ADMIN", "All"),
+        ("manager@okeb.com", "pbkdf2_sha256$600000$ddd6cdcc81e8882a38098c730a54171b$b5bec8afdc05e82d5296ea0e7dce1301a100c6b5cf4169f75e182a49e6a59fd4", "MANAGER", "All"),
+        ("fuel@okeb.com", "pbkdf2_sha256$600000$370087d73b2f533a5fc017fca38c9eba$d5d75e53c3dc13ee99f3474f8cb9bab08b41eba0710416d6b7751d5227bc23e1", "STAFF", "Fuel"),
+        ("bakery@okeb.com", "pbkdf2_sha256$600000$69538f718d28d43347e667e74f1c8f98$44fe843ff3e7c611091b1f3f30183af2637e2f0e1d821c6e553b5b1f5e8239e0", "STAFF", "Bakery"),
+        ("pos@okeb.com", "pbkdf2_sha256$600000$00eda8c5b6c5d118ac5f9555e531ec7a$7ed287b89ea941cd61a51f15783561e6372ce51556857ec86a85e0bf8b506ace", "STAFF", "POS"),
+        ("farm@okeb.com", "pbkdf2_sha256$600000$b2fa8b95f16b59a4ee1c9969172b35eb$b4920269ce375b9c132264b889e33a68717b212286ce483cb1bd3983a7a76851", "STAFF", "Farm"),
+    ]
+    conn.executemany("INSERT OR IGNORE INTO users (email, password_hash, role, department, updated_at) VALUES (?, ?, ?, ?, ?)",
+                     [row + (_today(),) for row in seed])
+
+def _m005_archive_manifest(conn):
+    # One row per Parquet partition written by archive.py
+    conn.execute('''CREATE TABLE IF NOT EXISTS archive_manifest (
+                        table_name TEXT, month TEXT, department TEXT, path TEXT, rows INTEGER,
+                        min_id INTEGER, max_id INTEGER, bytes INTEGER, archived_at TEXT,
+                        PRIMARY KEY (table_name, month, department)
+                    )''')
+
+def _m006_report_indexes(conn):
+    # Day-range reads for exports and the end-of-day report
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_debts_date ON debts (date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_daily_sales_date ON daily_sales (date)")
+
+def _m007_jobs(conn):
+    # Background job queue (jobs.py). checkpoint is saved in the job's own write transactions,
+    # so a job restarted after a crash resumes where its last commit left off.
+    conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, params TEXT,
+                        status TEXT NOT NULL, progress REAL, message TEXT, result TEXT, checkpoint TEXT,
+                        attempts INTEGER DEFAULT 0, worker TEXT, submitted_by TEXT,
+                        created_at TEXT, started_at TEXT, finished_at TEXT
+                    )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+
+def _m008_sync(conn):
+    # Multi-site sync (sync.py). settings holds this database's site id; changes is the outbox
+    # every business write appends to; sync_records maps rows merged in from other sites to their
+    # local id; sync_peers remembers how far each peer has been sent and received.
+    import uuid
+    conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("INSERT OR IGNORE INTO settings VALUES ('site_id', ?)", (uuid.uuid4().hex[:12],))
+    # origin_seq is NULL for changes made here (their seq is the origin seq), set for merged ones
+    conn.execute('''CREATE TABLE IF NOT EXISTS changes (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, origin_seq INTEGER,
+                        table_name TEXT NOT NULL, record_gid TEXT NOT NULL, op TEXT NOT NULL,
+                        payload TEXT, created_at TEXT,
+                        UNIQUE (origin, origin_seq)
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS sync_records (
+                        table_name TEXT NOT NULL, gid TEXT NOT NULL, local_id INTEGER NOT NULL,
+                        PRIMARY KEY (table_name, gid)
+                    )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sync_records_local ON sync_records (table_name, local_id)")
+    conn.execute('''CREATE TABLE IF NOT EXISTS sync_peers (
+                        site_id TEXT PRIMARY KEY, name TEXT, sent_seq INTEGER DEFAULT 0,
+                        received_seq INTEGER DEFAULT 0, last_sent TEXT, last_received TEXT
+                    )''')
+
+def _m009_reconciliation(conn):
+    # Bakery stock carried between shifts (total loaves at open, unsold at close), and the
+    # findings of reconcile.py, replaced on every rescan
+    conn.execute("ALTER TABLE bakery_records ADD COLUMN opening_stock INTEGER")
+    conn.execute("ALTER TABLE bakery_records ADD COLUMN closing_stock INTEGER")
+    conn.execute('''CREATE TABLE IF NOT EXISTS discrepancies (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, department TEXT,
+                        record_id INTEGER, prev_record_id INTEGER, key TEXT, date TEXT,
+                        expected REAL, actual REAL, difference REAL, detected_at TEXT
+                    )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_discrepancies_kind_date ON discrepancies (kind, date)")
+
+def _m010_line_items(conn):
+    # Per-product lines for bakery shifts and farm sales, keyed by the header row's id, and a
+    # per-product rollup kept in step like daily_rollup (and, like it, never archived)
+    conn.execute('''CREATE TABLE IF NOT EXISTS products (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE,
+                        department TEXT, unit_cost REAL
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS bakery_items (
+                        record_id INTEGER NOT NULL, product_id INTEGER NOT NULL, opening INTEGER, produced INTEGER,
+                        given INTEGER, unsold INTEGER, damaged INTEGER, sold INTEGER, unit_price REAL,
+                        PRIMARY KEY (record_id, product_id)
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS farm_items (
+                        record_id INTEGER NOT NULL, line INTEGER NOT NULL, product_id INTEGER NOT NULL,
+                        qty REAL, unit_price REAL,
+                        PRIMARY KEY (record_id, line)
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS product_rollup (
+                        date TEXT, product_id INTEGER, quantity REAL, damaged REAL, revenue REAL, cost REAL,
+                        PRIMARY KEY (date, product_id)
+                    )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_product_rollup_product ON product_rollup (product_id, date)")
+    conn.executemany("INSERT OR IGNORE INTO products (name, department) VALUES (?, 'BAKERY')",
+                     [(name,) for (name,) in conn.execute("SELECT item_name FROM prices WHERE item_name NOT LIKE 'Fuel%'").fetchall()])
+    # Existing farm sales: split items_summary ("3x Eggs, 1x Manure") into lines once, here
+    lines = [(record_id, line, i["product"], i["qty"], i["unit_price"])
+             for record_id, summary, total in conn.execute("SELECT id, items_summary, total_value FROM farm_records WHERE items_summary != ''")
+             for line, i in enumerate(parse_items_summary(summary, total), start=1)]
+    if lines:
+        ids = product_ids(conn, {name for _, _, name, _, _ in lines}, "FARM")
+        conn.executemany("INSERT OR IGNORE INTO farm_items VALUES (?, ?, ?, ?, ?)",
+                         [(r, line, ids[name], qty, price) for r, line, name, qty, price in lines])
+    rebuild_product_rollup()
+
+def _m011_data_versions(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS data_versions (table_name TEXT PRIMARY KEY, version INTEGER NOT NULL) WITHOUT ROWID")
+
+def _m012_price_history(conn):
+    # Every price change and when it took effect. History starts empty: shifts from before an
+    # item's first dated change keep the price they were recorded with.
+    conn.execute('''CREATE TABLE IF NOT EXISTS price_history (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT, item_name TEXT NOT NULL, price REAL NOT NULL,
+                        effective_from TEXT NOT NULL, changed_by TEXT, changed_at TEXT
+                    )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_price_history_item ON price_history (item_name, effective_from)")
+
+def _m013_maintenance(conn):
+    # maintenance.py: one row per backup/check/optimize/vacuum run with its timing, and the
+    # page-level storage numbers of each stats run ('(file)' is the whole database)
+    conn.execute('''CREATE TABLE IF NOT EXISTS maintenance_log (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL, started_at TEXT, seconds REAL,
+                        status TEXT, result TEXT
+                    )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_maintenance_log_op ON maintenance_log (op, id)")
+    conn.execute('''CREATE TABLE IF NOT EXISTS storage_stats (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT, taken_at TEXT NOT NULL, name TEXT NOT NULL,
+                        pages INTEGER, free_pages INTEGER, unused_pct REAL, fragmented_pct REAL, bytes INTEGER
+                    )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_storage_stats_name ON storage_stats (name, taken_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_kind ON jobs (kind, created_at)")  # jobs.SCHEDULE: last run per kind
+
+def _m014_insights(conn):
+    # insights.py: scored daily series and forecasts. Derived data, rebuilt with `insights.py --full`.
+    conn.execute('''CREATE TABLE IF NOT EXISTS insight_daily (
+                        kind TEXT NOT NULL, key TEXT NOT NULL, date TEXT NOT NULL, value REAL, mean REAL, std REAL,
+                        q1 REAL, q3 REAL, zscore REAL, flag TEXT, PRIMARY KEY (kind, key, date)
+                    ) WITHOUT ROWID''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_insight_daily_date ON insight_daily (date, flag)")
+    conn.execute('''CREATE TABLE IF NOT EXISTS insight_forecasts (
+                        kind TEXT NOT NULL, key TEXT NOT NULL, date TEXT NOT NULL, value REAL, lower REAL, upper REAL,
+                        PRIMARY KEY (kind, key, date)
+                    ) WITHOUT ROWID''')
+
+MIGRATIONS = [_m001_indexes, _m002_normalise_dates, _m003_history_filter_indexes, _m004_users,
+              _m005_archive_manifest, _m006_report_indexes, _m007_jobs, _m008_sync, _m009_reconciliation,
+              _m010_line_items, _m011_data_versions, _m012_price_history, _m013_maintenance,
+              _m014_insights]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate(conn):
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, step in enumerate(MIGRATIONS, start=1):
+        if version > current:
+            step(conn)
+            conn.execute(f"PRAGMA user_version={version}")
+    if current < SCHEMA_VERSION: conn.execute("ANALYZE")
+
+# --- PRICE FUNCTIONS ---
+@cached("prices")
+def get_prices():
+    with get_conn() as conn:
+        return dict(conn.execute("SELECT * FROM prices").fetchall())
+
+def update_price(item_name, new_price):
+    set_prices({item_name: new_price})
+
+def set_prices(changes, effective_from=None, changed_by=""):
+    # {item: price} as new versions in price_history, all in one transaction. effective_from
+    # defaults to now; it may be in the past (a change entered late) but not in the future.
+    # prices keeps each item's latest version for the entry pages.
+    now = datetime.now().strftime(STAMP_FMT)
+    when = normalise_date(effective_from) if effective_from else now
+    if when > now: raise ValueError("A price cannot take effect in the future")
+    if not changes: return 0
+    with transaction() as conn:
+        conn.executemany("INSERT OR IGNORE INTO prices (item_name, price) VALUES (?, ?)", [(item, float(price)) for item, price in changes.items()])
+        conn.executemany("INSERT INTO price_history (item_name, price, effective_from, changed_by, changed_at) VALUES (?, ?, ?, ?, ?)",
+                         [(item, float(price), when, changed_by, now) for item, price in changes.items()])
+        conn.execute(f"""UPDATE prices SET price = (SELECT h.price FROM price_history h WHERE h.item_name = prices.item_name
+                                                    ORDER BY h.effective_from DESC, h.id DESC LIMIT 1)
+                         WHERE item_name IN ({', '.join('?' for _ in changes)})""", list(changes))
+        touch(conn, "prices", "price_history")
+    return len(changes)
+
+@cached("price_history")
+def get_price_history(item_name=None):
+    # Every version, oldest first per item
+    import pandas as pd
+    sql, params = "SELECT id, item_name, price, effective_from, changed_by, changed_at FROM price_history", []
+    if item_name: sql += " WHERE item_name = ?"; params.append(item_name)
+    with get_conn() as conn:
+        return pd.read_sql_query(sql + " ORDER BY item_name, effective_from, id", conn, params=params)
+
+# --- CHANGE LOG ---
+# Every write to a synced table also appends the row's values to `changes`, in the same
+# transaction, under a record id "<site_id>:<local id>" that is unique per table across sites.
+# Rows merged in from another site keep the id they were given there (sync_records).
+# sync.py ships the log between sites.
+SYNC_TABLES = ["daily_sales", "pos_records", "fuel_records", "bakery_records", "farm_records", "debts"]
+_site_ids = {}
+_sync_columns = {}
+
+def site_id():
+    if DB_NAME not in _site_ids:
+        with get_conn() as conn:
+            _site_ids[DB_NAME] = conn.execute("SELECT value FROM settings WHERE key='site_id'").fetchone()[0]
+    return _site_ids[DB_NAME]
+
+def sync_columns(table):
+    # Every column but id, in table order
+    key = (DB_NAME, table)
+    if key not in _sync_columns:
+        with get_conn() as conn:
+            _sync_columns[key] = [r[1] for r in conn.execute(f"PRAGMA table_info({table})") if r[1] != "id"]
+    return _sync_columns[key]
+
+def log_changes(conn, table, op, ids):
+    # ids: local ids of rows just inserted/updated, or about to be deleted. A range is one BETWEEN.
+    fields = [f"'{c}', t.{c}" for c in sync_columns(table)]
+    if table in ITEM_TABLES:
+        # Line items travel inside the header's change, by product name (product ids are per site)
+        item_table = ITEM_TABLES[table]
+        item_fields = ", ".join(f"'{c}', i.{c}" for c in ITEM_COLUMNS[item_table])
+        fields.append(f"""'items', json((SELECT json_group_array(json_object('product', p.name, {item_fields}))
+                                          FROM {item_table} i JOIN products p ON p.id = i.product_id WHERE i.record_id = t.id))""")
+    payload = "json_object(" + ", ".join(fields) + ")"
+    gid = "COALESCE((SELECT gid FROM sync_records s WHERE s.table_name = ? AND s.local_id = t.id), ? || ':' || t.id)"
+    sql = f"""INSERT INTO changes (origin, table_name, record_gid, op, payload, created_at)
+              SELECT ?, ?, {gid}, ?, {payload}, ? FROM {table} t WHERE """
+    me, now = site_id(), datetime.now().strftime(STAMP_FMT)
+    if isinstance(ids, range):
+        conn.execute(sql + "t.id BETWEEN ? AND ? ORDER BY t.id", (me, table, table, me, op, now, ids.start, ids.stop - 1))
+    else:
+        ids = list(ids)
+        for i in range(0, len(ids), 500):
+            part = ids[i:i + 500]
+            conn.execute(sql + f"t.id IN ({', '.join('?' for _ in part)}) ORDER BY t.id", (me, table, table, me, op, now, *part))
+    touch(conn, "changes")
+
+def log_inserts(conn, table, count):
+    # Call straight after the INSERT: ids of one statement inside a write transaction are consecutive
+    if count <= 0: return
+    last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    log_changes(conn, table, "insert", range(last - count + 1, last + 1))
+
+# --- LINE ITEMS ---
+# Bakery shifts and farm sales keep one row per product next to the header row, written in the
+# same transaction. product_rollup sums them per (day, product) for the product reports; cost
+# uses the product's unit_cost at the time of sale, and bakery cost includes damaged loaves.
+ITEM_TABLES = {"bakery_records": "bakery_items", "farm_records": "farm_items"}
+ITEM_COLUMNS = {"bakery_items": ["opening", "produced", "given", "unsold", "damaged", "sold", "unit_price"],
+                "farm_items": ["qty", "unit_price"]}
+
+def product_ids(conn, names, department):
+    # {name: id}, adding products seen for the first time
+    names = sorted({n.strip() for n in names if n and n.strip()})
+    def lookup(wanted):
+        found = {}
+        for i in range(0, len(wanted), 500):
+            part = wanted[i:i + 500]
+            found.update(conn.execute(f"SELECT name, id FROM products WHERE name IN ({', '.join('?' for _ in part)})", part).fetchall())
+        return found
+    ids = lookup(names)
+    missing = [n for n in names if n not in ids]
+    if missing:
+        conn.executemany("INSERT INTO products (name, department) VALUES (?, ?)", [(n, department) for n in missing])
+        touch(conn, "products")
+        ids.update(lookup(missing))
+    return ids
+
+def parse_items_summary(summary, total=None):
+    # Farm items_summary ("3x Eggs, 1x Manure") as line items. The unit price is only known when
+    # the sale had a single line.
+    import re
+    parts = [m for m in (re.match(r"\s*([\d.]+)x\s+(.+?)\s*$", p) for p in (summary or "").split(",")) if m]
+    items = []
+    for m in parts:
+        qty = float(m.group(1))
+        items.append({"product": m.group(2), "qty": qty, "unit_price": total / qty if len(parts) == 1 and total and qty else None})
+    return items
+
+def record_items(conn, table, record_id, date_str, items):
+    # items: dicts with "product" (name) and the item table's columns; blank products are skipped
+    items = [i for i in items if str(i.get("product") or "").strip()]
+    if not items: return
+    item_table, cols = ITEM_TABLES[table], ITEM_COLUMNS[ITEM_TABLES[table]]
+    ids = product_ids(conn, [i["product"] for i in items], "BAKERY" if table == "bakery_records" else "FARM")
+    if table == "bakery_records":
+        rows = [(record_id, ids[i["product"].strip()], *[i.get(c) for c in cols]) for i in items]
+        conn.executemany(f"INSERT OR REPLACE INTO bakery_items (record_id, product_id, {', '.join(cols)}) VALUES (?, ?, {', '.join('?' for _ in cols)})", rows)
+        sums = [(ids[i["product"].strip()], i.get("sold") or 0, i.get("damaged") or 0, (i.get("sold") or 0) * (i.get("unit_price") or 0)) for i in items]
+    else:
+        rows = [(record_id, line, ids[i["product"].strip()], i.get("qty"), i.get("unit_price")) for line, i in enumerate(items, start=1)]
+        conn.executemany("INSERT OR REPLACE INTO farm_items (record_id, line, product_id, qty, unit_price) VALUES (?, ?, ?, ?, ?)", rows)
+        sums = [(ids[i["product"].strip()], i.get("qty") or 0, 0, (i.get("qty") or 0) * (i.get("unit_price") or 0)) for i in items]
+    conn.executemany("""INSERT INTO product_rollup (date, product_id, quantity, damaged, revenue, cost)
+                        SELECT ?, id, ?, ?, ?, (? + ?) * COALESCE(unit_cost, 0) FROM products WHERE id = ?
+                        ON CONFLICT (date, product_id) DO UPDATE SET
+                            quantity = quantity + excluded.quantity, damaged = damaged + excluded.damaged,
+                            revenue = revenue + excluded.revenue, cost = cost + excluded.cost""",
+                     [(date_str[:10], qty, damaged, revenue, qty, damaged, pid) for pid, qty, damaged, revenue in sums])
+    touch(conn, item_table, "product_rollup")
+
+def delete_items(conn, table, record_ids):
+    item_table = ITEM_TABLES[table]
+    conn.executemany(f"DELETE FROM {item_table} WHERE record_id = ?", [(r,) for r in record_ids])
+    touch(conn, item_table)
+
+def rebuild_product_rollup():
+    # From the line items and their header dates. Archived months keep their rollup rows, as in rebuild_rollup().
+    with transaction() as conn:
+        archived = conn.execute("SELECT MAX(month) FROM archive_manifest WHERE table_name IN ('bakery_records', 'farm_records')").fetchone()[0] \
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name='archive_manifest'").fetchone() else None
+        start = f"{archived}-32" if archived else ""
+        conn.execute("DELETE FROM product_rollup WHERE date > ?", (start,))
+        conn.execute("""INSERT INTO product_rollup (date, product_id, quantity, damaged, revenue, cost)
+                        SELECT day, product_id, SUM(quantity), SUM(damaged), SUM(revenue), SUM(cost) FROM (
+                            SELECT substr(r.date, 1, 10) AS day, i.product_id, i.sold AS quantity, i.damaged,
+                                   i.sold * COALESCE(i.unit_price, 0) AS revenue,
+                                   (COALESCE(i.sold, 0) + COALESCE(i.damaged, 0)) * COALESCE(p.unit_cost, 0) AS cost
+                            FROM bakery_items i JOIN bakery_records r ON r.id = i.record_id JOIN products p ON p.id = i.product_id
+                            UNION ALL
+                            SELECT substr(r.date, 1, 10), i.product_id, i.qty, 0, i.qty * COALESCE(i.unit_price, 0),
+                                   i.qty * COALESCE(p.unit_cost, 0)
+                            FROM farm_items i JOIN farm_records r ON r.id = i.record_id JOIN products p ON p.id = i.product_id
+                        ) WHERE day > ? GROUP BY day, product_id""", (start,))
+        touch(conn, "product_rollup")
+
+@cached("products")
+def get_products():
+    import pandas as pd
+    with get_conn() as conn:
+        return pd.read_sql_query("SELECT id, name, department, unit_cost FROM products ORDER BY department, name", conn)
+
+def set_unit_costs(costs):
+    # {product name: unit cost}; applies to sales from now on
+    with transaction() as conn:
+        conn.executemany("UPDATE products SET unit_cost=? WHERE name=?", [(c, n) for n, c in costs.items()])
+        touch(conn, "products")
+
+# --- SAVE FUNCTIONS ---
+
+def _record_daily_sale(conn, date_str, dept, revenue, expenses, net_cash, user):
+    # Every daily_sales row goes through here so the rollup moves in the same transaction
+    record_daily_sales(conn, [(date_str, dept, revenue, expenses, net_cash, user)])
+
+def record_daily_sales(conn, rows):
+    # rows: (date, department, revenue, expenses, net_cash, user); the rollup gets one upsert per (date, department)
+    conn.executemany("INSERT INTO daily_sales (date, department, gross_revenue, total_expenses, net_cash, submitted_by) VALUES (?, ?, ?, ?, ?, ?)", rows)
+    log_inserts(conn, "daily_sales", len(rows))
+    add_to_rollup(conn, rows)
+
+def add_to_rollup(conn, rows):
+    totals = {}
+    for date_str, dept, revenue, expenses, net_cash, _ in rows:
+        t = totals.setdefault((date_str, dept), [0, 0, 0, 0])
+        t[0] += revenue or 0; t[1] += expenses or 0; t[2] += net_cash or 0; t[3] += 1
+    conn.executemany("""INSERT INTO daily_rollup (date, department, revenue, expenses, net_cash, row_count)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (date, department) DO UPDATE SET
+                            revenue = revenue + excluded.revenue, expenses = expenses + excluded.expenses,
+                            net_cash = net_cash + excluded.net_cash, row_count = row_count + excluded.row_count""",
+                     [(d, dept, *t) for (d, dept), t in totals.items()])
+    touch(conn, "daily_sales", "daily_rollup")
+
+def _record_debts(conn, date_str, dept, debtors):
+    rows = [(date_str, dept, d['name'], d['amount'], "Unpaid") for d in debtors if d['amount'] > 0]
+    if not rows: return
+    conn.executemany("INSERT INTO debts (date, department, customer_name, amount, status) VALUES (?, ?, ?, ?, ?)", rows)
+    log_inserts(conn, "debts", len(rows))
+    touch(conn, "debts")
+
+def save_daily_report(dept, revenue, expenses, net_cash, user):
+    date_str = _today()
+    with transaction() as conn:
+        _record_daily_sale(conn, date_str, dept, revenue, expenses, net_cash, user)
+
+def save_pos_entry(data):
+    with transaction() as conn:
+        # Updated insert to match new columns
+        conn.execute("""INSERT INTO pos_records 
+                     (date, staff_name, machine_id, opening_cash, opening_wallet, capital_given, 
+                      total_deposits, total_withdrawals, free_vol, total_volume, 
+                      expected_comm, actual_comm, bank_charges, net_profit,
+                      closing_cash, closing_wallet, calculated_balance, status) 
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                  (normalise_date(data['date']), data['staff'], data['machine'], data['open_cash'], data['open_wallet'], data['capital'], 
+                   data['deposits'], data['withdrawals'], data['free'], data['volume'],
+                   data['expected'], data['actual'], data['bank'], data['profit'],
+                   data['close_cash'], data['close_wallet'], data['balance'], data['status']))
+        log_inserts(conn, "pos_records", 1)
+        touch(conn, "pos_records")
+        # We save Net Profit as the revenue for the dashboard
+        _record_daily_sale(conn, _today(), "POS", data['profit'], 0, data['profit'], data['staff'])
+
+def save_fuel_entry(data):
+    cust_label = "Multiple Debtors" if len(data.get('debtors_list', [])) > 0 else "None"
+    date_str = _today()
+    with transaction() as conn:
+        c = conn.cursor()
+        c.execute("""INSERT INTO fuel_records (date, staff_name, p1_name, pump_a_open, pump_a_close, p2_name, pump_b_open, pump_b_close, total_liters, unit_price, expected_revenue, cash_collected, pos_collected, credit_sales, shortage_surplus, customer_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                  (normalise_date(data['date']), data['staff'], data['p1_name'], data['pA_open'], data['pA_close'], data['p2_name'], data['pB_open'], data['pB_close'], data['total_liters'], data['price'], data['expected'], data['cash'], data['pos'], data['credit'], data['diff'], cust_label))
+        log_inserts(conn, "fuel_records", 1)
+        _record_debts(conn, date_str, "FUEL", data.get('debtors_list', []))
+        touch(conn, "fuel_records")
+        actual_rev = data['cash'] + data['pos']
+        _record_daily_sale(conn, date_str, "FUEL", actual_rev, 0, actual_rev, data['staff'])
+
+def save_bakery_entry(data):
+    cust_label = "Multiple Debtors" if len(data.get('debtors_list', [])) > 0 else "None"
+    date_str = _today()
+    with transaction() as conn:
+        c = conn.cursor()
+        c.execute("""INSERT INTO bakery_records (date, staff_name, total_bread_sold, total_damaged, expected_revenue, actual_revenue, shortage_surplus, note, credit_sales, customer_name, opening_stock, closing_stock) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                  (normalise_date(data['date']), data['staff'], data['sold_qty'], data['damaged_qty'], data['expected'], data['actual'], data['diff'], data['note'], data['credit'], cust_label, data.get('open_stock'), data.get('close_stock')))
+        record_id = c.lastrowid
+        record_items(conn, "bakery_records", record_id, normalise_date(data['date']), data.get('items', []))
+        log_changes(conn, "bakery_records", "insert", [record_id])
+        _record_debts(conn, date_str, "BAKERY", data.get('debtors_list', []))
+        touch(conn, "bakery_records")
+        _record_daily_sale(conn, date_str, "BAKERY", data['actual'], 0, data['actual'], data['staff'])
+
+def save_farm_entry(data):
+    with transaction() as conn:
+        c = conn.cursor()
+        c.execute("""INSERT INTO farm_records (date, staff_name, customer_name, items_summary, total_value, amount_paid, payment_mode, balance_due, note) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                  (normalise_date(data['date']), data['staff'], data['customer'], data['items'], data['total'], data['paid'], data['mode'], data['balance'], data['note']))
+        record_id = c.lastrowid
+        date_str = _today()
+        record_items(conn, "farm_records", record_id, normalise_date(data['date']), data.get('line_items', []))
+        log_changes(conn, "farm_records", "insert", [record_id])
+        _record_debts(conn, date_str, "FARM", [{"name": data['customer'], "amount": data['balance']}])
+        touch(conn, "farm_records")
+        _record_daily_sale(conn, date_str, "FARM", data['paid'], 0, data['paid'], data['staff'])
+
+# --- HISTORY FUNCTIONS ---
+
+@cached("daily_rollup", "debts")
+def get_dashboard_metrics():
+    import pandas as pd
+    with get_conn() as conn:
+        try:
+            rev, exp, net = conn.execute("SELECT COALESCE(SUM(revenue), 0), COALESCE(SUM(expenses), 0), COALESCE(SUM(net_cash), 0) FROM daily_rollup").fetchone()
+            total_debt = conn.execute("SELECT COALESCE(SUM(amount), 0) FROM debts WHERE status='Unpaid'").fetchone()[0]
+            recent_debts = pd.read_sql_query("SELECT * FROM (SELECT * FROM debts WHERE status='Unpaid' ORDER BY id DESC LIMIT 5) ORDER BY id", conn)
+        except:
+            rev, exp, net, total_debt = 0, 0, 0, 0
+            recent_debts = pd.DataFrame()
+    return rev, exp, net, total_debt, recent_debts
+
+@cached("daily_rollup")
+def get_revenue_trend():
+    import pandas as pd
+    with get_conn() as conn:
+        try: df = pd.read_sql_query("SELECT date, department, revenue AS gross_revenue FROM daily_rollup ORDER BY date", conn)
+        except: df = pd.DataFrame()
+    return df
+
+def rebuild_rollup():
+    # Recompute the rollup from daily_sales, e.g. for databases created before it existed or after admin edits.
+    # Months already moved to the Parquet archive keep their rollup rows.
+    with transaction() as conn:
+        archived = conn.execute("SELECT MAX(month) FROM archive_manifest WHERE table_name='daily_sales'").fetchone()[0] \
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name='archive_manifest'").fetchone() else None
+        start = f"{archived}-32" if archived else ""  # sorts after every day of the archived month
+        conn.execute("DELETE FROM daily_rollup WHERE date > ?", (start,))
+        touch(conn, "daily_rollup")
+        conn.execute("""INSERT INTO daily_rollup (date, department, revenue, expenses, net_cash, row_count)
+                        SELECT date, department, COALESCE(SUM(gross_revenue), 0), COALESCE(SUM(total_expenses), 0),
+                               COALESCE(SUM(net_cash), 0), COUNT(*)
+                        FROM daily_sales WHERE date > ? GROUP BY date, department""", (start,))
+        return conn.execute("SELECT count(*) FROM daily_rollup").fetchone()[0]
+
+@cached("debts")
+def get_unpaid_debts():
+    import pandas as pd
+    with get_conn() as conn:
+        try: df = pd.read_sql_query("SELECT id, date, department, customer_name, amount FROM debts WHERE status='Unpaid' AND amount > 0 ORDER BY id DESC", conn)
+        except: df = pd.DataFrame()
+    return df
+
+def process_debt_repayment(debt_id, payment_amount, staff_name):
+    with transaction() as conn:
+        c = conn.cursor()
+        c.execute("SELECT amount, customer_name FROM debts WHERE id=?", (debt_id,))
+        result = c.fetchone()
+        if not result: return False, "Debt record not found."
+        current_amount, customer = result
+        if payment_amount > current_amount:
+            return False, f"Error: Payment (₦{payment_amount}) is more than debt (₦{current_amount})."
+        new_balance = current_amount - payment_amount
+        if new_balance <= 0: c.execute("UPDATE debts SET amount=0, status='Paid' WHERE id=?", (debt_id,))
+        else: c.execute("UPDATE debts SET amount=? WHERE id=?", (new_balance, debt_id))
+        log_changes(conn, "debts", "update", [debt_id])
+        touch(conn, "debts")
+        date_str = _today()
+        _record_daily_sale(conn, date_str, "DEBT_RECOVERY", payment_amount, 0, payment_amount, staff_name)
+    return True, f"Repayment of ₦{payment_amount:,.2f} recorded for {customer}!"
+
+@cached("pos_records")
+def get_pos_history(): 
+    # Fetch detailed POS history
+    return _get_history("pos_records")
+
+@cached("fuel_records")
+def get_fuel_history(): return _get_history("fuel_records")
+@cached("bakery_records")
+def get_bakery_history(): return _get_history("bakery_records")
+@cached("farm_records")
+def get_farm_history(): return _get_history("farm_records")
+
+def _get_history(table):
+    return get_history_page(table)[0]
+
+# --- PAGED HISTORY ---
+# Keyset pagination on id: each page is "the next N rows below this id", so page 200 costs
+# the same as page 1. Only the columns the history views show are read.
+HISTORY_PAGE_SIZE = 50
+HISTORY_COLUMNS = {
+    "pos_records": ["id", "date", "staff_name", "machine_id", "total_volume", "actual_comm", "bank_charges",
+                    "net_profit", "closing_cash", "closing_wallet", "calculated_balance", "status"],
+    "fuel_records": ["id", "date", "staff_name", "total_liters", "unit_price", "expected_revenue",
+                     "cash_collected", "pos_collected", "credit_sales", "shortage_surplus", "customer_name"],
+    "bakery_records": ["id", "date", "staff_name", "total_bread_sold", "total_damaged", "expected_revenue",
+                       "actual_revenue", "credit_sales", "shortage_surplus", "note"],
+    "farm_records": ["id", "date", "staff_name", "customer_name", "items_summary", "total_value",
+                     "amount_paid", "payment_mode", "balance_due", "note"],
+}
+# filter name -> column, for the tables that have it
+HISTORY_FILTERS = {"staff": "staff_name", "machine": "machine_id", "customer": "customer_name"}
+
+@cached(by_table=True)
+def get_history_page(table, before_id=None, limit=HISTORY_PAGE_SIZE, date_from=None, date_to=None,
+                     staff=None, machine=None, customer=None):
+    # Returns (frame, next_before_id); next_before_id is None on the last page.
+    import pandas as pd
+    if table not in HISTORY_COLUMNS: raise ValueError(f"No history view for {table}")
+    columns = HISTORY_COLUMNS[table]
+    where, params, equals = [], [], {}
+    start = normalise_date(date_from, DAY_FMT) if date_from else None
+    # date_to is inclusive: compare against the start of the following day
+    end = (datetime.strptime(normalise_date(date_to, DAY_FMT), DAY_FMT) + timedelta(days=1)).strftime(DAY_FMT) if date_to else None
+    if before_id is not None: where.append("id < ?"); params.append(before_id)
+    if start: where.append("date >= ?"); params.append(start)
+    if end: where.append("date < ?"); params.append(end)
+    for name, value in (("staff", staff), ("machine", machine), ("customer", customer)):
+        if not value: continue
+        column = HISTORY_FILTERS[name]
+        if column not in columns: raise ValueError(f"{table} cannot be filtered by {name}")
+        where.append(f"{column} = ?"); params.append(value)
+        equals[column] = value
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where: sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit + 1)
+    with get_conn() as conn:
+        try: df = pd.read_sql_query(sql, conn, params=params)
+        except: df = pd.DataFrame(columns=columns)
+    # Closed months live in the Parquet archive; only partitions that could beat the hot page are read
+    import archive
+    floor = int(df['id'].iloc[-1]) if len(df) > limit else None
+    cold = archive.read_page(table, columns, before_id, floor, limit + 1, start, end, equals)
+    if len(cold) and df.empty: df = cold
+    elif len(cold):
+        df = pd.concat([df, cold], ignore_index=True).drop_duplicates("id").sort_values("id", ascending=False)
+        df = df.head(limit + 1).reset_index(drop=True)
+    if len(df) > limit: return df.iloc[:limit], int(df['id'].iloc[limit - 1])
+    return df, None
+
+# --- TABLE ADMIN ---
+# The Database Admin editor works on one page of a table at a time and saves a change-set:
+# only rows that were added, edited or removed are written, keyed by primary key.
+ADMIN_TABLES = ["daily_sales", "pos_records", "fuel_records", "bakery_records", "farm_records", "debts", "prices"]
+ADMIN_PAGE_SIZE = 500
+
+def primary_key(table):
+    with get_conn() as conn:
+        return next(r[1] for r in conn.execute(f"PRAGMA table_info({table})") if r[5])
+
+def get_table_page(table, after=None, limit=ADMIN_PAGE_SIZE):
+    import pandas as pd
+    # Returns (frame, next_after); next_after is None on the last page.
+    if table not in ADMIN_TABLES: raise ValueError(f"{table} is not editable")
+    pk = primary_key(table)
+    sql, params = f"SELECT * FROM {table}", []
+    if after is not None: sql += f" WHERE {pk} > ?"; params.append(after)
+    sql += f" ORDER BY {pk} LIMIT ?"; params.append(limit + 1)
+    with get_conn() as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    if len(df) > limit: return df.iloc[:limit], _py(df[pk].iloc[limit - 1])
+    return df, None
+
+def _py(value):
+    return value.item() if hasattr(value, "item") else value
+
+def _rows(df):
+    # Plain Python values (no numpy scalars / NaN) for sqlite3 parameter binding
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+def diff_frames(original, edited, pk):
+    import pandas as pd
+    # Returns (inserts, updates, deletes): two frames and a list of primary keys.
+    cols = [c for c in original.columns if c != pk]
+    edited = edited.reindex(columns=original.columns)
+    keyed = edited[edited[pk].notna()].set_index(pk)
+    before = original.set_index(pk)
+    deletes = before.index.difference(keyed.index).tolist()
+    new_keys = keyed.index.difference(before.index)
+    inserts = pd.concat([edited[edited[pk].isna()], keyed.loc[new_keys].reset_index()[original.columns]], ignore_index=True)
+    common = keyed.index.intersection(before.index)
+    a, b = before.loc[common, cols], keyed.loc[common, cols]
+    changed = ~((a == b) | (a.isna() & b.isna()))
+    updates = b[changed.any(axis=1)].reset_index()
+    return inserts, updates, deletes
+
+def _apply_price_changes(original, edited, changed_by):
+    # New and changed prices go through set_prices, so each is a price_history version that
+    # as-of repricing sees. A deleted item leaves its history behind.
+    import pandas as pd
+    inserts, updates, deletes = diff_frames(original, edited, "item_name")
+    changed = pd.concat([inserts, updates], ignore_index=True)
+    if changed["item_name"].isna().any() or changed["price"].isna().any(): raise ValueError("Every price needs an item name and a price")
+    with transaction() as conn:
+        if deletes:
+            conn.executemany("DELETE FROM prices WHERE item_name = ?", [(_py(k),) for k in deletes])
+            touch(conn, "prices")
+        set_prices(dict(zip(changed["item_name"], changed["price"])), changed_by=changed_by)
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
+def apply_changes(table, original, edited, changed_by=""):
+    if table not in ADMIN_TABLES: raise ValueError(f"{table} is not editable")
+    if table == "prices": return _apply_price_changes(original, edited, changed_by)
+    pk = primary_key(table)
+    inserts, updates, deletes = diff_frames(original, edited, pk)
+    cols = [c for c in original.columns if c != pk]
+    with transaction() as conn:
+        synced = table in SYNC_TABLES
+        if deletes:
+            # Logged first: the delete carries the row's last values
+            if synced: log_changes(conn, table, "delete", [_py(k) for k in deletes])
+            conn.executemany(f"DELETE FROM {table} WHERE {pk} = ?", [(_py(k),) for k in deletes])
+            if table in ITEM_TABLES: delete_items(conn, table, [_py(k) for k in deletes])
+        if not updates.empty:
+            assignments = ", ".join(f"{c} = ?" for c in cols)
+            conn.executemany(f"UPDATE {table} SET {assignments} WHERE {pk} = ?", _rows(updates[cols + [pk]]))
+            if synced: log_changes(conn, table, "update", [_py(k) for k in updates[pk]])
+        if not inserts.empty:
+            # Rows without a key get one from AUTOINCREMENT; rows typed in with a key keep it
+            for has_key, group in inserts.groupby(inserts[pk].notna()):
+                insert_cols = original.columns.tolist() if has_key else cols
+                marks = ", ".join("?" for _ in insert_cols)
+                conn.executemany(f"INSERT INTO {table} ({', '.join(insert_cols)}) VALUES ({marks})", _rows(group[insert_cols]))
+                if not synced: continue
+                if has_key: log_changes(conn, table, "insert", [_py(k) for k in group[pk]])
+                else: log_inserts(conn, table, len(group))
+        touch(conn, table)
+        if table == "daily_sales": rebuild_rollup()
+        if table in ITEM_TABLES and deletes: rebuild_product_rollup()
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
+init_db()
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ["rebuild-rollup"]:
+        print(f"Rebuilt daily_rollup: {rebuild_rollup()} rows")
+    else:
+        print("Usage: python database.py rebuild-rollup")
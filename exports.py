@@ -0,0 +1,271 @@
+import io
+import re
+import csv
+import codecs
+import zlib
+import zipfile
+import itertools
+import tempfile
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+import database as db
+import archive
+
+# Streaming exports to CSV, XLSX and PDF. Rows leave SQLite (and the Parquet archive) in
+# CHUNK_ROWS batches and go straight into a temporary file, so memory stays flat however many
+# rows are exported. XLSX and PDF are written with the standard library: a workbook is a zip of
+# XML parts, the PDF uses the built-in Courier font.
+# A report is a list of sections (title, columns, row chunks): a table export is one section,
+# the end-of-day report one section per department.
+
+CHUNK_ROWS = 5000
+FORMATS = {"csv": "text/csv",
+           "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+           "pdf": "application/pdf"}
+DEPARTMENT_TABLES = {"POS": "pos_records", "FUEL": "fuel_records", "BAKERY": "bakery_records", "FARM": "farm_records"}
+
+# --- ROW SOURCES ---
+def _columns(table):
+    with db.get_conn() as conn:
+        return [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+
+def _bounds(date_from, date_to):
+    start = db.normalise_date(date_from, db.DAY_FMT) if date_from else None
+    end = (datetime.strptime(db.normalise_date(date_to, db.DAY_FMT), db.DAY_FMT) + timedelta(days=1)).strftime(db.DAY_FMT) if date_to else None
+    return start, end
+
+def iter_chunks(table, columns=None, date_from=None, date_to=None, departments=None):
+    # Lists of row tuples, at most CHUNK_ROWS each: archived months first, then the hot table.
+    # The hot table is read by rowid keyset, one short query per chunk, so no read stays open
+    # while the file is being written. date_to is inclusive.
+    if table not in db.ADMIN_TABLES: raise ValueError(f"{table} cannot be exported")
+    available = _columns(table)
+    columns = columns or available
+    start, end = _bounds(date_from, date_to) if "date" in available else (None, None)
+    if table != "daily_sales": departments = None
+    paths = archive._paths(table, start, end, departments=departments) if table in archive.ARCHIVE_TABLES else []
+    pa = archive._pyarrow() if paths else None
+    schema = archive._schema(pa, table) if pa else None  # older partitions read added columns as null
+    for path in paths if pa else []:
+        data = pa.dataset.dataset(path, format="parquet", schema=schema)
+        for batch in data.to_batches(columns=columns, filter=archive._filter(pa.dataset, start, end), batch_size=CHUNK_ROWS):
+            if batch.num_rows: yield list(zip(*[col.to_pylist() for col in batch.columns]))
+    where, params = ["rowid > ?"], []
+    if start: where.append("date >= ?"); params.append(start)
+    if end: where.append("date < ?"); params.append(end)
+    if departments: where.append(f"department IN ({', '.join('?' for _ in departments)})"); params += list(departments)
+    sql = f"SELECT rowid, {', '.join(columns)} FROM {table} WHERE {' AND '.join(where)} ORDER BY rowid LIMIT ?"
+    last = -1
+    while True:
+        with db.get_conn() as conn:
+            rows = conn.execute(sql, [last] + params + [CHUNK_ROWS]).fetchall()
+        if not rows: return
+        last = rows[-1][0]
+        yield [r[1:] for r in rows]
+        if len(rows) < CHUNK_ROWS: return
+
+def table_sections(table, date_from=None, date_to=None, departments=None):
+    title = table + (f" {date_from or '...'} to {date_to or '...'}" if date_from or date_to else "")
+    return [(title, _columns(table), iter_chunks(table, None, date_from, date_to, departments))]
+
+def end_of_day_sections(day=None):
+    # Consolidated report for one day: totals per department, each department's shifts,
+    # debts raised and debt repayments
+    day = db.normalise_date(day or datetime.now(), db.DAY_FMT)
+    summary_cols = ["department", "revenue", "expenses", "net_cash", "entries"]
+    with db.get_conn() as conn:
+        summary = conn.execute("""SELECT department, revenue, expenses, net_cash, row_count FROM daily_rollup WHERE date=?
+                                  UNION ALL
+                                  SELECT 'TOTAL', COALESCE(SUM(revenue), 0), COALESCE(SUM(expenses), 0), COALESCE(SUM(net_cash), 0),
+                                         COALESCE(SUM(row_count), 0) FROM daily_rollup WHERE date=?""", (day, day)).fetchall()
+    sections = [("Summary", summary_cols, iter([summary]))]
+    for dept, table in DEPARTMENT_TABLES.items():
+        columns = db.HISTORY_COLUMNS[table]
+        sections.append((dept.title(), columns, iter_chunks(table, columns, day, day)))
+    debt_cols = ["id", "department", "customer_name", "amount", "status"]
+    sections.append(("Debts raised", debt_cols, iter_chunks("debts", debt_cols, day, day)))
+    repay_cols = ["id", "gross_revenue", "submitted_by"]
+    sections.append(("Debt repayments", repay_cols, iter_chunks("daily_sales", repay_cols, day, day, ["DEBT_RECOVERY"])))
+    return sections
+
+# --- WRITERS ---
+def write_csv(sections, out, title=None):
+    # Each chunk is formatted into a buffer and written in one go
+    out.write(codecs.BOM_UTF8)  # so Excel reads ₦ and names as UTF-8
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    def flush():
+        out.write(buffer.getvalue().encode("utf-8"))
+        buffer.seek(0); buffer.truncate()
+    for i, (section, columns, chunks) in enumerate(sections):
+        if len(sections) > 1:
+            if i: writer.writerow([])
+            writer.writerow([section])
+        writer.writerow(columns)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            flush()
+    flush()
+
+XLSX_MAX_ROWS = 1_048_576
+_XML_BAD = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_STYLES = f"""<styleSheet {_NS}><fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/><xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs></styleSheet>"""
+
+def _xlsx_cell(value, style=""):
+    if value is None: return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value and abs(value) != float("inf"):
+        return f"<c{style}><v>{value!r}</v></c>"
+    return f'<c t="inlineStr"{style}><is><t xml:space="preserve">{escape(_XML_BAD.sub("", str(value)))}</t></is></c>'
+
+def _sheet_name(title, used):
+    base = re.sub(r"[\[\]:*?/\\]", " ", title).strip()[:31] or "Sheet"
+    name, n = base, 2
+    while name.lower() in {u.lower() for u in used}: name = f"{base[:27]} ({n})"; n += 1
+    return name
+
+def write_xlsx(sections, out, title=None):
+    # One sheet per section; a section longer than Excel's row limit continues on another sheet
+    sheets = []
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for section, columns, chunks in sections:
+            rows = itertools.chain.from_iterable(chunks)
+            header = "<row>" + "".join(_xlsx_cell(c, ' s="1"') for c in columns) + "</row>"
+            for n in itertools.count():
+                part = itertools.islice(rows, XLSX_MAX_ROWS - 1)
+                first = next(part, None)
+                if first is None and n: break
+                sheets.append(_sheet_name(section, sheets))
+                with zf.open(f"xl/worksheets/sheet{len(sheets)}.xml", "w", force_zip64=True) as f:
+                    f.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet {_NS}><sheetData>{header}'.encode())
+                    if first is not None:
+                        for block in _blocks(itertools.chain([first], part), 1000):
+                            f.write("".join("<row>" + "".join(_xlsx_cell(v) for v in row) + "</row>" for row in block).encode())
+                    f.write(b"</sheetData></worksheet>")
+                if first is None: break
+        n = len(sheets)
+        zf.writestr("[Content_Types].xml", '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                    '<Default Extension="xml" ContentType="application/xml"/>'
+                    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                    + "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' for i in range(1, n + 1))
+                    + "</Types>")
+        zf.writestr("_rels/.rels", '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    f'<Relationship Id="rId1" Type="{_REL}/officeDocument" Target="xl/workbook.xml"/></Relationships>')
+        zf.writestr("xl/workbook.xml", f'<workbook {_NS} xmlns:r="{_REL}"><sheets>'
+                    + "".join(f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(sheets, 1))
+                    + "</sheets></workbook>")
+        zf.writestr("xl/_rels/workbook.xml.rels", '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    + "".join(f'<Relationship Id="rId{i}" Type="{_REL}/worksheet" Target="worksheets/sheet{i}.xml"/>' for i in range(1, n + 1))
+                    + f'<Relationship Id="rId{n + 1}" Type="{_REL}/styles" Target="styles.xml"/></Relationships>')
+        zf.writestr("xl/styles.xml", _STYLES)
+
+def _blocks(rows, size):
+    rows = iter(rows)
+    while True:
+        block = list(itertools.islice(rows, size))
+        if not block: return
+        yield block
+
+PDF_PAGE = (842, 595)  # A4 landscape, points
+PDF_MARGIN = 36
+PDF_FONT_SIZE = 7
+PDF_LEADING = 9
+PDF_MAX_COL = 24
+
+class _Pdf:
+    # Objects 1-3 (catalog, page tree, font) are written last, once the page count is known
+    def __init__(self, out):
+        self.out, self.offsets, self.pages, self.next_id = out, {}, [], 4
+        out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _obj(self, oid, body):
+        self.offsets[oid] = self.out.tell()
+        self.out.write(f"{oid} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def page(self, lines):
+        # lines: (x, y, text) in points from the bottom-left corner
+        ops = [f"BT /F1 {PDF_FONT_SIZE} Tf".encode()]
+        for x, y, text in lines: ops.append(f"1 0 0 1 {x} {y} Tm (".encode() + _pdf_text(text) + b") Tj")
+        ops.append(b"ET")
+        stream = zlib.compress(b"\n".join(ops))
+        content, page = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._obj(content, f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream")
+        self._obj(page, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PDF_PAGE[0]} {PDF_PAGE[1]}] /Contents {content} 0 R "
+                        f"/Resources << /Font << /F1 3 0 R >> >> >>".encode())
+        self.pages.append(page)
+
+    def close(self):
+        self._obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>")
+        self._obj(2, f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in self.pages)}] /Count {len(self.pages)} >>".encode())
+        self._obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.out.tell()
+        self.out.write(f"xref\n0 {self.next_id}\n0000000000 65535 f \n".encode())
+        for oid in range(1, self.next_id): self.out.write(f"{self.offsets[oid]:010d} 00000 n \n".encode())
+        self.out.write(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+def _pdf_text(text):
+    # Courier covers WinAnsi only; anything else (emoji, ₦) is dropped
+    raw = text.encode("cp1252", "ignore")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def _fmt(value):
+    if value is None: return ""
+    if isinstance(value, float): return f"{value:,.2f}"
+    return str(value).strip()
+
+def _pdf_line(row, widths):
+    cells = []
+    for value, width in zip(row, widths):
+        text = _fmt(value)[:width]
+        cells.append(text.rjust(width) if isinstance(value, (int, float)) else text.ljust(width))
+    return "  ".join(cells)
+
+def write_pdf(sections, out, title="Report"):
+    # Fixed-width table per section, header repeated on every page; a section starts a new page
+    pdf = _Pdf(out)
+    width, height = PDF_PAGE
+    per_page = int((height - 2 * PDF_MARGIN) / PDF_LEADING) - 4
+    max_chars = int((width - 2 * PDF_MARGIN) / (PDF_FONT_SIZE * 0.6))
+    stamp = datetime.now().strftime(db.STAMP_FMT)
+    for section, columns, chunks in sections:
+        chunks = iter(chunks)
+        first = next(chunks, [])
+        # Column widths come from the header and the first chunk
+        widths = [min(PDF_MAX_COL, max([len(str(c))] + [len(_fmt(r[i])) for r in first])) for i, c in enumerate(columns)]
+        head = _pdf_line(columns, widths)[:max_chars]
+        lines, part = [], 0
+
+        def emit():
+            top = height - PDF_MARGIN
+            page = [(PDF_MARGIN, top, f"{title} - {section}" + (f" (cont. {part + 1})" if part else "")),
+                    (PDF_MARGIN, top - 2 * PDF_LEADING, head), (PDF_MARGIN, top - 3 * PDF_LEADING, "-" * min(len(head), max_chars))]
+            page += [(PDF_MARGIN, top - (4 + i) * PDF_LEADING, text) for i, text in enumerate(lines or ["(no rows)"])]
+            page.append((PDF_MARGIN, PDF_MARGIN / 2, f"Page {len(pdf.pages) + 1}    Generated {stamp}"))
+            pdf.page(page)
+
+        for chunk in itertools.chain([first], chunks):
+            for row in chunk:
+                lines.append(_pdf_line(row, widths)[:max_chars])
+                if len(lines) == per_page: emit(); lines = []; part += 1
+        if lines or not part: emit()
+    pdf.close()
+
+WRITERS = {"csv": write_csv, "xlsx": write_xlsx, "pdf": write_pdf}
+
+def export(sections, fmt, title="Report"):
+    # Writes the report to a temporary file and returns it rewound, e.g. for st.download_button
+    if fmt not in WRITERS: raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(WRITERS)}")
+    out = tempfile.TemporaryFile()
+    WRITERS[fmt](sections, out, title)
+    out.seek(0)
+    return out
@@ -0,0 +1,241 @@
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+import database as db
+import archive
+import reconcile
+
+# Analytics behind the Dashboard's AI Insights panel. refresh() scores the daily series and stores
+# the results, so the panel reads a few indexed rows instead of computing anything:
+#   insight_daily      one row per series and closed day: the value, its baseline over the
+#                      WINDOW_DAYS before that day (mean, std, quartiles), z-score and anomaly flag
+#   insight_forecasts  the next HORIZON days of revenue per department and of fuel litres
+# Series are (kind, key): revenue per department and ALL (daily_rollup), fuel_liters
+# (fuel_records), terminal_balance / terminal_volume per POS terminal and staff_balance per
+# department and staff (pos_records, fuel_records, both storage tiers). A day is flagged 'z' when it
+# is more than Z_LIMIT standard deviations from its baseline, 'iqr' when it is outside the Tukey
+# fences, 'z+iqr' for both, and only when it is further off than the kind's floor.
+# Incremental: each run reads WINDOW_DAYS of context before the first day it scores and rescores
+# the last REVISIT_DAYS, so shifts entered late still count; full=True redoes all history.
+# jobs.py runs it every hour (jobs.SCHEDULE). Today is still open, so only closed days are scored.
+# Usage: python insights.py [--full]
+
+WINDOW_DAYS = 28
+MIN_POINTS = 7
+REVISIT_DAYS = 7
+Z_LIMIT = 3.0
+IQR_K = 3.0  # Tukey's "far out" fences; 1.5 flags every few days on shift balances
+HORIZON = 7
+TREND_DAYS = 28
+PROFILE_DAYS = 56  # day-of-week profile and forecast residuals
+Z95 = 1.96
+RECENT_DAYS = 7    # anomalies shown on the panel
+FILLED_KINDS = ["revenue", "fuel_liters"]  # a value every calendar day (0 with no sales); the rest only on shift days
+FORECAST_KINDS = ["revenue", "fuel_liters"]
+LABELS = {"revenue": "{key} revenue", "fuel_liters": "Fuel volume", "terminal_balance": "Terminal {key} balance",
+          "terminal_volume": "Terminal {key} volume", "staff_balance": "{key} shortage/surplus"}
+UNITS = {"fuel_liters": " L"}  # everything else is money
+DAILY_COLUMNS = ["kind", "key", "date", "value", "mean", "std", "q1", "q3", "zscore", "flag"]
+
+def _day(day, days):
+    return (datetime.strptime(day, db.DAY_FMT) + timedelta(days=days)).strftime(db.DAY_FMT)
+
+def _floors():
+    # Deviations smaller than this are never flagged: shift balances within the reconciliation
+    # tolerance are not worth a look however steady the staff member usually is
+    tol = reconcile.tolerance("shift_balance")
+    return {"terminal_balance": tol, "staff_balance": tol}
+
+# --- SERIES ---
+def _daily(df, kind, key, value):
+    # Shift rows -> one value per key and day; key=None sums everything into ALL
+    df = df[df[key].fillna("") != ""] if key else df.assign(_key="ALL")
+    out = df.groupby([key or "_key", df["date"].str[:10]], as_index=False)[value].sum()
+    return out.set_axis(["key", "date", "value"], axis=1).assign(kind=kind)
+
+def _fill(df, date_to):
+    # Calendar days without a row count as 0, from each series' first day on
+    if df.empty: return df
+    first = df.groupby(["kind", "key"], as_index=False)["date"].min()
+    days = pd.DataFrame({"day": pd.date_range(first["date"].min(), date_to).strftime(db.DAY_FMT)})
+    grid = first.merge(days, how="cross")
+    grid = grid[grid["day"] >= grid["date"]].drop(columns="date").rename(columns={"day": "date"})
+    return grid.merge(df, on=["kind", "key", "date"], how="left").fillna({"value": 0.0})
+
+def series(date_from=None, date_to=None):
+    # Long frame kind, key, date, value over closed days in range (None: from the first day)
+    with db.get_conn() as conn:
+        sales = pd.read_sql_query("SELECT date, department AS key, revenue AS value FROM daily_rollup WHERE date >= ? AND date <= ?",
+                                  conn, params=[date_from or "", date_to])
+    fuel = archive.read_table("fuel_records", ["date", "staff_name", "total_liters", "shortage_surplus"], date_from, date_to)
+    pos = archive.read_table("pos_records", ["date", "staff_name", "machine_id", "calculated_balance", "total_volume"], date_from, date_to)
+    fuel["staff"], pos["staff"] = "FUEL · " + fuel["staff_name"].fillna(""), "POS · " + pos["staff_name"].fillna("")
+    filled = [sales.assign(kind="revenue"), sales.groupby("date", as_index=False)["value"].sum().assign(kind="revenue", key="ALL"),
+              _daily(fuel, "fuel_liters", None, "total_liters")]
+    shifts = [_daily(pos, "terminal_balance", "machine_id", "calculated_balance"), _daily(pos, "terminal_volume", "machine_id", "total_volume"),
+              _daily(pos[pos["staff_name"].notna()], "staff_balance", "staff", "calculated_balance"),
+              _daily(fuel[fuel["staff_name"].notna()], "staff_balance", "staff", "shortage_surplus")]
+    frames = [_fill(pd.concat([f for f in filled if len(f)], ignore_index=True), date_to)] if any(len(f) for f in filled) else []
+    frames += [f for f in shifts if len(f)]
+    if not frames: return pd.DataFrame(columns=["kind", "key", "date", "value"])
+    df = pd.concat(frames, ignore_index=True)[["kind", "key", "date", "value"]]
+    df["key"] = df["key"].astype(object)
+    return df.sort_values(["kind", "key", "date"], ignore_index=True)
+
+# --- SCORING ---
+def score(df):
+    # Adds each day's baseline over the WINDOW_DAYS before it (the day itself left out), its
+    # z-score and the anomaly flag. df must be sorted by kind, key, date, as series() returns it.
+    df = df.copy()
+    when = pd.to_datetime(df["date"], format=db.DAY_FMT)
+    roll = df.assign(_when=when).groupby(["kind", "key"], sort=False).rolling(
+        f"{WINDOW_DAYS}D", on="_when", closed="left", min_periods=MIN_POINTS)["value"]
+    # Groups come back in the frame's order, indexed by date, so plain arrays line up
+    for name, stat in (("mean", roll.mean()), ("std", roll.std()), ("q1", roll.quantile(0.25)), ("q3", roll.quantile(0.75))):
+        df[name] = stat.to_numpy()
+    dev = df["value"] - df["mean"]
+    df["zscore"] = (dev / df["std"].where(df["std"] > 0)).round(2)
+    iqr = df["q3"] - df["q1"]
+    big = dev.abs() > df["kind"].map(_floors()).fillna(0.0)
+    z_hit = (df["zscore"].abs() > Z_LIMIT) & big
+    iqr_hit = ((df["value"] < df["q1"] - IQR_K * iqr) | (df["value"] > df["q3"] + IQR_K * iqr)) & big
+    df["flag"] = np.select([z_hit & iqr_hit, z_hit, iqr_hit], ["z+iqr", "z", "iqr"], "")
+    df["flag"] = df["flag"].replace("", None)
+    return df[DAILY_COLUMNS]
+
+def forecast(df, through):
+    # Next HORIZON days per series: a straight line through the last TREND_DAYS of weekday-adjusted
+    # values, times the day-of-week factor from the last PROFILE_DAYS. The band is Z95 standard
+    # deviations of that fit's residuals over the profile days.
+    keys = ["kind", "key"]
+    end = pd.Timestamp(through)
+    hist = df[df["kind"].isin(FORECAST_KINDS)].assign(when=lambda d: pd.to_datetime(d["date"], format=db.DAY_FMT))
+    hist = hist[hist["when"] > end - pd.Timedelta(days=PROFILE_DAYS)].copy()
+    if hist.empty: return pd.DataFrame(columns=keys + ["date", "value", "lower", "upper"])
+    hist["t"], hist["dow"] = (hist["when"] - end).dt.days, hist["when"].dt.dayofweek
+    profile = hist.groupby(keys + ["dow"], as_index=False)["value"].mean()
+    profile = profile.merge(hist.groupby(keys, as_index=False)["value"].mean().rename(columns={"value": "level"}), on=keys)
+    profile["factor"] = (profile["value"] / profile["level"].where(profile["level"] != 0)).fillna(1.0)
+    hist = hist.merge(profile[keys + ["dow", "factor", "level"]], on=keys + ["dow"])
+    hist["adj"] = (hist["value"] / hist["factor"].where(hist["factor"] != 0)).fillna(hist["level"])
+    # Least squares per series in closed form: slope = cov(t, y) / var(t)
+    recent = hist[hist["t"] > -TREND_DAYS]
+    fit = recent.assign(ty=recent["t"] * recent["adj"], tt=recent["t"] ** 2).groupby(keys).agg(
+        n=("t", "size"), st=("t", "sum"), sy=("adj", "sum"), sty=("ty", "sum"), stt=("tt", "sum"))
+    fit = fit[fit["n"] >= MIN_POINTS]
+    spread = fit["n"] * fit["stt"] - fit["st"] ** 2
+    fit["slope"] = ((fit["n"] * fit["sty"] - fit["st"] * fit["sy"]) / spread.where(spread != 0)).fillna(0.0)
+    fit["intercept"] = (fit["sy"] - fit["slope"] * fit["st"]) / fit["n"]
+    fit = fit.reset_index()[keys + ["slope", "intercept"]]
+    hist = hist.merge(fit, on=keys)
+    resid = hist["value"] - (hist["intercept"] + hist["slope"] * hist["t"]) * hist["factor"]
+    fit = fit.merge(resid.groupby([hist["kind"], hist["key"]]).std().fillna(0.0).rename("sigma").reset_index(), on=keys)
+    ahead = pd.DataFrame({"t": np.arange(1, HORIZON + 1)})
+    ahead["when"] = end + pd.to_timedelta(ahead["t"], unit="D")
+    ahead["dow"] = ahead["when"].dt.dayofweek
+    out = fit.merge(ahead, how="cross").merge(profile[keys + ["dow", "factor"]], on=keys + ["dow"], how="left")
+    out["value"] = ((out["intercept"] + out["slope"] * out["t"]) * out["factor"].fillna(1.0)).clip(lower=0).round(2)
+    out["lower"] = (out["value"] - Z95 * out["sigma"]).clip(lower=0).round(2)
+    out["upper"] = (out["value"] + Z95 * out["sigma"]).round(2)
+    out["date"] = out["when"].dt.strftime(db.DAY_FMT)
+    return out[keys + ["date", "value", "lower", "upper"]].sort_values(keys + ["date"], ignore_index=True)
+
+# --- REFRESH ---
+def refresh(full=False):
+    # Scores the closed days not scored yet (plus the last REVISIT_DAYS) and replaces the forecasts.
+    # Returns counts and timings for the job log.
+    start = time.perf_counter()
+    through = _day(db._today(), -1)
+    with db.get_conn() as conn:
+        row = conn.execute("SELECT value FROM settings WHERE key='insights.through'").fetchone()
+    since = None if full or not row else min(_day(row[0], 1), _day(through, -REVISIT_DAYS + 1))
+    read_from = None if since is None else min(_day(since, -WINDOW_DAYS), _day(through, -PROFILE_DAYS))
+    df = series(read_from, through)
+    read = time.perf_counter()
+    scored = score(df) if len(df) else pd.DataFrame(columns=DAILY_COLUMNS)
+    if since: scored = scored[scored["date"] >= since]
+    ahead = forecast(df, through)
+    computed = time.perf_counter()
+    rows = scored.astype(object).where(scored.notna(), None).values.tolist()
+    with db.transaction() as conn:
+        if since: conn.execute("DELETE FROM insight_daily WHERE date >= ?", (since,))
+        else: conn.execute("DELETE FROM insight_daily")
+        conn.executemany(f"INSERT INTO insight_daily ({', '.join(DAILY_COLUMNS)}) VALUES ({', '.join('?' for _ in DAILY_COLUMNS)})", rows)
+        conn.execute("DELETE FROM insight_forecasts")
+        conn.executemany("INSERT INTO insight_forecasts (kind, key, date, value, lower, upper) VALUES (?, ?, ?, ?, ?, ?)",
+                         ahead.astype(object).values.tolist())
+        conn.execute("INSERT OR REPLACE INTO settings VALUES ('insights.through', ?)", (through,))
+        db.touch(conn, "insight_daily", "insight_forecasts", "settings")
+    return {"through": through, "since": since or "start", "series": int(df.groupby(["kind", "key"]).ngroups) if len(df) else 0,
+            "rows_read": len(df), "days_scored": int(scored["date"].nunique()), "anomalies": int(scored["flag"].notna().sum()),
+            "forecasts": len(ahead), "read_s": round(read - start, 3), "compute_s": round(computed - read, 3),
+            "seconds": round(time.perf_counter() - start, 3)}
+
+# --- PANEL ---
+@db.cached("insight_daily", "insight_forecasts")
+def summary():
+    # Everything the panel shows, from the stored results: the last scored day, revenue per
+    # department on it, forecast totals next to the same number of past days, and recent anomalies
+    with db.get_conn() as conn:
+        through = conn.execute("SELECT MAX(date) FROM insight_daily").fetchone()[0]
+        if through is None: return {"through": None}
+        latest = pd.read_sql_query("SELECT key, value, mean, std, zscore, flag FROM insight_daily WHERE date = ? AND kind = 'revenue'",
+                                   conn, params=[through])
+        ahead = pd.read_sql_query("""SELECT kind, key, SUM(value) AS value, SUM((upper - value) * (upper - value)) AS var
+                                     FROM insight_forecasts GROUP BY kind, key""", conn)
+        past = pd.read_sql_query(f"""SELECT kind, key, SUM(value) AS past FROM insight_daily
+                                     WHERE date > ? AND kind IN ({', '.join('?' for _ in FORECAST_KINDS)}) GROUP BY kind, key""",
+                                 conn, params=[_day(through, -HORIZON)] + FORECAST_KINDS)
+        anomalies = pd.read_sql_query("""SELECT kind, key, date, value, mean, std, zscore, flag FROM insight_daily
+                                         WHERE date > ? AND flag IS NOT NULL""", conn, params=[_day(through, -RECENT_DAYS)])
+    # Daily errors taken as independent: the band of a total grows with the square root of the days
+    ahead["band"] = np.sqrt(ahead["var"]).round(2)
+    ahead = ahead.drop(columns="var").merge(past, on=["kind", "key"], how="left")
+    ahead["change_pct"] = ((ahead["value"] / ahead["past"].where(ahead["past"] > 0) - 1) * 100).round(1)
+    strength = anomalies["flag"].map({"z+iqr": 2, "z": 1, "iqr": 1}) * 100 + anomalies["zscore"].abs().fillna(0)
+    anomalies = anomalies.assign(_s=strength).sort_values(["_s", "date"], ascending=False).drop(columns="_s").reset_index(drop=True)
+    return {"through": through, "latest": latest, "forecast": ahead, "anomalies": anomalies}
+
+def _money(value, kind="revenue"):
+    unit = UNITS.get(kind)
+    return f"{value:,.0f}{unit}" if unit else f"{'-' if value < 0 else ''}₦{abs(value):,.0f}"
+
+def messages(found, limit=4):
+    # Markdown lines for the panel, most useful first
+    if found["through"] is None: return []
+    lines, ahead = [], found["forecast"].set_index(["kind", "key"])
+    if ("revenue", "ALL") in ahead.index:
+        f = ahead.loc[("revenue", "ALL")]
+        change = f" ({f['change_pct']:+.0f}% on the last {HORIZON} days)" if pd.notna(f["change_pct"]) else ""
+        lines.append(f"📈 **Next {HORIZON} days:** about {_money(f['value'])} ± {_money(f['band'])}{change}.")
+    if ("fuel_liters", "ALL") in ahead.index:
+        f = ahead.loc[("fuel_liters", "ALL")]
+        lines.append(f"⛽ **Fuel:** about {_money(f['value'], 'fuel_liters')} ± {_money(f['band'], 'fuel_liters')} expected over the next {HORIZON} days.")
+    latest = found["latest"]
+    off = latest[latest["flag"].notna() & (latest["key"] != "ALL")]
+    for r in off.itertuples():
+        word = "below" if r.value < r.mean else "above"
+        lines.append(f"⚠️ **{r.key} revenue** on {found['through']} was {_money(r.value)}, well {word} its usual {_money(r.mean)}.")
+    if len(latest) and off.empty: lines.append(f"✅ **{found['through']}:** every department took in about its usual amount.")
+    for r in found["anomalies"][found["anomalies"]["kind"] != "revenue"].head(limit).itertuples():
+        label = LABELS[r.kind].format(key=r.key)
+        usual = f"usual {_money(r.mean, r.kind)} ± {_money(r.std, r.kind)}" if pd.notna(r.std) else f"usual {_money(r.mean, r.kind)}"
+        lines.append(f"🚨 **{label}** {_money(r.value, r.kind)} on {r.date} ({usual}).")
+    return lines
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score daily series, flag anomalies and forecast the next days.")
+    parser.add_argument("--full", action="store_true", help="rescore all history instead of the days since the last run")
+    args = parser.parse_args(argv)
+    db.init_db()
+    print(json.dumps(refresh(args.full), indent=2))
+    for line in messages(summary()): print(line.replace("**", ""))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+import database as db
+
+# Background jobs: rollup rebuilds, archive runs, reconciliation, insights, exports and bulk imports run on worker threads
+# instead of inside a Streamlit rerun. Jobs are rows in the jobs table, so the queue survives a
+# restart: start() puts jobs left running by a dead process back on the queue, and a job that
+# saves checkpoints (bulk import) resumes after its last committed chunk instead of starting over.
+# The UI submits a job and polls get_job()/recent_jobs() for progress.
+# Scheduled work (SCHEDULE: backups, database upkeep, insights) is queued by idle workers of a
+# scheduling process only: `python jobs.py worker`, or the app itself when OKEB_SCHEDULED_JOBS=1.
+# The app's own worker threads otherwise only run what users submit (OKEB_JOB_WORKERS=0: none,
+# for when a separate worker process runs everything).
+# Usage: python jobs.py worker [--once] [--no-schedule]   |   python jobs.py list
+
+WORKERS = 2
+POLL_SECONDS = 1.0
+MAX_ATTEMPTS = 3
+PROGRESS_INTERVAL = 0.5
+KEEP_DAYS = 30
+SCHEDULE_CHECK_SECONDS = 60
+FINISH_RETRIES = 10  # attempts at writing a job's outcome before leaving it to recover() on restart
+WORKERS_ENV = "OKEB_JOB_WORKERS"  # worker threads start() runs in the app process
+SCHEDULED_ENV = "OKEB_SCHEDULED_JOBS"  # "1": the app process also queues SCHEDULE
+# kind: seconds between runs (counted from when the last one was queued, by anyone)
+SCHEDULE = {"backup": 6 * 3600, "maintenance": 24 * 3600, "insights": 3600}
+COLUMNS = ["id", "kind", "params", "status", "progress", "message", "result", "checkpoint", "attempts",
+           "worker", "submitted_by", "created_at", "started_at", "finished_at"]
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+_handlers = {}
+_threads = []
+_start_lock = threading.Lock()
+_wake = threading.Event()
+_schedule_lock = threading.Lock()
+_next_schedule_check = [0.0]
+
+def job(kind):
+    # Registers fn(ctx, **params) as the handler for `kind`; its return value is stored as the result
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+def jobs_dir():
+    # Output files of finished jobs (exports) and uploaded inputs (bulk imports)
+    path = os.path.join(os.path.dirname(os.path.abspath(db.DB_NAME)), "jobs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+class JobContext:
+    def __init__(self, job_id, checkpoint):
+        self.job_id, self.checkpoint, self._last = job_id, checkpoint, 0.0
+
+    def progress(self, fraction=None, message=""):
+        # fraction in [0, 1] or None when unknown; written at most every PROGRESS_INTERVAL seconds
+        now = time.monotonic()
+        if now - self._last < PROGRESS_INTERVAL: return
+        self._last = now
+        with db.transaction() as conn:
+            conn.execute("UPDATE jobs SET progress=COALESCE(?, progress), message=? WHERE id=?", (fraction, message, self.job_id))
+
+    def save(self, conn, checkpoint):
+        # Call inside the transaction that commits the work the checkpoint describes
+        self.checkpoint = checkpoint
+        conn.execute("UPDATE jobs SET checkpoint=? WHERE id=?", (json.dumps(checkpoint), self.job_id))
+
+# --- QUEUE ---
+def _row(r):
+    job = dict(zip(COLUMNS, r))
+    for key in ("params", "result", "checkpoint"): job[key] = json.loads(job[key]) if job[key] else None
+    return job
+
+def submit(kind, submitted_by=None, **params):
+    if kind not in _handlers: raise ValueError(f"Unknown job {kind!r}; expected one of {', '.join(_handlers)}")
+    with db.transaction() as conn:
+        job_id = conn.execute("INSERT INTO jobs (kind, params, status, progress, submitted_by, created_at) VALUES (?, ?, 'queued', 0, ?, ?)",
+                              (kind, json.dumps(params), submitted_by, datetime.now().strftime(db.STAMP_FMT))).lastrowid
+    _wake.set()
+    return job_id
+
+def get_job(job_id):
+    with db.get_conn() as conn:
+        r = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id=?", (job_id,)).fetchone()
+    return _row(r) if r else None
+
+def recent_jobs(limit=20):
+    with db.get_conn() as conn:
+        return [_row(r) for r in conn.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs ORDER BY id DESC LIMIT ?", (limit,))]
+
+def active_count():
+    with db.get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+
+def _alive(worker):
+    # Only workers on this host can be checked; anything else is assumed alive
+    host, _, pid = (worker or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit(): return bool(worker)
+    if int(pid) == os.getpid(): return True
+    try: os.kill(int(pid), 0)
+    except ProcessLookupError: return False
+    except PermissionError: return True
+    return True
+
+def recover():
+    # Jobs left 'running' by a dead process go back on the queue, or fail after MAX_ATTEMPTS.
+    # Also drops finished jobs older than KEEP_DAYS. Returns the ids that were requeued.
+    now = datetime.now()
+    requeued = []
+    with db.transaction() as conn:
+        for job_id, worker, attempts in conn.execute("SELECT id, worker, attempts FROM jobs WHERE status='running'").fetchall():
+            if _alive(worker): continue
+            if attempts >= MAX_ATTEMPTS:
+                conn.execute("UPDATE jobs SET status='failed', message=?, finished_at=? WHERE id=?",
+                             (f"Worker stopped during the job {attempts} times; giving up.", now.strftime(db.STAMP_FMT), job_id))
+            else:
+                conn.execute("UPDATE jobs SET status='queued', worker=NULL, message='Requeued after a restart' WHERE id=?", (job_id,))
+                requeued.append(job_id)
+        conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                     ((now - timedelta(days=KEEP_DAYS)).strftime(db.STAMP_FMT),))
+    return requeued
+
+def _claim():
+    with db.transaction() as conn:
+        rows = conn.execute("""UPDATE jobs SET status='running', worker=?, started_at=?, attempts=attempts + 1
+                               WHERE id = (SELECT id FROM jobs WHERE status='queued' ORDER BY id LIMIT 1)
+                               RETURNING id, kind, params, checkpoint""",
+                            (WORKER_ID, datetime.now().strftime(db.STAMP_FMT))).fetchall()
+    return rows[0] if rows else None
+
+def _run(job_id, kind, params, checkpoint):
+    ctx = JobContext(job_id, json.loads(checkpoint) if checkpoint else None)
+    try:
+        result = _handlers[kind](ctx, **json.loads(params or "{}"))
+        status, message = "done", "Finished"
+    except Exception as e:
+        traceback.print_exc()
+        status, result, message = "failed", None, f"{type(e).__name__}: {e}"
+    _finish(job_id, status, message, result)
+
+def _finish(job_id, status, message, result):
+    try: payload = json.dumps(result)
+    except (TypeError, ValueError) as e: status, message, payload = "failed", f"Result could not be stored: {e}", None
+    for attempt in range(FINISH_RETRIES):
+        try:
+            with db.transaction() as conn:
+                conn.execute("""UPDATE jobs SET status=?, progress=CASE WHEN ?='done' THEN 1 ELSE progress END,
+                                message=?, result=?, finished_at=? WHERE id=?""",
+                             (status, status, message, payload, datetime.now().strftime(db.STAMP_FMT), job_id))
+            return
+        except sqlite3.OperationalError:
+            if attempt == FINISH_RETRIES - 1: raise
+            time.sleep(POLL_SECONDS)
+
+def _due(conn, now):
+    due = []
+    for kind, seconds in SCHEDULE.items():
+        last = conn.execute("SELECT MAX(created_at) FROM jobs WHERE kind=?", (kind,)).fetchone()[0]
+        if not last or last <= (now - timedelta(seconds=seconds)).strftime(db.STAMP_FMT): due.append(kind)
+    return due
+
+def submit_scheduled():
+    # Queues the SCHEDULE kinds that are due. Checked with a plain read first; the write transaction
+    # checks again, so two workers (or two processes) never queue the same run twice.
+    with _schedule_lock:
+        if time.monotonic() < _next_schedule_check[0]: return []
+        _next_schedule_check[0] = time.monotonic() + SCHEDULE_CHECK_SECONDS
+    now = datetime.now()
+    with db.get_conn() as conn:
+        if not _due(conn, now): return []
+    with db.transaction() as conn:
+        kinds = _due(conn, now)
+        for kind in kinds:
+            conn.execute("INSERT INTO jobs (kind, params, status, progress, submitted_by, created_at) VALUES (?, '{}', 'queued', 0, 'scheduler', ?)",
+                         (kind, now.strftime(db.STAMP_FMT)))
+    return kinds
+
+def work(once=False, scheduled=False):
+    # Worker loop; once=True drains the queue and returns. scheduled=True also queues SCHEDULE when idle.
+    while True:
+        try: claimed = _claim()
+        except sqlite3.OperationalError: claimed = None  # write lock busy, try again on the next poll
+        if claimed:
+            # A job whose outcome cannot be written stays 'running' until recover(); the worker goes on
+            try: _run(*claimed)
+            except Exception: traceback.print_exc()
+            continue
+        if once: return
+        try:
+            if scheduled and submit_scheduled(): continue
+        except sqlite3.OperationalError: pass
+        _wake.wait(POLL_SECONDS)
+        _wake.clear()
+
+def start(workers=None, scheduled=None):
+    # Idempotent: recovers orphaned jobs and starts the worker threads once per process.
+    # Defaults come from OKEB_JOB_WORKERS and OKEB_SCHEDULED_JOBS (off: scheduled work needs opting in).
+    with _start_lock:
+        if _threads: return
+        workers = int(os.environ.get(WORKERS_ENV, WORKERS)) if workers is None else workers
+        scheduled = os.environ.get(SCHEDULED_ENV) == "1" if scheduled is None else scheduled
+        if workers > 0: recover()
+        for i in range(workers):
+            thread = threading.Thread(target=work, kwargs={"scheduled": scheduled}, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            _threads.append(thread)
+
+# --- JOBS ---
+@job("rebuild_rollup")
+def _rebuild_rollup(ctx):
+    ctx.progress(None, "Rebuilding daily_rollup from daily_sales")
+    return {"rows": db.rebuild_rollup()}
+
+@job("archive")
+def _archive(ctx, before=None):
+    # One table at a time; each month commits on its own, so a rerun only finds what is left
+    import archive
+    moved = {}
+    for i, table in enumerate(archive.ARCHIVE_TABLES):
+        ctx.progress(i / len(archive.ARCHIVE_TABLES), f"Archiving {table}")
+        moved.update(archive.archive_closed_months(before, [table]))
+    return moved
+
+@job("reconcile")
+def _reconcile(ctx):
+    import reconcile
+    ctx.progress(None, "Re-checking all stored shifts")
+    return reconcile.rescan()
+
+@job("insights")
+def _insights(ctx, full=False):
+    import insights
+    ctx.progress(None, "Rescoring all history" if full else "Scoring the days since the last run")
+    return insights.refresh(full)
+
+@job("export")
+def _export(ctx, fmt, report="table", table=None, date_from=None, date_to=None, departments=None, day=None, title="Report"):
+    # The file is written under jobs_dir() and replaced atomically, so a rerun just writes it again
+    import exports
+    if report == "end_of_day":
+        sections, name = exports.end_of_day_sections(day), f"okeb_end_of_day_{day or db._today()}.{fmt}"
+    else:
+        sections, name = exports.table_sections(table, date_from, date_to, departments), f"okeb_{table}.{fmt}"
+    counted = [0]
+    def counting(chunks):
+        for chunk in chunks:
+            counted[0] += len(chunk)
+            ctx.progress(None, f"{counted[0]:,} rows written")
+            yield chunk
+    sections = [(t, cols, counting(chunks)) for t, cols, chunks in sections]
+    path = os.path.join(jobs_dir(), f"job{ctx.job_id}_{name}")
+    with open(path + ".tmp", "wb") as out: exports.WRITERS[fmt](sections, out, title)
+    os.replace(path + ".tmp", path)
+    return {"path": path, "file_name": name, "mime": exports.FORMATS[fmt], "rows": counted[0], "bytes": os.path.getsize(path)}
+
+@job("backup")
+def _backup(ctx):
+    import maintenance
+    ctx.progress(None, "Copying the database to backups/")
+    result = maintenance.backup()
+    # Not "path": on the jobs page that key means a file to download
+    return {"ok": result["ok"], "snapshot": os.path.basename(result["path"]), "mb": round(result["bytes"] / 1e6, 1),
+            "pages": result["pages"], "pruned": result.get("pruned", 0), "seconds": result["seconds"]}
+
+@job("maintenance")
+def _maintenance(ctx, quick=False):
+    # Integrity check, optimize, incremental vacuum and storage stats; details are in maintenance_log
+    import maintenance
+    ctx.progress(None, "Checking integrity, optimizing and vacuuming")
+    result = maintenance.run(quick)
+    summary = {"integrity": "ok" if result["integrity_check"]["ok"] else f"{len(result['integrity_check']['problems'])} problem(s)"}
+    if "vacuum" in result: summary.update(freed_pages=result["vacuum"]["freed_pages"], free_pages=result["vacuum"]["free_pages"])
+    if "stats" in result: summary.update(fragmented_pct=result["stats"]["fragmented_pct"], mb=round(result["stats"]["bytes"] / 1e6, 1))
+    summary["seconds"] = round(sum(r["seconds"] for r in result.values()), 2)
+    return summary
+
+@job("bulk_import")
+def _bulk_import(ctx, department, path, chunk_size=None):
+    # Each chunk commits with a checkpoint of its last line, so after a restart the import
+    # resumes from there and no row is written twice
+    import bulk_import
+    with open(path, "rb") as f: total = max(1, sum(1 for _ in f))
+    start_after = (ctx.checkpoint or {}).get("line", 0)
+    def on_chunk(conn, last_line):
+        ctx.save(conn, {"line": last_line})
+        ctx.progress(min(1.0, last_line / total), f"Imported up to line {last_line:,} of {total:,}")
+    report = bulk_import.ingest(department, bulk_import.read_rows(path), chunk_size or bulk_import.CHUNK_SIZE,
+                                start_after=start_after, on_chunk=on_chunk)
+    report["errors"] = [f"line {n}: {reason}" for n, reason in report["errors"][:50]] + \
+        ([f"... {len(report['errors']) - 50} more"] if len(report["errors"]) > 50 else [])
+    report["resumed_after_line"] = start_after
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run or inspect background jobs.")
+    parser.add_argument("command", choices=["worker", "list"])
+    parser.add_argument("--once", action="store_true", help="worker: exit when the queue is empty")
+    parser.add_argument("--no-schedule", action="store_true", help="worker: only run submitted jobs, queue no SCHEDULE runs")
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        for j in recent_jobs(50):
+            print(f"{j['id']:>5}  {j['kind']:<15} {j['status']:<8} {(j['progress'] or 0) * 100:5.1f}%  {j['message'] or ''}")
+        return 0
+    print(f"requeued: {recover()}", file=sys.stderr)
+    try: work(once=args.once, scheduled=not args.no_schedule)
+    except KeyboardInterrupt: pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+import database as db
+
+# Customer debt ledger: per-customer balances with aging, and FIFO repayment across all of a
+# customer's open debts. Balances are grouped in SQL over the unpaid-debts index, so the cost
+# follows the number of open debts, not the size of the debts table.
+
+AGING_BUCKETS = [("0-30", 0, 30), ("31-60", 31, 60), ("61-90", 61, 90), ("90+", 91, None)]
+
+def _bucket_columns(as_of):
+    # Buckets become plain date-string ranges, so no per-row date arithmetic
+    day = datetime.strptime(as_of, db.DAY_FMT)
+    cutoff = lambda days: (day - timedelta(days=days)).strftime(db.DAY_FMT)
+    cols, params = [], []
+    for label, low, high in AGING_BUCKETS:
+        conds = []
+        if high is not None: conds.append("date >= ?"); params.append(cutoff(high))
+        if low > 0: conds.append("date < ?"); params.append(cutoff(low - 1))
+        cols.append(f'SUM(CASE WHEN {" AND ".join(conds)} THEN amount ELSE 0 END) AS "{label}"')
+    return ", ".join(cols), params
+
+@db.cached("debts")
+def customer_balances(as_of=None):
+    # One row per customer with open debts: outstanding, open_debts, oldest, and one column per aging bucket
+    as_of = db.normalise_date(as_of or datetime.now(), db.DAY_FMT)
+    buckets, params = _bucket_columns(as_of)
+    sql = f"""SELECT customer_name, SUM(amount) AS outstanding, COUNT(*) AS open_debts, MIN(date) AS oldest, {buckets}
+              FROM debts WHERE status='Unpaid' AND amount > 0
+              GROUP BY customer_name ORDER BY outstanding DESC"""
+    with db.get_conn() as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+def aging_summary(as_of=None):
+    # Total outstanding per aging bucket across all customers
+    df = customer_balances(as_of)
+    labels = [b[0] for b in AGING_BUCKETS]
+    if df.empty: return pd.Series(0.0, index=labels)
+    return df[labels].sum()
+
+def allocate_fifo(amounts, payment):
+    # Oldest debt first: each debt takes whatever is left of the payment after the ones before it
+    amounts = np.asarray(amounts, dtype=float)
+    before = np.cumsum(amounts) - amounts
+    applied = np.clip(payment - before, 0, amounts)
+    return applied, np.round(amounts - applied, 2)
+
+def repay_customer(customer, payment_amount, staff_name):
+    if payment_amount <= 0: return False, "Enter an amount greater than zero."
+    with db.transaction() as conn:
+        # Oldest by date: debts merged in by sync get new ids, so id order is not age order
+        rows = conn.execute("SELECT id, amount FROM debts WHERE customer_name=? AND status='Unpaid' AND amount > 0 ORDER BY date, id",
+                            (customer,)).fetchall()
+        if not rows: return False, f"No open debts for {customer}."
+        ids = np.array([r[0] for r in rows])
+        amounts = np.array([r[1] for r in rows], dtype=float)
+        outstanding = amounts.sum()
+        if payment_amount > outstanding + 0.005:
+            return False, f"Error: Payment (₦{payment_amount:,.2f}) is more than {customer}'s balance (₦{outstanding:,.2f})."
+        applied, remaining = allocate_fifo(amounts, payment_amount)
+        hit = applied > 0
+        conn.executemany("UPDATE debts SET amount=?, status=? WHERE id=?",
+                         [(max(r, 0.0), "Paid" if r <= 0 else "Unpaid", int(i)) for r, i in zip(remaining[hit], ids[hit])])
+        db.log_changes(conn, "debts", "update", [int(i) for i in ids[hit]])
+        db.touch(conn, "debts")
+        db.record_daily_sales(conn, [(db._today(), "DEBT_RECOVERY", payment_amount, 0, payment_amount, staff_name)])
+    return True, f"Repayment of ₦{payment_amount:,.2f} applied to {int(hit.sum())} debt(s) for {customer}!"
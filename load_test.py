@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import multiprocessing
+from queue import Empty
+
+import database as db
+import credentials
+import profiling
+import synthetic
+from benchmark import temp_database
+
+# Load test: N staff sessions drive app.py at the same time through Streamlit's AppTest. Each
+# session logs in through the login form (auth.login -> credentials), then submits its
+# department's form `rounds` times: POS, Fuel, Bakery, Farm, or debt repayments for the admin
+# sessions. Runs against a synthetic database in a temp directory and reports throughput,
+# latency percentiles per action, write-lock waits (database.lock_stats), error rates, and any
+# accepted submission that did not reach its table. Exits 1 when a target is missed.
+# Every session is its own process: AppTest keeps one global runtime per interpreter, so two
+# cannot run at once in one process. SQLite locks are per connection, so write contention is
+# the same as between the server's session threads; the in-process pool and GIL are not.
+# Usage: python load_test.py [--sessions 10] [--rounds 5] [--rows 20000] [--p95-ms 2000] [--out run.json]
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+PASSWORD = "Load#Pass1"
+TIMEOUT = 60
+DEPARTMENTS = ["POS", "Fuel", "Bakery", "Farm", "Debt"]
+# Where each kind of submission lands, for the lost-write check
+LANDS_IN = {"POS": ("pos_records", ""), "Fuel": ("fuel_records", ""), "Bakery": ("bakery_records", ""),
+            "Farm": ("farm_records", ""), "Debt": ("daily_sales", " AND department='DEBT_RECOVERY'")}
+
+def _widget(elements, label, key=False):
+    # First widget with this label; key=None picks the one without a key when labels repeat
+    return next(w for w in elements if w.label == label and (key is False or w.key == key))
+
+# --- FORMS ---
+# Each fills its page's inputs for round r and returns the submit button to click
+def _pos(at, i, r, ctx):
+    _widget(at.text_input, "Terminal Name").set_value(f"LOAD-T{i}")
+    for label, value in [("Opening Cash", 50000), ("Opening Wallet", 20000), ("Deposits", 30000), ("Withdrawals", 45000),
+                         ("Actual Charges Collected", 1500), ("Closing Cash", 40000), ("Closing Wallet", 31500)]:
+        _widget(at.number_input, label).set_value(value)
+    return _widget(at.button, "CLOSE ACCOUNT")
+
+def _fuel(at, i, r, ctx):
+    for key, value in [("read_p1_open", r * 40), ("read_p1_close", r * 40 + 40), ("read_p2_open", r * 30),
+                       ("read_p2_close", r * 30 + 30), ("fuel_cash", 30000), ("fuel_pos", 19000)]:
+        at.number_input(key=key).set_value(float(value))
+    return _widget(at.button, "💾 SAVE RECORD")
+
+def _bakery(at, i, r, ctx):
+    for product in ctx["products"][:3]:
+        _widget(at.number_input, f"o{product}").set_value(10)
+        _widget(at.number_input, f"p{product}").set_value(40)
+        _widget(at.number_input, f"r{product}").set_value(5)
+    at.number_input(key="b_cash").set_value(20000.0)
+    return _widget(at.button, "💾 SAVE BAKERY")
+
+def _farm(at, i, r, ctx):
+    at.text_input(key="farm_cust").set_value(f"Load Customer {i}")
+    at.number_input(key="farm_paid").set_value(5000.0)
+    return _widget(at.button, "💾 SAVE SALE")
+
+def _debt(at, i, r, ctx):
+    _widget(at.number_input, "Debt ID").set_value(ctx["debt_ids"][i][r])
+    _widget(at.number_input, "Amount (₦)", key=None).set_value(100.0)
+    return _widget(at.button, "PROCESS PAYMENT")
+
+FORMS = {"POS": _pos, "Fuel": _fuel, "Bakery": _bakery, "Farm": _farm, "Debt": _debt}
+
+# --- SESSIONS ---
+def _run(results, action, rerun, check=None):
+    # One timed rerun; a page exception, st.error or failed check counts as an error
+    at, error, start = None, None, time.perf_counter()
+    try:
+        at = rerun()
+        if at.exception: error = at.exception[0].message
+        elif at.error: error = at.error[0].value
+        elif check and not check(at): error = "check failed"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    results.append({"action": action, "ms": round((time.perf_counter() - start) * 1000, 1), "ok": error is None,
+                    "error": error, "ts": time.time()})
+    return at if error is None else None
+
+def _login_button(at, email):
+    at.text_input[0].set_value(email); at.text_input[1].set_value(PASSWORD)
+    return _widget(at.button, "Secure Login")
+
+def session(i, dept, rounds, think, ctx, results, start):
+    from streamlit.testing.v1 import AppTest
+    from streamlit.logger import set_log_level
+    rnd = random.Random(i)
+    at = AppTest.from_file(APP, default_timeout=TIMEOUT)
+    at.session_state["farm_cart"] = [{"Product": "Crates of Eggs", "Qty": 2, "Unit Price": 3500}]
+    at.run()
+    set_log_level("error")  # after the first run has read the config; deprecation notices repeat per session
+    start.wait()
+    db.reset_lock_stats()
+    button = _login_button(at, f"load{i}@okeb.com")
+    at = _run(results, "login", lambda: button.click().run(), lambda at: at.session_state["logged_in"])
+    if at is not None and dept == "Debt":
+        # Admins land on the Dashboard; switching pages is one more rerun
+        radio = at.sidebar.radio[0]
+        at = _run(results, "open:Debt Recovery", lambda: radio.set_value("Debt Recovery").run())
+    for r in range(rounds):
+        if at is None: return
+        if think: time.sleep(rnd.uniform(0, think))
+        button = FORMS[dept](at, i, r, ctx)
+        at = _run(results, dept, lambda: button.click().run())
+
+def _worker(path, i, dept, rounds, think, ctx, start, out):
+    import jobs
+    db.DB_NAME = path
+    jobs.SCHEDULE = {}  # no backups or integrity checks competing with the sessions being measured
+    results = []
+    try: session(i, dept, rounds, think, ctx, results, start)
+    except Exception as e:
+        results.append({"action": dept, "ms": 0.0, "ok": False, "error": f"{type(e).__name__}: {e}", "ts": time.time()})
+    finally: out.put((results, db.get_lock_stats()))
+
+# --- RUN ---
+def _max_ids():
+    with db.get_conn() as conn:
+        return {dept: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0] for dept, (table, _) in LANDS_IN.items()}
+
+def _landed(before):
+    with db.get_conn() as conn:
+        return {dept: conn.execute(f"SELECT COUNT(*) FROM {table} WHERE id > ?{where}", (before[dept],)).fetchone()[0]
+                for dept, (table, where) in LANDS_IN.items()}
+
+def run(sessions=10, rounds=5, rows=20_000, think=0.0):
+    with temp_database() as path:
+        started = time.perf_counter()
+        synthetic.generate(rows, debtors=max(100, sessions * rounds))
+        depts = [DEPARTMENTS[i % len(DEPARTMENTS)] for i in range(sessions)]
+        for i, dept in enumerate(depts):
+            credentials.set_password(f"load{i}@okeb.com", PASSWORD, "ADMIN" if dept == "Debt" else "STAFF",
+                                     "All" if dept == "Debt" else dept)
+        with db.get_conn() as conn:
+            open_ids = [r[0] for r in conn.execute("SELECT id FROM debts WHERE status='Unpaid' AND amount >= 100")]
+        random.Random(7).shuffle(open_ids)
+        # Every debt session repays its own debts, so a rejected payment means a real error
+        ctx = {"products": [p for p in db.get_prices() if "Fuel" not in p],
+               "debt_ids": {i: open_ids[i * rounds:(i + 1) * rounds] for i in range(sessions)}}
+        print(f"setup: {rows:,} rows per table, {sessions} users in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        before, results, lock = _max_ids(), [], {}
+        mp = multiprocessing.get_context("spawn")
+        start, out = mp.Barrier(sessions + 1), mp.Queue()
+        procs = [mp.Process(target=_worker, args=(path, i, dept, rounds, think, ctx, start, out), daemon=True)
+                 for i, dept in enumerate(depts)]
+        for p in procs: p.start()
+        start.wait(timeout=TIMEOUT * 5)  # every session has loaded the login page
+        began = time.perf_counter()
+        for _ in procs:
+            try: found, stats = out.get(timeout=TIMEOUT * (rounds + 2))
+            except Empty:
+                results.append({"action": "session", "ms": 0.0, "ok": False, "error": "session did not finish", "ts": time.time()}); continue
+            results += found
+            for k, v in stats.items(): lock[k] = round(lock.get(k, 0) + v, 1)
+        elapsed = time.perf_counter() - began
+        for p in procs: p.join(timeout=5)
+        landed = _landed(before)
+
+    submits = [r for r in results if r["action"] in FORMS]
+    accepted = {dept: sum(1 for r in submits if r["action"] == dept and r["ok"]) for dept in FORMS}
+    errors = [r for r in results if not r["ok"]]
+    actions = profiling.summary(results, key="action")
+    for row in actions:
+        del row["avg_rows"], row["avg_bytes"]
+        row["errors"] = sum(1 for r in results if r["action"] == row["action"] and not r["ok"])
+    return {"meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "sessions": sessions, "rounds": rounds,
+                     "rows": rows, "think_s": think, "pool_size": db.POOL_SIZE, "busy_timeout_ms": db.BUSY_TIMEOUT_MS},
+            "seconds": round(elapsed, 2), "submissions": len(submits),
+            "submissions_per_second": round(sum(accepted.values()) / elapsed, 2),
+            "submit_p95_ms": profiling._percentile(sorted(r["ms"] for r in submits), 95) if submits else None,
+            "error_rate": round(len(errors) / len(results), 4) if results else 0.0,
+            "lock": lock, "actions": actions,
+            "lost_writes": {dept: accepted[dept] - landed[dept] for dept in FORMS if accepted[dept] != landed[dept]},
+            "errors": sorted({r["error"] for r in errors})[:20]}
+
+def missed(report, p95_ms=None, max_error_rate=0.0):
+    # Targets this run did not meet, as readable strings
+    out = []
+    if report["lost_writes"]: out.append(f"accepted submissions missing from the database: {report['lost_writes']}")
+    if report["error_rate"] > max_error_rate: out.append(f"error rate {report['error_rate']:.2%} > {max_error_rate:.2%}")
+    if p95_ms and (report["submit_p95_ms"] or 0) > p95_ms: out.append(f"submit p95 {report['submit_p95_ms']:.0f} ms > {p95_ms:.0f} ms")
+    return out
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent sessions against app.py on a temp database.")
+    parser.add_argument("--sessions", type=int, default=10, help="simulated users, spread over POS/Fuel/Bakery/Farm/Debt")
+    parser.add_argument("--rounds", type=int, default=5, help="submissions per session")
+    parser.add_argument("--rows", type=int, default=20_000, help="synthetic rows per department table")
+    parser.add_argument("--think", type=float, default=0.0, help="max random pause between submissions (s)")
+    parser.add_argument("--p95-ms", type=float, help="fail if the submit p95 is slower than this")
+    parser.add_argument("--max-error-rate", type=float, default=0.0)
+    parser.add_argument("--out", help="write the JSON report here as well as stdout")
+    args = parser.parse_args(argv)
+    report = run(args.sessions, args.rounds, args.rows, args.think)
+    report["missed"] = missed(report, args.p95_ms, args.max_error_rate)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w") as f: f.write(text)
+    print(text)
+    return 1 if report["missed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
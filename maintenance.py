@@ -0,0 +1,315 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import functools
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+import database as db
+
+# Database upkeep: online backups, integrity checks, planner statistics, incremental vacuum and
+# storage numbers. Every run is timed and written to maintenance_log; jobs.py queues backup() and
+# run() on a schedule (jobs.SCHEDULE), the Backups & Maintenance page and this CLI on demand.
+#   backup   copies the live file page by page with the sqlite3 backup API inside one read
+#            transaction. In WAL mode that never blocks writers, and the pinned snapshot keeps
+#            commits made during the copy from restarting it. Snapshots go to backups/ next to the
+#            database, get a quick_check, and are pruned to the newest KEEP_LAST plus one a day
+#            for KEEP_DAYS days.
+#   restore  checks a snapshot, backs up the live file first, then copies the snapshot over it
+#            through SQLite in one step, so other connections see the old file or the new one.
+#   vacuum   hands free pages back to the OS VACUUM_STEP at a time, one short write each. Needs
+#            auto_vacuum=INCREMENTAL, which files created before it only get from one full VACUUM.
+#   stats    file size and free pages, plus unused space and leaf-page fragmentation per table
+#            and index (dbstat), kept in storage_stats to follow over time.
+# Usage: python maintenance.py backup|check|optimize|vacuum [--full]|stats|run|list|prune
+#        python maintenance.py restore <snapshot>
+
+PAGES_PER_STEP = 1024
+KEEP_LAST = 8
+KEEP_DAYS = 14
+VACUUM_STEP = 1000
+MAX_PROBLEMS = 100
+FILE_ROW = "(file)"
+SNAPSHOT_FMT = "%Y%m%d-%H%M%S"
+VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+def backups_dir():
+    path = os.path.join(os.path.dirname(os.path.abspath(db.DB_NAME)), "backups")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _file_bytes():
+    wal = db.DB_NAME + "-wal"
+    return os.path.getsize(db.DB_NAME), os.path.getsize(wal) if os.path.exists(wal) else 0
+
+def _open_ro(path):
+    return sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+
+# --- LOG ---
+def logged(op):
+    # Times fn and logs the run, failed ones included; a result with ok=False is logged as 'problems'
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            started_at, start = datetime.now().strftime(db.STAMP_FMT), time.perf_counter()
+            result, status = None, "failed"
+            try:
+                result = fn(*args, **kwargs)
+                status = "ok" if result.get("ok", True) else "problems"
+                return result
+            except BaseException as e:
+                result = {"error": f"{type(e).__name__}: {e}"}
+                raise
+            finally:
+                result["seconds"] = round(time.perf_counter() - start, 3)
+                with db.transaction() as conn:
+                    conn.execute("INSERT INTO maintenance_log (op, started_at, seconds, status, result) VALUES (?, ?, ?, ?, ?)",
+                                 (op, started_at, result["seconds"], status, json.dumps(result)))
+                    db.touch(conn, "maintenance_log")
+        return inner
+    return wrap
+
+@db.cached("maintenance_log")
+def get_log(op=None, limit=50):
+    import pandas as pd
+    sql, params = "SELECT id, op, started_at, seconds, status, result FROM maintenance_log", []
+    if op: sql += " WHERE op = ?"; params.append(op)
+    sql += " ORDER BY id DESC LIMIT ?"; params.append(limit)
+    with db.get_conn() as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+@db.cached("storage_stats")
+def get_storage_history(name=FILE_ROW, limit=365):
+    # Oldest first, for charting
+    import pandas as pd
+    with db.get_conn() as conn:
+        df = pd.read_sql_query("""SELECT taken_at, pages, free_pages, unused_pct, fragmented_pct, bytes FROM storage_stats
+                                  WHERE name = ? ORDER BY taken_at DESC LIMIT ?""", conn, params=[name, limit])
+    return df.iloc[::-1].reset_index(drop=True)
+
+# --- SNAPSHOTS ---
+def _pattern():
+    base = re.escape(os.path.splitext(os.path.basename(db.DB_NAME))[0])
+    return re.compile(rf"^{base}-(\d{{8}}-\d{{6}})(?:-([\w-]+))?\.db$")
+
+def snapshots():
+    # Newest first: {"name", "path", "taken_at", "label", "bytes"}
+    found, folder, pattern = [], backups_dir(), _pattern()
+    for name in os.listdir(folder):
+        m = pattern.match(name)
+        if not m: continue
+        found.append({"name": name, "path": os.path.join(folder, name), "label": m[2] or "",
+                      "taken_at": datetime.strptime(m[1], SNAPSHOT_FMT).strftime("%Y-%m-%d %H:%M:%S"),
+                      "bytes": os.path.getsize(os.path.join(folder, name))})
+    return sorted(found, key=lambda s: (s["taken_at"], s["name"]), reverse=True)
+
+def _snapshot_path(label=""):
+    base = os.path.splitext(os.path.basename(db.DB_NAME))[0]
+    stamp = datetime.now().strftime(SNAPSHOT_FMT)
+    for n in range(1, 100):
+        tag = "-".join(str(part) for part in (label, n if n > 1 else "") if part)
+        path = os.path.join(backups_dir(), f"{base}-{stamp}{'-' + tag if tag else ''}.db")
+        if not os.path.exists(path): return path
+    raise RuntimeError("Too many snapshots in one second")
+
+def _copy(source, path, pages):
+    # source -> a new file at path, written as path.tmp and renamed once complete. Returns (steps, pages).
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(path + ".tmp" + suffix): os.remove(path + ".tmp" + suffix)
+    progress = {"steps": 0, "pages": 0}
+    def step(status, remaining, total): progress.update(steps=progress["steps"] + 1, pages=total)
+    target = sqlite3.connect(path + ".tmp")
+    try:
+        source.backup(target, pages=pages, progress=step)
+        target.execute("PRAGMA journal_mode=DELETE")  # a snapshot is one self-contained file
+    finally: target.close()
+    os.replace(path + ".tmp", path)
+    return progress["steps"], progress["pages"]
+
+def verify(path, quick=False):
+    # Integrity of a snapshot file, plus the schema version restore needs to know about
+    conn = _open_ro(path)
+    try:
+        problems = [r[0] for r in conn.execute(f"PRAGMA {'quick_check' if quick else 'integrity_check'}({MAX_PROBLEMS})")]
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        tables = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'").fetchone()[0]
+    finally: conn.close()
+    ok = problems == ["ok"]
+    return {"ok": ok, "problems": [] if ok else problems, "schema_version": version, "tables": tables}
+
+@logged("backup")
+def backup(label="", pages=PAGES_PER_STEP, prune_after=True):
+    path = _snapshot_path(label)
+    with db.get_conn() as conn:
+        # One read transaction for the whole copy: writers carry on in the WAL, and the copy is of
+        # the database as it was at the first read
+        conn.execute("BEGIN")
+        try:
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            steps, total = _copy(conn, path, pages)
+        finally: conn.rollback()
+    checked = verify(path, quick=True)
+    if not checked["ok"]: os.remove(path)  # never leave a snapshot that restore would refuse
+    result = {"ok": checked["ok"], "path": path, "bytes": os.path.getsize(path) if checked["ok"] else 0,
+              "pages": total, "steps": steps, "problems": checked["problems"]}
+    if prune_after: result["pruned"] = len(prune())
+    return result
+
+def prune(keep_last=KEEP_LAST, keep_days=KEEP_DAYS):
+    # Keeps the newest keep_last snapshots and the newest of each day for keep_days days; returns the names removed
+    cutoff = (datetime.now() - timedelta(days=keep_days)).strftime(db.DAY_FMT)
+    days, removed = set(), []
+    for i, snap in enumerate(snapshots()):
+        day = snap["taken_at"][:10]
+        if i >= keep_last and (day < cutoff or day in days):
+            os.remove(snap["path"])
+            removed.append(snap["name"])
+        days.add(day)
+    return removed
+
+@logged("restore")
+def restore(path):
+    # Replaces the live database with a snapshot. The live file is backed up first (label
+    # pre-restore), so a restore can be undone the same way. Other processes drop their cached
+    # reads the next time they poll data_version().
+    checked = verify(path)
+    if not checked["ok"]:
+        first = " ".join(checked["problems"][0].splitlines()[:2])[:200]
+        raise ValueError(f"{os.path.basename(path)} failed its integrity check ({first}); nothing was restored")
+    if checked["schema_version"] > db.SCHEMA_VERSION: raise ValueError(f"{os.path.basename(path)} is from a newer version of the app")
+    safety = backup("pre-restore", prune_after=False)
+    if not safety["ok"]: raise ValueError("Could not back up the live database first; nothing was restored")
+    with db.get_conn() as conn:
+        before = dict(conn.execute("SELECT table_name, version FROM data_versions").fetchall())
+        source = _open_ro(path)
+        try: source.backup(conn)  # all pages in one step, under the write lock
+        finally: source.close()
+    db._initialised.discard(db.DB_NAME)
+    db.init_db()  # a snapshot from before a schema change is migrated forward
+    with db.transaction() as conn:
+        after = dict(conn.execute("SELECT table_name, version FROM data_versions").fetchall())
+        # Every counter ends above anything a process can have seen, so every cached read goes stale
+        conn.executemany("""INSERT INTO data_versions (table_name, version) VALUES (?, ?)
+                            ON CONFLICT(table_name) DO UPDATE SET version = excluded.version""",
+                         [(t, max(before.get(t, 0), after.get(t, 0)) + 1) for t in sorted(set(before) | set(after))])
+        # Jobs the snapshot still had open belong to the timeline that was just replaced
+        conn.execute("UPDATE jobs SET status='failed', message='Stopped by a database restore', finished_at=? WHERE status IN ('queued', 'running')",
+                     (datetime.now().strftime(db.STAMP_FMT),))
+    db.invalidate()
+    return {"restored": path, "pre_restore": safety["path"], "schema_version": checked["schema_version"], "tables": checked["tables"]}
+
+# --- UPKEEP ---
+@logged("integrity_check")
+def check(quick=False):
+    # Reads every page; in WAL mode writers are not held up
+    with db.get_conn() as conn:
+        problems = [r[0] for r in conn.execute(f"PRAGMA {'quick_check' if quick else 'integrity_check'}({MAX_PROBLEMS})")]
+    ok = problems == ["ok"]
+    return {"ok": ok, "problems": [] if ok else problems}
+
+@logged("optimize")
+def optimize():
+    # Re-analyzes tables whose statistics drifted, then checkpoints the WAL without waiting on anyone
+    with db.get_conn() as conn:
+        conn.execute("PRAGMA optimize").fetchall()
+        busy, frames, done = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    return {"wal_frames": frames, "checkpointed": done, "checkpoint_busy": bool(busy)}
+
+@logged("vacuum")
+def vacuum(step=VACUUM_STEP, full=False):
+    # full=True rewrites the whole file with VACUUM, blocking writers while it runs; it also switches
+    # a file created before auto_vacuum=INCREMENTAL over, so later runs can go step by step
+    bytes_before = _file_bytes()[0]
+    with db.get_conn() as conn:
+        free_before = free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        chunks = 0
+        if full:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        elif mode == 2:
+            while free:
+                # executescript steps the pragma to the end; each chunk is its own short write transaction
+                conn.executescript(f"PRAGMA incremental_vacuum({step})")
+                chunks += 1
+                left = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if left >= free: break
+                free = left
+        # The file only shrinks at a checkpoint; after a full VACUUM the WAL holds a copy of everything
+        conn.execute(f"PRAGMA wal_checkpoint({'TRUNCATE' if full else 'PASSIVE'})").fetchone()
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    return {"mode": VACUUM_MODES[mode], "full": full, "chunks": chunks, "freed_pages": free_before - free, "free_pages": free,
+            "bytes_before": bytes_before, "bytes_after": _file_bytes()[0], "needs_full_vacuum": mode != 2 and free > 0}
+
+@logged("stats")
+def stats():
+    # dbstat visits every page. Leaf pages read in b-tree order should sit on consecutive page
+    # numbers; each jump is a seek during a full scan, counted as fragmentation.
+    taken_at = datetime.now().strftime(db.STAMP_FMT)
+    with db.get_conn() as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        objects = conn.execute("""WITH pages AS (SELECT name, path, pageno, pagetype, unused, pgsize FROM dbstat),
+                                       leaves AS (SELECT name, pageno - LAG(pageno) OVER (PARTITION BY name ORDER BY path) AS gap
+                                                  FROM pages WHERE pagetype = 'leaf')
+                                  SELECT p.name, p.pages, p.unused, p.bytes, COALESCE(l.leaves, 0), COALESCE(l.jumps, 0)
+                                  FROM (SELECT name, COUNT(*) AS pages, SUM(unused) AS unused, SUM(pgsize) AS bytes
+                                        FROM pages GROUP BY name) p
+                                  LEFT JOIN (SELECT name, COUNT(*) AS leaves, SUM(gap != 1) AS jumps FROM leaves GROUP BY name) l
+                                  USING (name)""").fetchall()
+    file_bytes, wal_bytes = _file_bytes()
+    pct = lambda part, whole: round(part / whole * 100, 2) if whole else 0.0
+    leaves, jumps = sum(o[4] for o in objects), sum(o[5] for o in objects)
+    unused = sum(o[2] for o in objects) + free * page_size
+    rows = [(taken_at, FILE_ROW, pages, free, pct(unused, pages * page_size), pct(jumps, leaves), file_bytes + wal_bytes)]
+    rows += [(taken_at, name, n, None, pct(slack, size), pct(jump, leaf), size) for name, n, slack, size, leaf, jump in objects]
+    with db.transaction() as conn:
+        conn.executemany("""INSERT INTO storage_stats (taken_at, name, pages, free_pages, unused_pct, fragmented_pct, bytes)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)""", rows)
+        db.touch(conn, "storage_stats")
+    worst = sorted(rows[1:], key=lambda r: r[5] * r[2], reverse=True)[:5]
+    return {"pages": pages, "free_pages": free, "free_pct": pct(free, pages), "unused_pct": rows[0][4],
+            "fragmented_pct": rows[0][5], "bytes": file_bytes, "wal_bytes": wal_bytes,
+            "most_fragmented": {r[1]: r[5] for r in worst if r[5]}}
+
+def run(quick=False):
+    # The scheduled pass. A failed check stops it there, so a damaged file is not rewritten by
+    # vacuum before someone has looked at it.
+    result = {"integrity_check": check(quick)}
+    if result["integrity_check"]["ok"]:
+        for op in (optimize, vacuum, stats): result[op.__name__] = op()
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Back up, check and compact the database.")
+    parser.add_argument("command", choices=["backup", "check", "optimize", "vacuum", "stats", "run", "list", "prune", "restore"])
+    parser.add_argument("snapshot", nargs="?", help="restore: snapshot file, or its name in backups/")
+    parser.add_argument("--full", action="store_true", help="vacuum: rewrite the whole file (blocks writers)")
+    parser.add_argument("--quick", action="store_true", help="check/run: quick_check instead of integrity_check")
+    args = parser.parse_args(argv)
+    db.init_db()
+    if args.command == "list":
+        for s in snapshots(): print(f"{s['name']}  {s['taken_at']}  {s['bytes'] / 1e6:.1f} MB")
+        return 0
+    if args.command == "prune":
+        for name in prune(): print(f"removed {name}")
+        return 0
+    if args.command == "restore":
+        if not args.snapshot: parser.error("restore needs a snapshot")
+        path = args.snapshot if os.path.exists(args.snapshot) else os.path.join(backups_dir(), args.snapshot)
+        result = restore(path)
+    elif args.command == "vacuum": result = vacuum(full=args.full)
+    elif args.command in ("check", "run"): result = (check if args.command == "check" else run)(quick=args.quick)
+    else: result = {"backup": backup, "optimize": optimize, "stats": stats}[args.command]()
+    print(json.dumps(result, indent=2))
+    failed = not result.get("ok", True) or not result.get("integrity_check", {}).get("ok", True)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
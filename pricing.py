@@ -0,0 +1,123 @@
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+import database as db
+import archive
+
+# Effective-dated prices. database.set_prices keeps every price with the moment it took effect
+# (price_history); here past shifts are priced as of their own date with one merge_asof per call,
+# so repricing a year of shifts is a sort and a join rather than a lookup per row.
+# reprice() previews each shift's expected revenue at the prices in force when it was recorded;
+# apply() writes that back to live shifts in one transaction (archived months stay as recorded).
+# Usage: python pricing.py fuel|bakery [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--apply]
+
+FUEL_ITEM = "Fuel Unit Price"
+DEPARTMENTS = ["fuel", "bakery"]
+
+def prices_asof(df, on="date", by="item_name"):
+    # df plus price_asof: the price of item `by` in force at time `on`, per row. Order and index
+    # are kept; rows from before the item's first version (or with no readable date) get NaN.
+    history = db.get_price_history()
+    if history.empty or df.empty: return df.assign(price_asof=np.nan)
+    right = pd.DataFrame({"_when": pd.to_datetime(history["effective_from"], format="ISO8601"), by: history["item_name"].to_numpy(),
+                          "price_asof": history["price"].to_numpy()}).sort_values("_when", kind="stable")
+    left = pd.DataFrame({"_when": pd.to_datetime(df[on], format="ISO8601", errors="coerce").to_numpy(), by: df[by].to_numpy(),
+                         "_row": np.arange(len(df))})
+    left = left[left["_when"].notna()].sort_values("_when", kind="stable")
+    left[by], right[by] = left[by].astype(object), right[by].astype(object)  # str and object keys do not join
+    # Versions with the same effective_from: the later one (higher id) wins
+    matched = pd.merge_asof(left, right, on="_when", by=by, direction="backward").set_index("_row")["price_asof"]
+    return df.assign(price_asof=matched.reindex(np.arange(len(df))).to_numpy())
+
+def _fuel(date_from=None, date_to=None):
+    df = archive.read_table("fuel_records", ["date", "total_liters", "unit_price", "expected_revenue", "cash_collected",
+                                             "pos_collected", "credit_sales"], date_from, date_to)
+    df = prices_asof(df.assign(item_name=FUEL_ITEM)).drop(columns="item_name")
+    df["price_asof"] = df["price_asof"].fillna(df["unit_price"])
+    collected = df[["cash_collected", "pos_collected", "credit_sales"]].fillna(0).sum(axis=1)
+    df["expected_asof"] = (df["total_liters"].fillna(0) * df["price_asof"]).round(2).fillna(df["expected_revenue"])
+    df["shortage_asof"] = (collected - df["expected_asof"]).round(2)
+    return df, None
+
+def _bakery(date_from=None, date_to=None):
+    # (shifts, lines). Only lines that can move are read: products with a price history, in shifts
+    # from the first version on. lines carry the change per line as `delta`.
+    shifts = archive.read_table("bakery_records", ["date", "expected_revenue", "actual_revenue"], date_from, date_to)
+    history = db.get_price_history()
+    first = history["effective_from"].min() if len(history) else None
+    ids = shifts.loc[shifts["date"] >= first, "id"] if first else shifts["id"].iloc[:0]
+    with db.get_conn() as conn:
+        lines = pd.read_sql_query("""SELECT i.record_id, i.product_id, p.name AS item_name, i.sold, i.unit_price
+                                     FROM bakery_items i JOIN products p ON p.id = i.product_id
+                                     WHERE i.record_id BETWEEN ? AND ?
+                                       AND p.name IN (SELECT item_name FROM price_history)""", conn,
+                                  params=[int(ids.min()), int(ids.max())] if len(ids) else [0, -1])
+    lines = lines.merge(shifts[["id", "date"]].rename(columns={"id": "record_id"}), on="record_id")
+    lines = prices_asof(lines)
+    lines["price_asof"] = lines["price_asof"].fillna(lines["unit_price"])
+    lines["delta"] = lines["sold"].fillna(0) * (lines["price_asof"] - lines["unit_price"].fillna(0))
+    delta = lines.groupby("record_id")["delta"].sum()
+    shifts["expected_asof"] = (shifts["expected_revenue"].fillna(0) + shifts["id"].map(delta).fillna(0)).round(2)
+    shifts["shortage_asof"] = (shifts["actual_revenue"].fillna(0) - shifts["expected_asof"]).round(2)
+    return shifts, lines
+
+def _shifts(department, date_from, date_to):
+    if department not in DEPARTMENTS: raise ValueError(f"Cannot reprice {department!r}; expected one of {', '.join(DEPARTMENTS)}")
+    return (_fuel if department == "fuel" else _bakery)(date_from, date_to)
+
+@db.cached("price_history", "products", "fuel_records", "bakery_records", "bakery_items")
+def reprice(department, date_from=None, date_to=None):
+    # Shifts in range with expected_asof, shortage_asof and difference (as-of minus recorded expectation)
+    df, _ = _shifts(department, date_from, date_to)
+    df["difference"] = (df["expected_asof"] - df["expected_revenue"].fillna(0)).round(2)
+    return df
+
+def apply(department, date_from=None, date_to=None):
+    # Rewrites expected revenue and shortage/surplus (and the line prices for bakery) of live shifts
+    # whose expectation changes, in one transaction, logged for sync. Returns the number updated.
+    table = f"{department}_records"
+    shifts, lines = _shifts(department, date_from, date_to)
+    changed = shifts[(shifts["expected_asof"] - shifts["expected_revenue"].fillna(0)).abs() >= 0.005]
+    if changed.empty: return 0
+    with db.transaction() as conn:
+        live = [r[0] for r in conn.execute(f"SELECT id FROM {table} WHERE id BETWEEN ? AND ?",
+                                           (int(changed["id"].min()), int(changed["id"].max())))]
+        changed = changed[changed["id"].isin(live)]
+        ids = changed["id"].astype(int).tolist()
+        if department == "fuel":
+            conn.executemany("UPDATE fuel_records SET unit_price=?, expected_revenue=?, shortage_surplus=? WHERE id=?",
+                             zip(changed["price_asof"].astype(float).tolist(), changed["expected_asof"].astype(float).tolist(),
+                                 changed["shortage_asof"].astype(float).tolist(), ids))
+        else:
+            conn.executemany("UPDATE bakery_records SET expected_revenue=?, shortage_surplus=? WHERE id=?",
+                             zip(changed["expected_asof"].astype(float).tolist(), changed["shortage_asof"].astype(float).tolist(), ids))
+            moved = lines[lines["record_id"].isin(ids) & (lines["price_asof"] != lines["unit_price"])]
+            conn.executemany("UPDATE bakery_items SET unit_price=? WHERE record_id=? AND product_id=?",
+                             zip(moved["price_asof"].astype(float).tolist(), moved["record_id"].astype(int).tolist(),
+                                 moved["product_id"].astype(int).tolist()))
+            # The product rollup follows by the revenue delta per day and product
+            days = moved.groupby([moved["date"].str[:10], "product_id"])["delta"].sum()
+            conn.executemany("UPDATE product_rollup SET revenue = revenue + ? WHERE date=? AND product_id=?",
+                             [(float(d), day, int(pid)) for (day, pid), d in days.items()])
+            db.touch(conn, "bakery_items", "product_rollup")
+        db.log_changes(conn, table, "update", ids)
+        db.touch(conn, table)
+    return len(ids)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reprice past shifts at the prices in force when they were recorded.")
+    parser.add_argument("department", choices=DEPARTMENTS)
+    parser.add_argument("--from", dest="date_from")
+    parser.add_argument("--to", dest="date_to")
+    parser.add_argument("--apply", action="store_true", help="write the new expectations to live shifts")
+    args = parser.parse_args(argv)
+    df = reprice(args.department, args.date_from, args.date_to)
+    moved = df[df["difference"].abs() >= 0.005]
+    print(f"{len(df):,} shifts, {len(moved):,} would change, net expected revenue {moved['difference'].sum():+,.2f}")
+    if args.apply: print(f"updated {apply(args.department, args.date_from, args.date_to):,} live shifts")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
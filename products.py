@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import database as db
+import charts
+
+# Per-product sales, wastage and margin for bakery and farm. Everything is grouped in SQL from
+# product_rollup (one row per day and product, kept in step by database.record_items), so a
+# report costs the number of days x products in range, not the number of shifts, and archived
+# months are still covered.
+
+REPORT_COLUMNS = ["product", "department", "quantity", "damaged", "wastage_pct", "revenue", "avg_price",
+                  "cost", "margin", "margin_pct"]
+
+def _range(date_from, date_to):
+    date_to = db.normalise_date(date_to, db.DAY_FMT) if date_to else db._today()
+    date_from = db.normalise_date(date_from, db.DAY_FMT) if date_from else \
+        (datetime.strptime(date_to, db.DAY_FMT) - timedelta(days=29)).strftime(db.DAY_FMT)
+    return date_from, date_to
+
+@db.cached("product_rollup", "products")
+def product_report(date_from=None, date_to=None, department=None):
+    # One row per product sold in the range (default: the last 30 days), best revenue first
+    import numpy as np
+    import pandas as pd
+    date_from, date_to = _range(date_from, date_to)
+    sql = """SELECT p.name AS product, p.department, SUM(r.quantity) AS quantity, SUM(r.damaged) AS damaged,
+                    SUM(r.revenue) AS revenue, SUM(r.cost) AS cost
+             FROM product_rollup r JOIN products p ON p.id = r.product_id
+             WHERE r.date >= ? AND r.date <= ?"""
+    params = [date_from, date_to]
+    if department: sql += " AND p.department = ?"; params.append(department)
+    sql += " GROUP BY p.id ORDER BY revenue DESC"
+    with db.get_conn() as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    handled = df["quantity"] + df["damaged"]
+    df["wastage_pct"] = np.where(handled > 0, df["damaged"] / handled.where(handled > 0, 1) * 100, 0.0).round(1)
+    df["avg_price"] = np.where(df["quantity"] > 0, df["revenue"] / df["quantity"].where(df["quantity"] > 0, 1), 0.0).round(2)
+    df["margin"] = (df["revenue"] - df["cost"]).round(2)
+    df["margin_pct"] = np.where(df["revenue"] > 0, df["margin"] / df["revenue"].where(df["revenue"] > 0, 1) * 100, 0.0).round(1)
+    return df[REPORT_COLUMNS]
+
+@db.cached("product_rollup", "products")
+def product_trend(date_from=None, date_to=None, department=None, resolution="auto"):
+    # (frame, resolution): period, product, quantity, damaged, revenue, bucketed like charts.revenue_chart
+    import pandas as pd
+    date_from, date_to = _range(date_from, date_to)
+    date_from, resolution = charts.bounded(date_from, date_to, resolution)
+    bucket = charts.RESOLUTIONS[resolution][0]  # plain `date` is product_rollup's, products has none
+    sql = f"""SELECT {bucket} AS period, p.name AS product, SUM(r.quantity) AS quantity, SUM(r.damaged) AS damaged,
+                     SUM(r.revenue) AS revenue
+              FROM product_rollup r JOIN products p ON p.id = r.product_id
+              WHERE r.date >= ? AND r.date <= ?"""
+    params = [date_from, date_to]
+    if department: sql += " AND p.department = ?"; params.append(department)
+    sql += " GROUP BY period, p.id ORDER BY period, product"
+    with db.get_conn() as conn:
+        return pd.read_sql_query(sql, conn, params=params), resolution
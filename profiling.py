@@ -0,0 +1,127 @@
+import json
+import math
+import time
+import inspect
+import threading
+import functools
+from collections import deque
+from datetime import datetime
+from contextlib import contextmanager
+
+# Profiling for the Performance page. instrument() wraps the public functions of the data modules
+# so every call records its time, the rows it returned and the bytes of any DataFrames it built.
+# app.py brackets each rerun with begin_rerun()/end_rerun() and the page module with page(), so a
+# rerun splits into data functions, SQLite statements (database.query_log) and everything else
+# (pandas shaping, Plotly, Streamlit). Both buffers are bounded rings, so this stays on in production.
+
+CALL_BUFFER = 5000
+RERUN_BUFFER = 500
+PERCENTILES = (50, 95, 99)
+# Plumbing that is either not a data call (connections, cache tags) or too hot to wrap
+SKIP = {"get_conn", "transaction", "cached", "touch", "invalidate", "close_all", "get_query_stats",
+        "get_lock_stats", "reset_lock_stats", "normalise_date", "init_db", "migrate", "site_id", "sync_columns"}
+
+calls = deque(maxlen=CALL_BUFFER)    # {"fn", "ms", "rows", "bytes", "ts"}
+reruns = deque(maxlen=RERUN_BUFFER)  # {"page", "user", "ms", "page_ms", "data_ms", "sql_ms", "queries", "ts"}
+_local = threading.local()
+
+def _measure(value):
+    # (rows, bytes) of a return value: frames count rows and memory, tuples add up their parts
+    if hasattr(value, "memory_usage") and hasattr(value, "__len__"):
+        size = value.memory_usage(index=True)
+        return len(value), int(size.sum() if hasattr(size, "sum") else size)
+    if isinstance(value, tuple):
+        parts = [_measure(v) for v in value]
+        return sum(p[0] for p in parts), sum(p[1] for p in parts)
+    if isinstance(value, (list, dict)): return len(value), 0
+    return 0, 0
+
+def profiled(name):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            depth = getattr(_local, "depth", 0)
+            _local.depth = depth + 1
+            result, start = None, time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            finally:
+                ms = (time.perf_counter() - start) * 1000
+                _local.depth = depth
+                rows, size = _measure(result)
+                calls.append({"fn": name, "ms": round(ms, 3), "rows": rows, "bytes": size, "ts": time.time()})
+                # Nested calls are already inside their caller's time
+                if depth == 0: _local.data_ms = getattr(_local, "data_ms", 0.0) + ms
+        inner.profiled = True
+        return inner
+    return wrap
+
+def instrument(*modules):
+    # Wraps, in place, the public functions each module defines. Callers look them up on the
+    # module at call time, so views and the module's own internal calls both go through the wrapper.
+    for module in modules:
+        short = module.__name__.rsplit(".", 1)[-1]
+        for name, obj in list(vars(module).items()):
+            if name.startswith("_") or name in SKIP or getattr(obj, "profiled", False): continue
+            if not inspect.isfunction(obj) or obj.__module__ != module.__name__: continue
+            setattr(module, name, profiled(f"{short}.{name}")(obj))
+
+# --- RERUNS ---
+def begin_rerun():
+    # Returns the perf_counter start, for callers that also want the plain elapsed time
+    _local.data_ms, _local.page_ms, _local.wall = 0.0, 0.0, time.time()
+    _local.started = time.perf_counter()
+    return _local.started
+
+@contextmanager
+def page(name):
+    start = time.perf_counter()
+    try: yield
+    finally:
+        _local.page_ms = (time.perf_counter() - start) * 1000
+        calls.append({"fn": f"page:{name}", "ms": round(_local.page_ms, 3), "rows": 0, "bytes": 0, "ts": time.time()})
+
+def end_rerun(page_name, user=""):
+    # Records the rerun and returns its total ms
+    import database as db
+    ms = (time.perf_counter() - getattr(_local, "started", time.perf_counter())) * 1000
+    me, since = threading.get_ident(), getattr(_local, "wall", time.time())
+    statements = [q for q in list(db.query_log) if q["ts"] >= since and q.get("thread") == me]
+    reruns.append({"page": page_name, "user": user, "ms": round(ms, 1), "page_ms": round(getattr(_local, "page_ms", 0.0), 1),
+                   "data_ms": round(getattr(_local, "data_ms", 0.0), 1), "sql_ms": round(sum(q["run_ms"] + q["wait_ms"] for q in statements), 1),
+                   "queries": len(statements), "ts": time.time()})
+    return round(ms, 1)
+
+# --- REPORTS ---
+def _percentile(ordered, p):
+    # Nearest rank on an already sorted list
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def summary(entries=None, key="fn", value="ms"):
+    # One row per key: calls, p50/p95/p99/max of `value`, total, average rows and bytes. Slowest p95 first.
+    groups = {}
+    for e in list(calls if entries is None else entries): groups.setdefault(e[key], []).append(e)
+    rows = []
+    for name, items in groups.items():
+        times = sorted(e[value] for e in items)
+        row = {key: name, "calls": len(items)}
+        row.update({f"p{p}": round(_percentile(times, p), 2) for p in PERCENTILES})
+        row.update(max=round(times[-1], 2), total=round(sum(times), 1),
+                   avg_rows=round(sum(e.get("rows", 0) for e in items) / len(items), 1),
+                   avg_bytes=int(sum(e.get("bytes", 0) for e in items) / len(items)))
+        rows.append(row)
+    return sorted(rows, key=lambda r: r[f"p{PERCENTILES[1]}"], reverse=True)
+
+def slowest_reruns(limit=20):
+    return sorted(list(reruns), key=lambda r: r["ms"], reverse=True)[:limit]
+
+def dump():
+    # Everything in the buffers, including the statement log, as JSON for offline analysis
+    import database as db
+    return json.dumps({"generated": datetime.now().isoformat(timespec="seconds"), "calls": list(calls),
+                       "reruns": list(reruns), "queries": db.get_query_stats()}, indent=1)
+
+def clear():
+    import database as db
+    calls.clear(); reruns.clear(); db.query_log.clear()
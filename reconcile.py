@@ -0,0 +1,146 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+import database as db
+import archive
+
+# Reconciliation across stored shifts. rescan() reads only the columns it needs from both storage
+# tiers and checks every shift in one vectorised pass per rule:
+#   pump_meter    each pump opens where its previous shift closed (fuel, per pump name)
+#   pos_cash      each terminal's opening cash is its previous closing cash (per machine_id)
+#   pos_wallet    same for the wallet balance
+#   bakery_stock  opening stock is the previous shift's unsold stock
+#   shift_balance money collected vs expected for the shift
+# Findings replace the contents of the discrepancies table. Tolerances live in settings, so they
+# can be changed without a deploy; the entry pages use shift_balance for their live status too.
+# Usage: python reconcile.py [rescan]   |   python reconcile.py tolerance <kind> <value>
+
+TOLERANCES = {
+    # kind: (default, unit, what is compared)
+    "pump_meter": (0.5, "L", "Opening meter vs the same pump's previous closing meter"),
+    "pos_cash": (50.0, "₦", "Opening cash vs the terminal's previous closing cash"),
+    "pos_wallet": (50.0, "₦", "Opening wallet vs the terminal's previous closing wallet"),
+    "bakery_stock": (0.0, "loaves", "Opening stock vs the previous shift's unsold stock"),
+    "shift_balance": (50.0, "₦", "Money collected vs expected for the shift"),
+}
+COLUMNS = ["kind", "department", "record_id", "prev_record_id", "key", "date", "expected", "actual", "difference"]
+
+# --- TOLERANCES ---
+@db.cached("settings")
+def tolerances():
+    with db.get_conn() as conn:
+        stored = dict(conn.execute("SELECT key, value FROM settings WHERE key LIKE 'tolerance.%'").fetchall())
+    return {kind: float(stored.get(f"tolerance.{kind}", default)) for kind, (default, _, _) in TOLERANCES.items()}
+
+def tolerance(kind):
+    return tolerances()[kind]
+
+def set_tolerance(kind, value):
+    if kind not in TOLERANCES: raise ValueError(f"Unknown tolerance {kind!r}; expected one of {', '.join(TOLERANCES)}")
+    if float(value) < 0: raise ValueError("Tolerance cannot be negative")
+    with db.transaction() as conn:
+        conn.execute("INSERT OR REPLACE INTO settings VALUES (?, ?)", (f"tolerance.{kind}", str(float(value))))
+        db.touch(conn, "settings")
+
+# --- RULES ---
+def _found(kind, dept, df, mask, key, expected, actual, prev_id=None):
+    hit = df[mask.to_numpy()]
+    return pd.DataFrame({"kind": kind, "department": dept, "record_id": hit["id"].to_numpy(),
+                         "prev_record_id": prev_id[mask].to_numpy() if prev_id is not None else None,
+                         "key": key[mask].to_numpy() if key is not None else None, "date": hit["date"].to_numpy(),
+                         "expected": expected[mask].to_numpy(), "actual": actual[mask].to_numpy(),
+                         "difference": (actual - expected)[mask].round(2).to_numpy()})
+
+def check_chain(df, key, opening, closing, kind, dept, tol):
+    # Each shift's `opening` against the `closing` of the previous shift with the same `key`.
+    # Shifts are ordered by date, then id (rows merged from other sites have later ids).
+    df = df[df[opening].notna() & df[closing].notna()].sort_values([key, "date", "id"], kind="stable")
+    grouped = df.groupby(key, sort=False)
+    prev_close, prev_id = grouped[closing].shift(), grouped["id"].shift()
+    mask = prev_close.notna() & ((df[opening] - prev_close).abs() > tol + 1e-9)
+    return _found(kind, dept, df, mask, df[key], prev_close, df[opening], prev_id)
+
+def check_balance(df, dept, expected, actual, tol):
+    mask = (actual - expected).abs() > tol + 1e-9
+    return _found("shift_balance", dept, df, mask, None, expected, actual)
+
+def _fuel(tol):
+    cols = ["id", "date", "p1_name", "pump_a_open", "pump_a_close", "p2_name", "pump_b_open", "pump_b_close",
+            "expected_revenue", "cash_collected", "pos_collected", "credit_sales"]
+    df = archive.read_table("fuel_records", cols)
+    # Both pump slots stacked into one (pump, open, close) frame, so a pump can move between slots
+    names = ["id", "date", "pump", "open", "close"]
+    pumps = pd.concat([df[["id", "date", "p1_name", "pump_a_open", "pump_a_close"]].set_axis(names, axis=1),
+                       df[["id", "date", "p2_name", "pump_b_open", "pump_b_close"]].set_axis(names, axis=1)], ignore_index=True)
+    pumps = pumps[pumps["pump"].notna()]
+    collected = df[["cash_collected", "pos_collected", "credit_sales"]].fillna(0).sum(axis=1)
+    return [check_chain(pumps, "pump", "open", "close", "pump_meter", "FUEL", tol["pump_meter"]),
+            check_balance(df, "FUEL", df["expected_revenue"].fillna(0), collected, tol["shift_balance"])]
+
+def _pos(tol):
+    df = archive.read_table("pos_records", ["id", "date", "machine_id", "opening_cash", "closing_cash",
+                                            "opening_wallet", "closing_wallet", "calculated_balance"])
+    df = df[df["machine_id"].fillna("") != ""]
+    # calculated_balance is already collected minus expected; remitted cash is not stored to recompute it
+    return [check_chain(df, "machine_id", "opening_cash", "closing_cash", "pos_cash", "POS", tol["pos_cash"]),
+            check_chain(df, "machine_id", "opening_wallet", "closing_wallet", "pos_wallet", "POS", tol["pos_wallet"]),
+            check_balance(df, "POS", pd.Series(0.0, index=df.index), df["calculated_balance"].fillna(0), tol["shift_balance"])]
+
+def _bakery(tol):
+    df = archive.read_table("bakery_records", ["id", "date", "opening_stock", "closing_stock", "expected_revenue", "actual_revenue"])
+    df["bakery"] = "BAKERY"
+    return [check_chain(df, "bakery", "opening_stock", "closing_stock", "bakery_stock", "BAKERY", tol["bakery_stock"]),
+            check_balance(df, "BAKERY", df["expected_revenue"].fillna(0), df["actual_revenue"].fillna(0), tol["shift_balance"])]
+
+# --- RESCAN ---
+def rescan():
+    # Re-checks every stored shift and replaces the discrepancies table. Returns {kind: count, "seconds": s}.
+    start = time.perf_counter()
+    tol = tolerances()
+    frames = [f for f in _fuel(tol) + _pos(tol) + _bakery(tol) if len(f)]
+    found = pd.concat(frames, ignore_index=True)[COLUMNS] if frames else pd.DataFrame(columns=COLUMNS)
+    found["detected_at"] = datetime.now().strftime(db.STAMP_FMT)
+    rows = found.astype(object).where(found.notna(), None).values.tolist()
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM discrepancies")
+        conn.executemany(f"INSERT INTO discrepancies ({', '.join(COLUMNS)}, detected_at) VALUES ({', '.join('?' for _ in range(len(COLUMNS) + 1))})", rows)
+        db.touch(conn, "discrepancies")
+    counts = {kind: int((found["kind"] == kind).sum()) for kind in TOLERANCES}
+    counts["seconds"] = round(time.perf_counter() - start, 2)
+    return counts
+
+@db.cached("discrepancies")
+def discrepancy_counts():
+    with db.get_conn() as conn:
+        return dict(conn.execute("SELECT kind, COUNT(*) FROM discrepancies GROUP BY kind").fetchall())
+
+@db.cached("discrepancies")
+def get_discrepancies(kind=None, limit=500):
+    # Newest first
+    sql, params = f"SELECT id, {', '.join(COLUMNS)}, detected_at FROM discrepancies", []
+    if kind: sql += " WHERE kind = ?"; params.append(kind)
+    sql += " ORDER BY date DESC, id DESC LIMIT ?"; params.append(limit)
+    with db.get_conn() as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-check stored shifts and list discrepancies.")
+    parser.add_argument("command", nargs="?", default="rescan", choices=["rescan", "tolerance"])
+    parser.add_argument("kind", nargs="?", choices=list(TOLERANCES))
+    parser.add_argument("value", nargs="?", type=float)
+    args = parser.parse_args(argv)
+    if args.command == "tolerance":
+        if args.kind and args.value is not None: set_tolerance(args.kind, args.value)
+        for kind, value in tolerances().items(): print(f"{kind}: {value:g} {TOLERANCES[kind][1]}")
+        return 0
+    counts = rescan()
+    for kind in TOLERANCES: print(f"{kind}: {counts[kind]:,} discrepancies (tolerance {tolerance(kind):g} {TOLERANCES[kind][1]})")
+    print(f"rescanned in {counts['seconds']}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+import os
+import sys
+import gzip
+import hmac
+import json
+import socket
+import argparse
+import tempfile
+import ipaddress
+import urllib.request
+from itertools import islice
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs, urlencode
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import database as db
+
+# Multi-site sync. Each site's database logs its writes to the `changes` outbox (database.py,
+# CHANGE LOG) under record ids "<site_id>:<local id>", unique per table across all sites, so
+# AUTOINCREMENT ids never have to agree between sites. A batch is gzipped JSON lines: a header, one change per line, a trailer.
+# Batches move as files (export/import) or over HTTP (serve on one side, push/pull/sync on the
+# other). Merging is idempotent: a change is applied once per (origin, origin seq), so batches can
+# overlap, repeat or arrive through a third site. Merged rows go through the normal tables and the
+# rollup, so head office runs the usual dashboard over every branch it has pulled from.
+# Concurrent edits of the same row resolve to whichever change is merged last.
+# Usage: python sync.py status | name <site name> | export <file> [--peer SITE] [--all] | import <file>
+#        python sync.py serve [--port N] [--host H] | push <url> | pull <url> | sync <url>
+# serve listens on this machine only unless --host says otherwise, and then only with OKEB_SYNC_TOKEN set.
+
+BATCH_SIZE = 1000  # changes per read, and per merge transaction
+DEFAULT_PORT = 8765
+DEFAULT_HOST = "127.0.0.1"
+TOKEN_ENV = "OKEB_SYNC_TOKEN"  # if set, HTTP requests must carry it in X-Sync-Token
+TIMEOUT = 60
+
+# --- SITE ---
+def site_name():
+    with db.get_conn() as conn:
+        row = conn.execute("SELECT value FROM settings WHERE key='site_name'").fetchone()
+    return row[0] if row else socket.gethostname()
+
+def set_site_name(name):
+    with db.transaction() as conn:
+        conn.execute("INSERT OR REPLACE INTO settings VALUES ('site_name', ?)", (name,))
+
+@db.cached("sync_peers")
+def peers():
+    with db.get_conn() as conn:
+        return conn.execute("SELECT site_id, name, sent_seq, received_seq, last_sent, last_received FROM sync_peers ORDER BY name").fetchall()
+
+def _peer(conn, site, name=None):
+    conn.execute("INSERT OR IGNORE INTO sync_peers (site_id, name) VALUES (?, ?)", (site, name))
+    if name: conn.execute("UPDATE sync_peers SET name=? WHERE site_id=?", (name, site))
+    db.touch(conn, "sync_peers")
+
+def mark_sent(site, seq, name=None):
+    with db.transaction() as conn:
+        _peer(conn, site, name)
+        conn.execute("UPDATE sync_peers SET sent_seq=MAX(sent_seq, ?), last_sent=? WHERE site_id=?",
+                     (seq, datetime.now().strftime(db.STAMP_FMT), site))
+
+def _mark_received(site, seq, name=None):
+    with db.transaction() as conn:
+        _peer(conn, site, name)
+        conn.execute("UPDATE sync_peers SET received_seq=MAX(received_seq, ?), last_received=? WHERE site_id=?",
+                     (seq, datetime.now().strftime(db.STAMP_FMT), site))
+
+def _position(site, column):
+    with db.get_conn() as conn:
+        row = conn.execute(f"SELECT {column} FROM sync_peers WHERE site_id=?", (site,)).fetchone()
+    return row[0] if row else 0
+
+# --- EXPORT ---
+def iter_changes(peer=None, since=0):
+    # (seq, change) in log order after `since`, skipping what originated at `peer`; keyset on seq
+    last = since
+    while True:
+        with db.get_conn() as conn:
+            rows = conn.execute("""SELECT seq, origin, COALESCE(origin_seq, seq), table_name, record_gid, op, payload, created_at
+                                   FROM changes WHERE seq > ? AND origin != ? ORDER BY seq LIMIT ?""",
+                                (last, peer or "", BATCH_SIZE)).fetchall()
+        if not rows: return
+        for seq, origin, origin_seq, table, gid, op, payload, created in rows:
+            yield seq, {"origin": origin, "seq": origin_seq, "table": table, "gid": gid, "op": op,
+                        "row": json.loads(payload) if payload else None, "at": created}
+        last = rows[-1][0]
+
+def write_batch(out, peer=None, since=None):
+    # Writes a batch to the binary file `out`. since defaults to what `peer` was last sent.
+    # Returns (changes written, last seq); the caller marks the peer as sent once delivered.
+    since = _position(peer, "sent_seq") if since is None and peer else (since or 0)
+    count, last = 0, since
+    with gzip.GzipFile(fileobj=out, mode="wb") as gz:
+        gz.write((json.dumps({"site": db.site_id(), "name": site_name(), "since": since}) + "\n").encode())
+        for seq, change in iter_changes(peer, since):
+            gz.write((json.dumps(change) + "\n").encode())
+            count, last = count + 1, seq
+        gz.write((json.dumps({"end": last, "count": count}) + "\n").encode())
+    return count, last
+
+# --- MERGE ---
+def _local_id(conn, table, gid, me):
+    site, _, local = gid.rpartition(":")
+    if site == me: return int(local)
+    row = conn.execute("SELECT local_id FROM sync_records WHERE table_name=? AND gid=?", (table, gid)).fetchone()
+    return row[0] if row else None
+
+def _apply(conn, change, me):
+    # Returns True when a rollup (daily or per product) cannot follow the change incrementally
+    table, gid, op, row = change["table"], change["gid"], change["op"], change["row"] or {}
+    if table not in db.SYNC_TABLES: raise ValueError(f"{table} is not a synced table")
+    cols = [c for c in db.sync_columns(table) if c in row]  # columns this schema does not have are dropped
+    local = _local_id(conn, table, gid, me)
+    if op == "delete":
+        if local is None: return False
+        conn.execute(f"DELETE FROM {table} WHERE id=?", (local,))
+        conn.execute("DELETE FROM sync_records WHERE table_name=? AND gid=?", (table, gid))
+        if table in db.ITEM_TABLES: db.delete_items(conn, table, [local])
+        return table in ("daily_sales", *db.ITEM_TABLES)
+    if local is not None:
+        # Known row: an insert seen twice or an update. Rows since archived or deleted here are left alone.
+        if op == "update" and cols:
+            conn.execute(f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in cols)} WHERE id=?", [row[c] for c in cols] + [local])
+            if table in db.ITEM_TABLES and "items" in row:
+                # e.g. repriced lines: replace them, the product rollup is rebuilt after the batch
+                db.delete_items(conn, table, [local])
+                db.record_items(conn, table, local, row.get("date") or "", row["items"] or [])
+                return True
+        return table == "daily_sales" and op == "update"
+    # First time this row is seen here (an update whose insert we never got counts too)
+    new = conn.execute(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                       [row[c] for c in cols]).lastrowid
+    conn.execute("INSERT OR REPLACE INTO sync_records VALUES (?, ?, ?)", (table, gid, new))
+    if table in db.ITEM_TABLES: db.record_items(conn, table, new, row.get("date") or "", row.get("items") or [])
+    if table == "daily_sales":
+        db.add_to_rollup(conn, [(row.get("date"), row.get("department"), row.get("gross_revenue"),
+                                 row.get("total_expenses"), row.get("net_cash"), row.get("submitted_by"))])
+    return False
+
+def merge(changes):
+    # Applies changes in order, BATCH_SIZE per transaction. Changes already merged (same origin and
+    # origin seq) and changes that started here are skipped. They are also added to the local log,
+    # so this site can pass them on. Returns {"applied": n, "skipped": n}.
+    me = db.site_id()
+    applied = skipped = 0
+    rebuild = False
+    changes = iter(changes)
+    while True:
+        batch = list(islice(changes, BATCH_SIZE))
+        if not batch: break
+        with db.transaction() as conn:
+            for ch in batch:
+                if ch["origin"] == me: skipped += 1; continue
+                cur = conn.execute("""INSERT OR IGNORE INTO changes (origin, origin_seq, table_name, record_gid, op, payload, created_at)
+                                      VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                                   (ch["origin"], ch["seq"], ch["table"], ch["gid"], ch["op"], json.dumps(ch["row"]), ch["at"]))
+                if not cur.rowcount: skipped += 1; continue
+                rebuild |= _apply(conn, ch, me)
+                applied += 1
+            db.touch(conn, "changes", *db.SYNC_TABLES)
+    if rebuild: db.rebuild_rollup(); db.rebuild_product_rollup()
+    return {"applied": applied, "skipped": skipped}
+
+def read_batch(f):
+    # Merges a batch from the binary file `f`. The sender's position is only recorded when the
+    # trailer arrived, so a truncated batch is simply sent again next time.
+    header, trailer = None, {}
+    def changes():
+        nonlocal header
+        for line in gzip.GzipFile(fileobj=f, mode="rb"):
+            item = json.loads(line)
+            if header is None: header = item
+            elif "end" in item: trailer.update(item)
+            else: yield item
+    result = merge(changes())
+    if header and trailer and header["site"] != db.site_id():
+        _mark_received(header["site"], trailer["end"], header.get("name"))
+    result.update(site=(header or {}).get("site"), name=(header or {}).get("name"), complete=bool(trailer))
+    return result
+
+def export_file(path, peer=None, since=None):
+    with open(path + ".tmp", "wb") as out: count, last = write_batch(out, peer, since)
+    os.replace(path + ".tmp", path)
+    if peer: mark_sent(peer, last)
+    return count
+
+def import_file(path):
+    with open(path, "rb") as f: return read_batch(f)
+
+# --- HTTP ---
+class _Handler(BaseHTTPRequestHandler):
+    # GET /site, GET /changes?peer=SITE&since=N (a batch), POST /changes (merge a batch)
+    def _allowed(self):
+        token = os.environ.get(TOKEN_ENV)
+        if not token or hmac.compare_digest(self.headers.get("X-Sync-Token", ""), token): return True
+        self.send_error(403, "Bad or missing X-Sync-Token")
+        return False
+
+    def _json(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if not self._allowed(): return
+        url = urlparse(self.path)
+        if url.path == "/site": return self._json({"site_id": db.site_id(), "name": site_name()})
+        if url.path != "/changes": return self.send_error(404)
+        query = parse_qs(url.query)
+        peer, since = query.get("peer", [None])[0], int(query.get("since", ["0"])[0])
+        with tempfile.TemporaryFile() as buf:
+            write_batch(buf, peer, since)
+            size = buf.tell(); buf.seek(0)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/gzip")
+            self.send_header("Content-Length", str(size))
+            self.end_headers()
+            while chunk := buf.read(1 << 16): self.wfile.write(chunk)
+
+    def do_POST(self):
+        if not self._allowed(): return
+        if urlparse(self.path).path != "/changes": return self.send_error(404)
+        with tempfile.TemporaryFile() as buf:
+            remaining = int(self.headers.get("Content-Length", 0))
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, 1 << 16))
+                if not chunk: break
+                buf.write(chunk); remaining -= len(chunk)
+            buf.seek(0)
+            self._json(read_batch(buf))
+
+    def log_message(self, fmt, *args):
+        print(f"{self.address_string()} {fmt % args}", file=sys.stderr)
+
+def _loopback(host):
+    try: return all(ipaddress.ip_address(info[4][0]).is_loopback for info in socket.getaddrinfo(host, None))
+    except (socket.gaierror, ValueError): return False
+
+def serve(port=DEFAULT_PORT, host=DEFAULT_HOST):
+    # The change log is every sale and debt: other machines only get it with a token to present
+    if not _loopback(host) and not os.environ.get(TOKEN_ENV):
+        raise ValueError(f"Set {TOKEN_ENV} before serving on {host}; without it only 127.0.0.1 is allowed")
+    server = ThreadingHTTPServer((host, port), _Handler)
+    print(f"Serving site {site_name()} ({db.site_id()}) on http://{host}:{port}", file=sys.stderr)
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.server_close()
+
+def _request(url, data=None, method="GET"):
+    req = urllib.request.Request(url, data=data, method=method)
+    if os.environ.get(TOKEN_ENV): req.add_header("X-Sync-Token", os.environ[TOKEN_ENV])
+    if data is not None: req.add_header("Content-Type", "application/gzip")
+    return urllib.request.urlopen(req, timeout=TIMEOUT)
+
+def _remote_site(url):
+    with _request(url.rstrip("/") + "/site") as resp: return json.load(resp)
+
+def push(url):
+    # Sends what the remote site has not been sent yet; only marked as sent once it answered
+    remote = _remote_site(url)
+    with tempfile.TemporaryFile() as buf:
+        count, last = write_batch(buf, remote["site_id"])
+        buf.seek(0)
+        with _request(url.rstrip("/") + "/changes", data=buf.read(), method="POST") as resp: result = json.load(resp)
+    mark_sent(remote["site_id"], last, remote["name"])
+    result["sent"] = count
+    return result
+
+def pull(url):
+    remote = _remote_site(url)
+    query = urlencode({"peer": db.site_id(), "since": _position(remote["site_id"], "received_seq")})
+    with _request(url.rstrip("/") + "/changes?" + query) as resp, tempfile.TemporaryFile() as buf:
+        while chunk := resp.read(1 << 16): buf.write(chunk)
+        buf.seek(0)
+        return read_batch(buf)
+
+def status():
+    # This site plus one row per peer: (site_id, name, changes waiting to be sent, last sent, last received)
+    with db.get_conn() as conn:
+        last_seq = conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0] or 0
+        rows = []
+        for site, name, sent, received, last_sent, last_received in peers():
+            waiting = conn.execute("SELECT COUNT(*) FROM changes WHERE seq > ? AND origin != ?", (sent, site)).fetchone()[0]
+            rows.append((site, name, waiting, last_sent, last_received))
+    return {"site_id": db.site_id(), "name": site_name(), "last_seq": last_seq, "peers": rows}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exchange change batches between site databases.")
+    parser.add_argument("command", choices=["status", "name", "export", "import", "serve", "push", "pull", "sync"])
+    parser.add_argument("target", nargs="?", help="file (export/import), URL (push/pull/sync) or site name (name)")
+    parser.add_argument("--peer", help="export: site id of the receiver; sends only what it has not been sent")
+    parser.add_argument("--all", action="store_true", help="export: the whole log, not just what is new for --peer")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"serve: address to listen on (other than loopback needs {TOKEN_ENV})")
+    args = parser.parse_args(argv)
+    if args.command in ("name", "export", "import", "push", "pull", "sync") and not args.target:
+        parser.error(f"{args.command} needs a target")
+    if args.command == "name": set_site_name(args.target)
+    elif args.command == "export":
+        print(f"{export_file(args.target, args.peer, 0 if args.all else None):,} changes written to {args.target}")
+    elif args.command == "import":
+        r = import_file(args.target)
+        print(f"from {r['name']} ({r['site']}): {r['applied']:,} applied, {r['skipped']:,} already here"
+              + ("" if r["complete"] else " (batch was truncated)"))
+    elif args.command == "serve":
+        try: return serve(args.port, args.host) or 0
+        except ValueError as e: parser.error(str(e))
+    else:
+        if args.command in ("pull", "sync"):
+            r = pull(args.target); print(f"pulled: {r['applied']:,} applied, {r['skipped']:,} already here")
+        if args.command in ("push", "sync"):
+            r = push(args.target); print(f"pushed: {r['sent']:,} sent, {r['applied']:,} applied there")
+    s = status()
+    print(f"site {s['name']} ({s['site_id']}): change log at #{s['last_seq']:,}")
+    for site, name, waiting, last_sent, last_received in s["peers"]:
+        print(f"  {name or '?'} ({site}): {waiting:,} to send, last sent {last_sent or 'never'}, last received {last_received or 'never'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import sys
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+import database as db
+
+# Synthetic data for every table created by init_db(), for benchmarks and query plan checks.
+# Shifts are spread over `years` ending today. Pump meters, POS terminal balances and bakery stock
+# carry over from one shift to the next, so reconciliation code has realistic data to check.
+# Usage: python synthetic.py <rows_per_department> [years]   (writes to database.DB_NAME)
+
+DEPARTMENTS = ["pos", "fuel", "bakery", "farm"]
+STAFF = ["ADA", "BAYO", "CHIDI", "DAPO", "EMEKA", "FUNMI", "GRACE", "HALIMA"]
+CREDIT_RATE = 0.2
+CHUNK = 50_000
+
+def _stamps(rows, years, rnd):
+    end = datetime.now().replace(second=0, microsecond=0)
+    span = timedelta(days=365 * years).total_seconds()
+    offsets = np.sort(rnd.uniform(0, span, rows))
+    start = end - timedelta(seconds=span)
+    stamps = pd.to_datetime(start) + pd.to_timedelta(offsets, unit="s")
+    return stamps.strftime(db.STAMP_FMT).tolist()
+
+def _insert(conn, table, df):
+    cols = list(df.columns)
+    sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})"
+    for i in range(0, len(df), CHUNK):
+        conn.executemany(sql, df.iloc[i:i + CHUNK].astype(object).values.tolist())
+
+def _carry_over(keys, delta, base):
+    # Running balance per key: each shift opens where the previous shift for that key closed
+    close = base + pd.Series(delta).groupby(keys).cumsum().to_numpy()
+    return close - delta, close
+
+def _pos(n, stamps, rnd, machines=4):
+    machine = np.array([f"T{i + 1}" for i in range(machines)])[rnd.integers(0, machines, n)]
+    deposits = rnd.uniform(20_000, 400_000, n).round(-2)
+    withdrawals = rnd.uniform(20_000, 400_000, n).round(-2)
+    volume = deposits + withdrawals
+    expected = (volume * 0.02).round(2)
+    actual = (expected * rnd.normal(1, 0.05, n)).round(2)
+    bank = (volume * 0.005).round(2)
+    profit = actual - bank
+    # Deposits turn wallet into cash, withdrawals the other way round; charges land in cash, bank fees leave the wallet
+    open_cash, close_cash = _carry_over(machine, deposits - withdrawals + actual, 1_000_000)
+    open_wallet, close_wallet = _carry_over(machine, withdrawals - deposits - bank, 1_000_000)
+    diff = rnd.normal(0, 40, n).round(2)
+    status = np.where(np.abs(diff) < 50, "✅ BALANCED", np.where(diff > 0, "⚠️ SURPLUS", "🚨 SHORTAGE"))
+    return pd.DataFrame({"date": stamps, "staff_name": rnd.choice(STAFF, n), "machine_id": machine,
+                         "opening_cash": open_cash, "opening_wallet": open_wallet, "capital_given": 0.0,
+                         "total_deposits": deposits, "total_withdrawals": withdrawals, "free_vol": 0.0,
+                         "total_volume": volume, "expected_comm": expected, "actual_comm": actual,
+                         "bank_charges": bank, "net_profit": profit, "closing_cash": close_cash,
+                         "closing_wallet": close_wallet, "calculated_balance": diff, "status": status})
+
+def _fuel(n, stamps, rnd, credit, price=700.0):
+    liters_a = rnd.uniform(100, 600, n).round(1)
+    liters_b = rnd.uniform(80, 500, n).round(1)
+    a_close = 10_000 + np.cumsum(liters_a); b_close = 20_000 + np.cumsum(liters_b)
+    total = liters_a + liters_b
+    expected = (total * price).round(2)
+    diff = rnd.normal(0, 30, n).round(2)
+    pos = (expected * rnd.uniform(0.2, 0.6, n)).round(-2)
+    cash = expected - pos - credit + diff
+    return pd.DataFrame({"date": stamps, "staff_name": rnd.choice(STAFF, n), "p1_name": "Pump 1",
+                         "pump_a_open": a_close - liters_a, "pump_a_close": a_close, "p2_name": "Pump 2",
+                         "pump_b_open": b_close - liters_b, "pump_b_close": b_close, "total_liters": total,
+                         "unit_price": price, "expected_revenue": expected, "cash_collected": cash,
+                         "pos_collected": pos, "credit_sales": credit, "shortage_surplus": diff,
+                         "customer_name": np.where(credit > 0, "Multiple Debtors", "None")})
+
+def _bakery(n, stamps, rnd, credit, prices):
+    # Returns (shifts, line items); each shift's loaves are spread over the bakery products
+    names, price = list(prices), np.array(list(prices.values()), dtype=float)
+    share = rnd.dirichlet(np.ones(len(names)))
+    split = lambda totals: rnd.multinomial(totals, share)
+    sold = split(rnd.integers(60, 400, n))
+    damaged = split(rnd.integers(0, 8, n))
+    # Unsold loaves are the next shift's opening stock
+    unsold = split(rnd.integers(0, 30, n))
+    opening = np.vstack([np.zeros((1, len(names)), dtype=int), unsold[:-1]])
+    expected = (sold * price).sum(axis=1)
+    diff = rnd.normal(0, 40, n).round(2)
+    shifts = pd.DataFrame({"date": stamps, "staff_name": rnd.choice(STAFF, n), "total_bread_sold": sold.sum(axis=1),
+                           "total_damaged": damaged.sum(axis=1), "expected_revenue": expected, "actual_revenue": expected + diff,
+                           "shortage_surplus": diff, "note": "", "credit_sales": credit,
+                           "customer_name": np.where(credit > 0, "Multiple Debtors", "None"),
+                           "opening_stock": opening.sum(axis=1), "closing_stock": unsold.sum(axis=1)})
+    items = pd.DataFrame({"row": np.repeat(np.arange(n), len(names)), "product": np.tile(names, n),
+                          "opening": opening.ravel(), "produced": np.maximum(sold + damaged + unsold - opening, 0).ravel(),
+                          "given": 0, "unsold": unsold.ravel(), "damaged": damaged.ravel(), "sold": sold.ravel(),
+                          "unit_price": np.tile(price, n)})
+    return shifts, items
+
+def _farm(n, stamps, rnd, customers, balance):
+    qty = rnd.integers(1, 10, n)
+    total = qty * 3500.0
+    balance = np.minimum(balance, total)
+    sales = pd.DataFrame({"date": stamps, "staff_name": rnd.choice(STAFF, n), "customer_name": customers,
+                          "items_summary": [f"{q}x Crates of Eggs" for q in qty], "total_value": total,
+                          "amount_paid": total - balance, "payment_mode": np.where(balance > 0, "Credit", "Cash"),
+                          "balance_due": balance, "note": ""})
+    items = pd.DataFrame({"row": np.arange(n), "line": 1, "product": "Crates of Eggs", "qty": qty, "unit_price": 3500.0})
+    return sales, items
+
+def _insert_items(conn, table, items, first_id):
+    # Line items of the header rows just inserted (ids first_id, first_id + 1, ...)
+    item_table = db.ITEM_TABLES[table]
+    ids = db.product_ids(conn, items["product"].unique().tolist(), "BAKERY" if table == "bakery_records" else "FARM")
+    items = items.assign(record_id=items.pop("row") + first_id, product_id=items.pop("product").map(ids))
+    _insert(conn, item_table, items)
+
+def _revenue(dept, df):
+    # Same revenue figure the save_* functions report to daily_sales
+    if dept == "pos": return df["net_profit"]
+    if dept == "fuel": return df["cash_collected"] + df["pos_collected"]
+    if dept == "bakery": return df["actual_revenue"]
+    return df["amount_paid"]
+
+def generate(rows, years=3, departments=DEPARTMENTS, debtors=500, seed=42):
+    # rows: shifts per department. Writes detail tables, debts, daily_sales and the rollup.
+    rnd = np.random.default_rng(seed)
+    names = np.array([f"Customer {i}" for i in range(debtors)])
+    today = datetime.now()
+    counts = {}
+    with db.transaction() as conn:
+        for dept in departments:
+            stamps = _stamps(rows, years, rnd)
+            has_credit = rnd.random(rows) < CREDIT_RATE
+            credit = np.where(has_credit, rnd.uniform(500, 20_000, rows).round(-2), 0.0)
+            customers = names[rnd.integers(0, debtors, rows)]
+            items = None
+            if dept == "pos": df = _pos(rows, stamps, rnd)
+            elif dept == "fuel": df = _fuel(rows, stamps, rnd, credit)
+            elif dept == "bakery": df, items = _bakery(rows, stamps, rnd, credit, {k: v for k, v in db.get_prices().items() if "Fuel" not in k})
+            else: df, items = _farm(rows, stamps, rnd, customers, credit)
+            table = f"{dept}_records"
+            _insert(conn, table, df)
+            if items is not None:
+                _insert_items(conn, table, items, conn.execute("SELECT MAX(id) FROM " + table).fetchone()[0] - rows + 1)
+            counts[table] = rows
+            days = np.array([s[:10] for s in stamps])
+            revenue = _revenue(dept, df)
+            sales = pd.DataFrame({"date": days, "department": dept.upper(), "gross_revenue": revenue,
+                                  "total_expenses": 0.0, "net_cash": revenue, "submitted_by": df["staff_name"]})
+            _insert(conn, "daily_sales", sales)
+            if dept == "pos": continue
+            # Older debts are more likely to have been settled
+            owed = df["balance_due"].to_numpy() if dept == "farm" else credit
+            idx = np.flatnonzero(owed > 0)
+            age = (pd.Timestamp(today) - pd.to_datetime(days[idx])).days.to_numpy()
+            paid = rnd.random(len(idx)) < np.clip(age / 120, 0, 0.95)
+            debts = pd.DataFrame({"date": days[idx], "department": dept.upper(),
+                                  "customer_name": customers[idx], "amount": np.where(paid, 0.0, owed[idx]),
+                                  "status": np.where(paid, "Paid", "Unpaid")})
+            _insert(conn, "debts", debts)
+            counts["debts"] = counts.get("debts", 0) + len(debts)
+        counts["daily_sales"] = rows * len(departments)
+        db.touch(conn, "debts", "daily_sales", *[f"{d}_records" for d in departments])
+        db.rebuild_rollup()
+        db.rebuild_product_rollup()
+    with db.get_conn() as conn: conn.execute("ANALYZE")
+    return counts
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    years = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(generate(rows, years))
@@ -0,0 +1,14 @@
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+
+# The modules under test live at the top of the checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py opens okeb_data.db in the working directory when imported; keep it out of the checkout.
+# Each test points db.DB_NAME at a database of its own.
+_scratch = tempfile.mkdtemp(prefix="okeb-tests-")
+os.chdir(_scratch)
+atexit.register(shutil.rmtree, _scratch, True)
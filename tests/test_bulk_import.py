@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+import database as db
+import bulk_import
+from benchmark import temp_database
+
+@pytest.fixture
+def scratch_db():
+    with temp_database() as path: yield path
+
+def _payloads(table):
+    with db.get_conn() as conn:
+        return [json.loads(p) for (p,) in conn.execute("SELECT payload FROM changes WHERE table_name = ? AND op = 'insert' ORDER BY seq", (table,))]
+
+def test_imported_line_items_travel_in_the_change_log(scratch_db):
+    items = [{"product": "Big Jumbo", "sold": 2, "unit_price": 1500}, {"product": "Small Toast", "sold": 3, "unit_price": 500}]
+    rows = [(2, {"date": "2024-03-01 08:00", "staff_name": "BULK", "actual_revenue": 4500, "items": json.dumps(items)}),
+            (3, {"date": "2024-03-01 09:00", "staff_name": "BULK", "actual_revenue": 0})]
+    report = bulk_import.ingest("bakery", rows)
+    assert report["rows"] == 2 and not report["errors"]
+    first, second = _payloads("bakery_records")[-2:]
+    assert sorted((i["product"], i["sold"], i["unit_price"]) for i in first["items"]) == [("Big Jumbo", 2, 1500.0), ("Small Toast", 3, 500.0)]
+    assert second["items"] == []
+    # Same shape as a change written by the entry page
+    db.save_bakery_entry({"date": "2024-03-01 10:00", "staff": "PAGE", "sold_qty": 2, "damaged_qty": 0, "expected": 3000, "actual": 3000,
+                          "diff": 0, "note": "", "credit": 0, "debtors_list": [], "items": items[:1]})
+    assert set(_payloads("bakery_records")[-1]) == set(first)
+
+def test_malformed_csv_line_is_reported_not_fatal(scratch_db, tmp_path):
+    path = tmp_path / "fuel.csv"
+    path.write_text("date,staff_name,total_liters\n2024-03-01,ADA,10\n2024-03-02,ADA,10,extra\n2024-03-03,ADA,12\n", encoding="utf-8-sig")
+    report = bulk_import.ingest("fuel", bulk_import.read_rows(str(path)))
+    assert report["rows"] == 2
+    assert report["errors"] == [(3, "more fields than the header")]
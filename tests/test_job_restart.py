@@ -0,0 +1,70 @@
+import os
+import sys
+import json
+import time
+import signal
+import tempfile
+import subprocess
+
+import pytest
+
+import database as db
+import jobs
+
+# Restart test for jobs.py: a worker process is killed in the middle of a bulk import, a second
+# worker process picks the queue up, and the import must finish with every row written exactly
+# once. A job queued behind it must run too.
+
+ROWS = 20_000
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _worker(cwd, *args):
+    # --no-schedule: only the jobs queued here, no backups or upkeep in the temp directory
+    return subprocess.Popen([sys.executable, os.path.join(REPO, "jobs.py"), "worker", "--no-schedule", *args], cwd=cwd,
+                            env={**os.environ, "PYTHONPATH": REPO}, stderr=subprocess.DEVNULL)
+
+def _count(sql):
+    with db.get_conn() as conn: return conn.execute(sql).fetchone()[0]
+
+@pytest.fixture
+def workdir():
+    with tempfile.TemporaryDirectory() as tmp:
+        original = db.DB_NAME
+        db.DB_NAME = os.path.join(tmp, "okeb_data.db")  # the workers run in tmp with the default name
+        try:
+            db.init_db()
+            yield tmp
+        finally:
+            db.close_all()
+            db.invalidate()
+            db.DB_NAME = original
+
+def test_killed_import_resumes_exactly_once(workdir):
+    path = os.path.join(workdir, "fuel.jsonl")
+    with open(path, "w") as f:
+        for i in range(ROWS):
+            f.write(json.dumps({"date": f"2024-01-{i % 28 + 1:02d} 08:00", "staff_name": "RESTART", "total_liters": 10,
+                                "cash_collected": 7000, "pos_collected": 0}) + "\n")
+    import_id = jobs.submit("bulk_import", department="fuel", path=path, chunk_size=500)
+    rollup_id = jobs.submit("rebuild_rollup")
+
+    first = _worker(workdir)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        job = jobs.get_job(import_id)
+        if job["checkpoint"] and job["checkpoint"]["line"] >= ROWS // 4: break
+        time.sleep(0.01)
+    first.send_signal(signal.SIGKILL); first.wait()
+    killed = jobs.get_job(import_id)
+    assert killed["status"] == "running", f"import was {killed['status']} when the worker was killed"
+    assert _count("SELECT COUNT(*) FROM fuel_records") == killed["checkpoint"]["line"], "checkpoint and committed rows disagree"
+
+    second = _worker(workdir, "--once")
+    assert second.wait(timeout=300) == 0, "second worker exited with an error"
+    done, rollup = jobs.get_job(import_id), jobs.get_job(rollup_id)
+    assert done["status"] == "done", done["message"]
+    assert done["attempts"] == 2
+    assert done["result"]["resumed_after_line"] == killed["checkpoint"]["line"]
+    assert _count("SELECT COUNT(*) FROM fuel_records") == ROWS
+    assert _count("SELECT COUNT(*) FROM daily_sales WHERE department='FUEL'") == ROWS
+    assert rollup["status"] == "done"
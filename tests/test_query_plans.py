@@ -0,0 +1,116 @@
+import io
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta
+
+import database as db
+import ledger
+import charts
+import products
+import pricing
+import archive
+import exports
+import jobs
+import maintenance
+import insights
+import sync
+import synthetic
+
+# Query plan audit: fills a throwaway database with synthetic rows, runs the read/write
+# functions of database.py, then EXPLAINs every statement they issued. Any "SCAN <table>"
+# on a big table fails the audit, unless it walks a partial index or is a rowid walk bounded by LIMIT.
+
+ROWS = 20_000  # enough rows per table for the planner's choices to be the ones it makes on a real file
+
+SMALL_TABLES = {"prices", "daily_rollup", "archive_manifest", "sqlite_master", "sync_peers", "products", "price_history", "settings",
+                "insight_forecasts"}
+
+def _exercise():
+    now = datetime.now().strftime(db.STAMP_FMT)
+    if archive._pyarrow():
+        # Oldest year to the archive, so history pages also go through the manifest
+        archive.archive_closed_months((datetime.now() - timedelta(days=730)).strftime("%Y-%m"))
+    db.get_prices()
+    db.get_dashboard_metrics()
+    db.get_revenue_trend()
+    charts.revenue_chart()
+    charts.revenue_chart("2021-01-01", "2021-02-01", "week")
+    db.get_unpaid_debts()
+    for fn in [db.get_pos_history, db.get_fuel_history, db.get_bakery_history, db.get_farm_history]: fn()
+    db.get_history_page("fuel_records", before_id=5000, date_from="2021-03-01", date_to="2021-03-31")
+    db.get_history_page("pos_records", staff="ADA", machine="T1")
+    db.get_history_page("farm_records", customer="Customer 7")
+    db.update_price("Fuel Unit Price", 700)
+    db.save_pos_entry({"date": now, "staff": "AUDIT", "machine": "T1", "open_cash": 0, "open_wallet": 0, "capital": 0, "deposits": 0, "withdrawals": 0, "free": 0, "volume": 0, "expected": 0, "actual": 0, "bank": 0, "profit": 0, "close_cash": 0, "close_wallet": 0, "balance": 0, "status": "✅ BALANCED"})
+    db.save_fuel_entry({"date": now, "staff": "AUDIT", "p1_name": "Pump 1", "pA_open": 0, "pA_close": 0, "p2_name": "Pump 2", "pB_open": 0, "pB_close": 0, "total_liters": 0, "price": 700, "expected": 0, "cash": 0, "pos": 0, "credit": 100, "diff": 0, "debtors_list": [{"name": "Audit", "amount": 100}]})
+    db.save_bakery_entry({"date": now, "staff": "AUDIT", "sold_qty": 0, "damaged_qty": 0, "expected": 0, "actual": 0, "diff": 0, "note": "", "credit": 0, "debtors_list": [],
+                          "items": [{"product": "Big Jumbo", "sold": 1, "damaged": 0, "unit_price": 1500}]})
+    db.save_farm_entry({"date": now, "staff": "AUDIT", "customer": "Audit", "items": "1x Eggs", "total": 100, "paid": 0, "mode": "Credit", "balance": 100, "note": "",
+                        "line_items": [{"product": "Eggs", "qty": 1, "unit_price": 100}]})
+    db.process_debt_repayment(1, 0, "AUDIT")
+    ledger.customer_balances()
+    db.data_version("daily_rollup", "debts")
+    products.product_report()
+    products.product_trend(department="BAKERY")
+    db.get_price_history()
+    pricing.apply("bakery", date_from=now, date_to=now)
+    exports.export(exports.end_of_day_sections(), "csv")
+    jobs.submit("rebuild_rollup")
+    jobs.recover()
+    jobs.work(once=True)
+    jobs.recent_jobs()
+    jobs.active_count()
+    jobs.submit_scheduled()
+    maintenance.get_log("vacuum", limit=1)
+    maintenance.get_storage_history()
+    insights.refresh()
+    insights.summary()
+    exports.export(exports.table_sections("daily_sales", "2024-01-01", "2024-01-31", ["FUEL"]), "csv")
+    ledger.repay_customer("Customer 7", 100, "AUDIT")
+    # The local log replayed as if it came from another site: every change inserts a new row
+    sync.write_batch(io.BytesIO())
+    sync.merge(dict(c, origin="audit", gid="audit:" + c["gid"].split(":")[1]) for _, c in sync.iter_changes())
+    sync.status()
+
+def _aliases(sql):
+    # Plans name joined tables by alias ("SCAN p"), so map aliases back to tables
+    return {alias: table for table, alias in re.findall(r"(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?(\w+)", sql)}
+
+def _is_bounded_walk(sql):
+    # Newest-first page with no filters besides the keyset cursor
+    if "ORDER BY id DESC LIMIT" not in sql: return False
+    return " WHERE " not in sql or sql.split(" WHERE ")[1].startswith("id < ? ORDER BY")
+
+def audit(rows=ROWS):
+    offenders = []
+    with tempfile.TemporaryDirectory() as tmp:
+        original = db.DB_NAME
+        db.DB_NAME = os.path.join(tmp, "audit.db")
+        try:
+            db.init_db()
+            synthetic.generate(rows, debtors=2000)
+            insights.refresh(full=True)  # one-off rebuild; the hourly job after it is incremental
+            db.query_log.clear()
+            _exercise()
+            statements = {q["sql"] for q in db.query_log if q["sql"].split()[0].upper() in ("SELECT", "UPDATE", "DELETE", "INSERT")}
+            with db.get_conn() as conn:
+                tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+                partial = {r[1] for t in tables for r in conn.execute(f"PRAGMA index_list({t})") if r[4]}
+                for sql in sorted(statements):
+                    plan = conn.execute("EXPLAIN QUERY PLAN " + sql, [None] * sql.count("?")).fetchall()
+                    for row in plan:
+                        detail = row[-1]
+                        if not detail.startswith("SCAN ") or detail.startswith("SCAN (") or "CONSTANT ROW" in detail: continue
+                        table, index = detail.split()[1], detail.split()[-1]
+                        table = _aliases(sql).get(table, table)
+                        if table in SMALL_TABLES or index in partial or _is_bounded_walk(sql): continue
+                        offenders.append((sql, detail))
+        finally:
+            db.close_all()
+            db.DB_NAME = original
+    return offenders
+
+def test_no_full_table_scans():
+    offenders = audit(ROWS)
+    assert offenders == [], "\n".join(f"FULL SCAN  {detail}\n    {sql}" for sql, detail in offenders)
@@ -0,0 +1,130 @@
+import os
+import time
+import sqlite3
+import threading
+
+import pytest
+
+import database as db
+import maintenance
+import synthetic
+from benchmark import temp_database
+
+# Backup and restore tests for maintenance.py, on one synthetic database in a temp directory:
+#   - a backup taken while a writer thread commits sales must not hold the writer up, and the
+#     snapshot must pass integrity_check
+#   - restoring it brings every table back to the snapshot's rows, cached reads included, and the
+#     pre-restore snapshot it leaves behind undoes the restore
+#   - a damaged snapshot is refused and the live file is left alone
+#   - incremental vacuum gives the pages of deleted rows back, and prune keeps what KEEP_LAST and
+#     KEEP_DAYS promise
+
+ROWS = 20_000
+MAX_WRITE_MS = 1000  # a writer waiting this long behind the backup counts as blocked
+# Written by the restore itself, so they differ from the snapshot by design
+OWN_TABLES = {"maintenance_log", "data_versions", "jobs", "sqlite_sequence"}
+
+def _counts(conn):
+    tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_stat%'")]
+    return {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables if t not in OWN_TABLES}
+
+def _live_counts():
+    with db.get_conn() as conn: return _counts(conn)
+
+def _file_counts(path):
+    conn = maintenance._open_ro(path)
+    try: return _counts(conn)
+    finally: conn.close()
+
+class _Writer(threading.Thread):
+    # Commits one sale after another until stopped, timing each commit
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stop, self.times = threading.Event(), []
+
+    def run(self):
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            db.save_daily_report("POS", 1000, 0, 1000, "RESTORE CHECK")
+            self.times.append((time.perf_counter(), (time.perf_counter() - start) * 1000))
+
+@pytest.fixture(scope="module")
+def snapshot():
+    # The database and a snapshot of it taken under load, shared by the tests below in file order
+    with temp_database():
+        synthetic.generate(ROWS)
+        writer = _Writer()
+        writer.start()
+        time.sleep(0.5)
+        began = time.perf_counter()
+        snap = maintenance.backup()
+        ended = time.perf_counter()
+        time.sleep(0.2)
+        writer.stop.set(); writer.join()
+        snap["commits_during"] = [ms for t, ms in writer.times if began <= t <= ended]
+        yield snap
+
+def test_backup_does_not_block_writers(snapshot):
+    assert snapshot["ok"], snapshot["problems"]
+    assert snapshot["commits_during"], "no writer commit landed while the backup ran"
+    assert max(snapshot["commits_during"]) <= MAX_WRITE_MS, f"a commit waited {max(snapshot['commits_during']):.0f} ms behind the backup"
+    checked = maintenance.verify(snapshot["path"])
+    assert checked["ok"], checked["problems"][:3]
+
+def test_restore_and_undo(snapshot):
+    path = snapshot["path"]
+    expected = _file_counts(path)
+    for _ in range(200): db.save_daily_report("FUEL", 500, 0, 500, "AFTER SNAPSHOT")
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM debts WHERE id IN (SELECT id FROM debts WHERE status='Unpaid' LIMIT 50)")
+        db.touch(conn, "debts")
+    newer = _live_counts()
+    cached_before = db.get_unpaid_debts()  # cached from here on
+    version = db.data_version()
+    result = maintenance.restore(path)
+    restored = _live_counts()
+    assert {t: restored.get(t) for t in expected} == expected
+    assert db.data_version() > version, "data_version did not move on restore"
+    with db.get_conn() as conn:
+        unpaid = conn.execute("SELECT COUNT(*) FROM debts WHERE status='Unpaid'").fetchone()[0]
+    assert len(db.get_unpaid_debts()) == unpaid and len(cached_before) != unpaid, "cached debt list was not refreshed by the restore"
+    assert maintenance.check()["ok"], "live database fails integrity_check after restore"
+    # Undo: the pre-restore snapshot has the rows written after the first one
+    maintenance.restore(result["pre_restore"])
+    undone = _live_counts()
+    assert {t: undone.get(t) for t in newer} == newer
+
+def test_damaged_snapshot_is_refused(snapshot):
+    bad = os.path.join(maintenance.backups_dir(), "damaged.db")
+    with open(snapshot["path"], "rb") as src, open(bad, "wb") as dst: dst.write(src.read())
+    size = os.path.getsize(bad)
+    with open(bad, "r+b") as f:
+        for offset in range(size // 3, size // 3 * 2, 4096 * 7):
+            f.seek(offset); f.write(os.urandom(512))
+    before = _live_counts()
+    with pytest.raises((ValueError, sqlite3.DatabaseError)): maintenance.restore(bad)
+    assert _live_counts() == before, "refused restore still changed the live database"
+
+def test_incremental_vacuum_frees_pages(snapshot):
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM fuel_records WHERE id % 4 != 0 OR id < (SELECT MAX(id) / 2 FROM fuel_records)")
+        db.touch(conn, "fuel_records")
+    with db.get_conn() as conn: free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    result = maintenance.vacuum()
+    assert result["free_pages"] == 0 and result["freed_pages"] >= free, f"incremental vacuum left {result['free_pages']} free pages"
+    assert maintenance.stats()["pages"] > 0
+
+def test_prune_keeps_newest_and_one_a_day(snapshot):
+    folder, base = maintenance.backups_dir(), os.path.splitext(os.path.basename(db.DB_NAME))[0]
+    for name in os.listdir(folder): os.remove(os.path.join(folder, name))
+    now = time.time()
+    # Four a day for 30 days
+    for hours in range(0, 30 * 24, 6):
+        open(os.path.join(folder, f"{base}-{time.strftime('%Y%m%d-%H%M%S', time.localtime(now - hours * 3600))}.db"), "w").close()
+    newest = [s["name"] for s in maintenance.snapshots()[:maintenance.KEEP_LAST]]
+    maintenance.prune()
+    kept = maintenance.snapshots()
+    days = {s["taken_at"][:10] for s in kept}
+    assert [s["name"] for s in kept[:maintenance.KEEP_LAST]] == newest, "prune removed one of the newest snapshots"
+    assert len(days) == maintenance.KEEP_DAYS + 1
+    assert len(kept) <= maintenance.KEEP_LAST + maintenance.KEEP_DAYS + 1
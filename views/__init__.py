@@ -0,0 +1,17 @@
+# Page modules for app.py. Each exposes render() and is imported only when its page is opened,
+# so a rerun pays only for the imports of the page on screen.
+PAGES = {
+    "Dashboard": "dashboard",
+    "POS Dept": "pos",
+    "Fuel Dept": "fuel",
+    "Bakery Dept": "bakery",
+    "Farm Dept": "farm",
+    "Debt Recovery": "debt_recovery",
+    "📤 Reports": "reports",
+    "🔍 Reconciliation": "reconciliation",
+    "⏳ Background Jobs": "background",
+    "⚙️ Price Settings": "price_settings",
+    "🔧 Database Admin": "db_admin",
+    "🛟 Backups & Maintenance": "backups",
+    "📈 Performance": "performance",
+}
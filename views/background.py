@@ -0,0 +1,63 @@
+import os
+import time
+import streamlit as st
+import database as db
+import jobs
+
+# === MODULE J: BACKGROUND JOBS ===
+STATUS_ICONS = {"queued": "🕒", "running": "⚙️", "done": "✅", "failed": "❌"}
+
+def _read(path):
+    # Called by the download button on click, so the file is only read when wanted
+    with open(path, "rb") as f: return f.read()
+
+def _job_list(polling):
+    recent = jobs.recent_jobs()
+    if not recent: st.info("No jobs yet.")
+    for j in recent:
+        result = j["result"] or {}
+        with st.container(border=True):
+            c1, c2 = st.columns([4, 1])
+            c1.markdown(f"**#{j['id']} {j['kind']}** · {STATUS_ICONS.get(j['status'], '')} {j['status']} · "
+                        f"{j['submitted_by'] or 'system'} · {j['created_at']}")
+            if j["status"] == "running": c1.progress(min(1.0, j["progress"] or 0.0), text=j["message"] or "Working...")
+            elif j["status"] == "failed": c1.error(j["message"])
+            elif j["status"] == "done":
+                c1.caption(", ".join(f"{k}: {v}" for k, v in result.items() if k not in ("path", "mime", "errors")))
+                if result.get("errors"): c1.caption(f"{len(result['errors'])} rejected line(s), first: {result['errors'][0]}")
+            if j["status"] == "done" and os.path.exists(result.get("path") or ""):
+                c2.download_button("⬇️ Download", data=lambda p=result["path"]: _read(p), file_name=result["file_name"],
+                                   mime=result["mime"], key=f"job_dl_{j['id']}")
+    # Stop polling once everything has finished
+    if polling and not jobs.active_count(): st.rerun()
+
+def render():
+    st.markdown("## ⏳ Background Jobs")
+    st.caption("Long operations run on a background worker, so the page stays responsive. Progress refreshes every 2 seconds.")
+    c1, c2 = st.columns(2)
+    with c1.container(border=True):
+        st.markdown("#### 🔁 Rebuild Dashboard Totals")
+        st.caption("Recompute daily_rollup from daily_sales.")
+        if st.button("Queue rebuild"): jobs.submit("rebuild_rollup", st.session_state.user); st.rerun()
+    with c1.container(border=True):
+        st.markdown("#### 🤖 Rebuild Insights")
+        st.caption("Rescore all history for the Dashboard's AI Insights, e.g. after a bulk import of old shifts.")
+        if st.button("Queue insights rebuild"): jobs.submit("insights", st.session_state.user, full=True); st.rerun()
+    with c2.container(border=True):
+        st.markdown("#### 🗄️ Archive Closed Months")
+        before = st.text_input("Archive months before (YYYY-MM)", value=db.datetime.now().strftime("%Y-%m"))
+        if st.button("Queue archive run"): jobs.submit("archive", st.session_state.user, before=before); st.rerun()
+    with st.container(border=True):
+        st.markdown("#### 📥 Bulk Import")
+        c1, c2 = st.columns([1, 3])
+        dept = c1.selectbox("Department", ["pos", "fuel", "bakery", "farm"])
+        upload = c2.file_uploader("CSV or JSONL file", type=["csv", "jsonl", "json"])
+        if upload and st.button("Queue import"):
+            path = os.path.join(jobs.jobs_dir(), f"upload_{int(time.time())}_{os.path.basename(upload.name)}")
+            with open(path, "wb") as f:
+                for block in iter(lambda: upload.read(1 << 20), b""): f.write(block)
+            jobs.submit("bulk_import", st.session_state.user, department=dept, path=path)
+            st.rerun()
+    st.markdown("#### 📋 Recent Jobs")
+    polling = jobs.active_count() > 0
+    st.fragment(run_every=2 if polling else None)(_job_list)(polling)
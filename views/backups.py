@@ -0,0 +1,69 @@
+import json
+import streamlit as st
+import pandas as pd
+from datetime import datetime, timedelta
+import jobs
+import maintenance
+
+# === MODULE M: BACKUPS & MAINTENANCE ===
+def _age(stamp):
+    hours = (datetime.now() - datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S")).total_seconds() / 3600
+    return f"{hours:.0f} h ago" if hours < 48 else f"{hours / 24:.0f} days ago"
+
+def render():
+    st.markdown("## 🛟 Backups & Maintenance")
+    st.caption(f"The scheduled worker (`python jobs.py worker`, or the app with {jobs.SCHEDULED_ENV}=1) backs the database up "
+               f"every {jobs.SCHEDULE['backup'] // 3600} hours and checks, optimizes and compacts it every "
+               f"{jobs.SCHEDULE['maintenance'] // 3600} hours. Backups copy the file while sales keep "
+               f"saving; the newest {maintenance.KEEP_LAST} and one a day for {maintenance.KEEP_DAYS} days are kept.")
+    snaps = maintenance.snapshots()
+    history = maintenance.get_storage_history()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Last backup", _age(snaps[0]["taken_at"]) if snaps else "never")
+    # Nothing runs the schedule in a plain `streamlit run app.py`
+    if not snaps or datetime.now() - datetime.strptime(snaps[0]["taken_at"], "%Y-%m-%d %H:%M:%S") > timedelta(days=maintenance.KEEP_DAYS):
+        st.warning(f"No backup in the last {maintenance.KEEP_DAYS} days. Scheduled backups only run while a scheduled worker "
+                   f"is up: start `python jobs.py worker` next to the app, or run the app with `{jobs.SCHEDULED_ENV}=1`.")
+    c2.metric("Snapshots", f"{len(snaps)} · {sum(s['bytes'] for s in snaps) / 1e6:,.0f} MB")
+    if len(history):
+        last = history.iloc[-1]
+        c3.metric("Database size", f"{last['bytes'] / 1e6:,.1f} MB", f"{last['free_pages']:,} free pages", delta_color="off")
+        c4.metric("Fragmentation", f"{last['fragmented_pct']:.1f}%", f"{last['unused_pct']:.1f}% unused space", delta_color="off")
+
+    b1, b2, b3 = st.columns([1, 1, 2])
+    if b1.button("💾 Back up now", type="primary"):
+        b3.success(f"Queued as job #{jobs.submit('backup', st.session_state.user)} (see Background Jobs).")
+    if b2.button("🩺 Check & compact now"):
+        b3.success(f"Queued as job #{jobs.submit('maintenance', st.session_state.user)} (see Background Jobs).")
+
+    st.markdown("#### 📉 Storage Over Time")
+    if history.empty: st.info("No storage stats yet; they are taken by the check & compact run.")
+    else:
+        st.line_chart(history.set_index("taken_at")[["fragmented_pct", "unused_pct"]])
+        vacuum = maintenance.get_log("vacuum", limit=1)
+        if len(vacuum) and json.loads(vacuum["result"].iloc[0]).get("needs_full_vacuum"):
+            st.warning("This file was created before incremental vacuum was switched on, so free pages are not given back. "
+                       "Run `python maintenance.py vacuum --full` once while the shop is closed (it pauses saving while it runs).")
+
+    with st.expander("♻️ Restore a Snapshot"):
+        if not snaps: st.info("No snapshots yet.")
+        else:
+            labels = {f"{s['taken_at']}{' (' + s['label'] + ')' if s['label'] else ''} · {s['bytes'] / 1e6:,.1f} MB": s for s in snaps}
+            choice = labels[st.selectbox("Snapshot", list(labels))]
+            st.warning("Everything saved after this snapshot is replaced. The current database is backed up first, "
+                       "so the restore can be undone from the list above.")
+            sure = st.checkbox(f"Replace the live database with {choice['name']}")
+            if st.button("Restore", disabled=not sure):
+                try:
+                    with st.spinner("Checking the snapshot and restoring..."): result = maintenance.restore(choice["path"])
+                    st.success(f"Restored in {result['seconds']:.1f}s. The previous state is saved as {result['pre_restore'].rsplit('/', 1)[-1]}.")
+                except Exception as e: st.error(f"Restore failed: {e}")
+
+    st.markdown("#### 📜 Recent Runs")
+    log = maintenance.get_log()
+    if log.empty: st.info("Nothing has run yet.")
+    else:
+        # Cached frame: build a new one instead of writing into it
+        shown = log.drop(columns=["id"]).assign(result=log["result"].map(
+            lambda r: ", ".join(f"{k}: {v}" for k, v in json.loads(r).items() if k not in ("seconds", "problems", "path") and v not in ([], {}))))
+        st.dataframe(shown, hide_index=True, use_container_width=True)
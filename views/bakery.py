@@ -0,0 +1,40 @@
+import streamlit as st
+import database as db
+import reconcile
+from views.common import history_browser, manage_debtors
+
+# === MODULE D: BAKERY ===
+def render():
+    all_prices = db.get_prices()
+    st.markdown("## 🍞 Bakery Operations")
+    staff = st.text_input("Staff Name", value=st.session_state.user.upper(), key="bakery_staff_key")
+    h1, h2, h3, h4, h5, h6, h7 = st.columns([1.5, 1, 1, 1, 1, 1, 1])
+    h1.markdown("**TYPE**"); h2.markdown("**OPEN**"); h3.markdown("**PROD**"); h4.markdown("**GIVEN**"); h5.markdown("**UNSOLD**"); h6.markdown("**BAD**"); h7.markdown("**SOLD**")
+    total_exp = 0; total_sold = 0; inputs = {}
+    bakery_items = {k:v for k,v in all_prices.items() if "Fuel" not in k}
+    for b, p in bakery_items.items():
+        c1, c2, c3, c4, c5, c6, c7 = st.columns([1.5, 1, 1, 1, 1, 1, 1])
+        with c1: st.markdown(f"**{b}**\n<small>₦{p:,.0f}</small>", unsafe_allow_html=True)
+        with c2: op = st.number_input(f"o{b}", 0, label_visibility="collapsed")
+        with c3: pr = st.number_input(f"p{b}", 0, label_visibility="collapsed")
+        with c4: gv = st.number_input(f"g{b}", 0, label_visibility="collapsed")
+        with c5: rt = st.number_input(f"r{b}", 0, label_visibility="collapsed")
+        with c6: dm = st.number_input(f"d{b}", 0, label_visibility="collapsed")
+        sold = (op + pr) - (gv + rt + dm)
+        rev = sold * p
+        total_exp += rev; total_sold += sold
+        inputs[b] = {"product": b, "opening": op, "produced": pr, "given": gv, "unsold": rt, "damaged": dm, "sold": sold, "unit_price": p}
+        with c7: st.write(f"**{sold}**")
+    st.info(f"Target: ₦{total_exp:,.2f}")
+    c1, c2 = st.columns(2)
+    with c1: cash = st.number_input("Cash", key="b_cash")
+    with c2: pos = st.number_input("POS", key="b_pos")
+    debtors, credit = manage_debtors("bakery")
+    diff = (cash + pos + credit) - total_exp
+    if st.button("💾 SAVE BAKERY", type="primary"):
+        db.save_bakery_entry({"date": db.datetime.now().strftime("%Y-%m-%d %H:%M"), "staff": staff, "sold_qty": total_sold, "damaged_qty": sum(i['damaged'] for i in inputs.values()), "expected": total_exp, "actual": cash+pos+credit, "diff": diff, "note": "", "credit": credit, "debtors_list": debtors,
+                              "open_stock": sum(i['opening'] for i in inputs.values()), "close_stock": sum(i['unsold'] for i in inputs.values()),
+                              "items": list(inputs.values())})
+        if diff < -reconcile.tolerance("shift_balance"): st.warning(f"Shortage: ₦{abs(diff):,.2f}")
+        else: st.success("Saved!")
+    with st.expander("History"): history_browser("bakery_records")
@@ -0,0 +1,60 @@
+import streamlit as st
+import database as db
+
+# Shared helpers for the page modules in views/
+
+def inject_css():
+    # CUSTOM CSS FOR MODERN UI
+    st.markdown("""
+        <style>
+        .stApp { background-color: #f8f9fa; }
+        [data-testid="stSidebar"] { background-color: #0f172a; }
+        [data-testid="stSidebar"] * { color: #e2e8f0 !important; }
+        div[data-testid="stMetric"], div.stForm {
+            background-color: white; padding: 20px; border-radius: 10px;
+            box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1); border: 1px solid #e2e8f0;
+        }
+        .stTextInput input, .stNumberInput input, .stSelectbox select {
+            background-color: #f1f5f9; border: none; border-radius: 5px; padding: 10px;
+        }
+        .stButton button {
+            background-color: #3b82f6; color: white; border-radius: 8px;
+            font-weight: bold; border: none; padding: 0.5rem 1rem; transition: all 0.2s;
+        }
+        .stButton button:hover { background-color: #2563eb; transform: scale(1.02); }
+        h1, h2, h3 { font-family: 'Inter', sans-serif; color: #1e293b; }
+        /* Sidebar Title Styling */
+        .sidebar-title { font-size: 20px; font-weight: 700; margin-bottom: 0px; }
+        </style>
+    """, unsafe_allow_html=True)
+
+def add_print_button():
+    import streamlit.components.v1 as components
+    with st.sidebar:
+        st.markdown("---")
+        components.html("""<script>function printMain() { window.parent.print(); }</script><div style="text-align: center;"><button onclick="printMain()" style="background-color: #FF4B4B; color: white; border: none; padding: 10px 20px; border-radius: 5px; cursor: pointer; font-weight: bold;">🖨️ PRINT REPORT</button></div>""", height=60)
+
+def manage_debtors(key_prefix):
+    if f'{key_prefix}_debtors' not in st.session_state: st.session_state[f'{key_prefix}_debtors'] = [{"name": "", "amount": 0.0}]
+    st.markdown("#### 📋 Debtors List")
+    edited = st.data_editor(st.session_state[f'{key_prefix}_debtors'], num_rows="dynamic", column_config={"name": "Customer Name", "amount": st.column_config.NumberColumn("Amount (₦)", format="%d")}, key=f"{key_prefix}_editor", use_container_width=True)
+    return edited, sum([r['amount'] for r in edited if r['amount']])
+
+def history_browser(table, filters=("staff",)):
+    key = f"hist_{table}"
+    cols = st.columns(2 + len(filters))
+    date_from = cols[0].date_input("From", value=None, key=f"{key}_from")
+    date_to = cols[1].date_input("To", value=None, key=f"{key}_to")
+    values = {name: cols[2 + i].text_input(name.title(), key=f"{key}_{name}").strip() or None for i, name in enumerate(filters)}
+    # A new filter starts again from the newest page
+    query = (date_from, date_to, tuple(values.items()))
+    if st.session_state.get(f"{key}_query") != query:
+        st.session_state[f"{key}_query"] = query
+        st.session_state[f"{key}_cursors"] = [None]
+    cursors = st.session_state[f"{key}_cursors"]
+    df, next_id = db.get_history_page(table, before_id=cursors[-1], date_from=date_from, date_to=date_to, **values)
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    b1, b2, b3 = st.columns([1, 1, 3])
+    if b1.button("⬅️ Newer", key=f"{key}_newer", disabled=len(cursors) == 1): cursors.pop(); st.rerun()
+    if b2.button("Older ➡️", key=f"{key}_older", disabled=next_id is None): cursors.append(next_id); st.rerun()
+    b3.caption(f"Page {len(cursors)}")
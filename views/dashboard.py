@@ -0,0 +1,74 @@
+import streamlit as st
+import plotly.express as px
+import database as db
+import charts
+import sync
+import insights
+from datetime import datetime
+
+REFRESH_SECONDS = 30
+
+# === MODULE A: DASHBOARD ===
+@st.fragment(run_every=REFRESH_SECONDS)
+def _watch(tables, version):
+    # Only this runs on the timer: one primary-key read. The page below is re-queried and redrawn
+    # only when something it reads was written since it was drawn.
+    if db.data_version(*tables) != version: st.rerun()
+    st.caption(f"🟢 Live · checked {datetime.now():%H:%M:%S}")
+
+def render():
+    # Tables behind every read on this page, taken from the cache tags of the functions that read them
+    tables = sorted(db.get_dashboard_metrics.tables | charts.revenue_chart.tables | sync.peers.tables | insights.summary.tables)
+    version = db.data_version(*tables)  # before the reads, so a write in between shows on the next check
+    st.title("Executive Dashboard")
+    c1, c2 = st.columns([3, 1])
+    c1.caption(f"Overview for {db.datetime.now().strftime('%B %Y')}")
+    with c2: _watch(tables, version)
+    sites = sync.peers()
+    if sites:
+        received = max((p[5] or "" for p in sites), default="") or "never"
+        st.caption(f"🏢 Includes data merged from {len(sites)} other site(s) · last received {received}")
+    rev, exp, net, debt, recent = db.get_dashboard_metrics()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Total Revenue", f"₦{rev:,.2f}", "+")
+    c2.metric("Total Expenses", f"₦{exp:,.2f}", "-")
+    c3.metric("Net Cash Position", f"₦{net:,.2f}")
+    c4.metric("Outstanding Debt", f"₦{debt:,.2f}", "high", delta_color="inverse")
+    st.markdown("---")
+    c_left, c_right = st.columns([2, 1])
+    with c_left:
+        st.subheader("📊 Revenue Trends")
+        try:
+            first, last = charts.revenue_range()
+            if first:
+                start, end = datetime.strptime(first, db.DAY_FMT).date(), datetime.strptime(last, db.DAY_FMT).date()
+                f1, f2 = st.columns([3, 1])
+                picked = f1.date_input("Period", (start, end), min_value=start, max_value=end)
+                resolution = f2.selectbox("Group by", ["auto"] + list(charts.RESOLUTIONS))
+                date_from, date_to = picked if len(picked) == 2 else (picked[0], picked[0])
+                chart_df, resolution = charts.revenue_chart(str(date_from), str(date_to), resolution)
+                fig = px.bar(chart_df, x='period', y='gross_revenue', color='department', title=f"Revenue by Department ({resolution})", barmode='group')
+                st.plotly_chart(fig, use_container_width=True)
+            else: st.info("No data available for charts yet.")
+        except: st.error("Could not load chart data.")
+    with c_right:
+        st.subheader("🤖 AI Insights")
+        recommendations = []
+        if debt > 50000: recommendations.append("🚨 **High Debt Alert:** Outstanding debt is over ₦50k. Focus on Debt Recovery.")
+        if net < 0: recommendations.append("⚠️ **Cash Flow Warning:** Expenses exceed Revenue. Review spending.")
+        if rev > 0 and (net/rev) > 0.2: recommendations.append("✅ **Healthy Margins:** You are retaining >20% of revenue.")
+        else: recommendations.append("ℹ️ **Tip:** Monitor POS charges daily to ensure commissions cover bank fees.")
+        for rec in recommendations: st.write(rec)
+        # Forecasts and anomalies: precomputed by the hourly insights job; this only reads the stored results
+        found = insights.summary()
+        if found["through"] is None: st.info("Insights appear once the scheduled worker (`python jobs.py worker`) has analysed the "
+                                              "first closed day (hourly), or after a rebuild from Background Jobs.")
+        else:
+            st.caption(f"Closed days up to {found['through']}, each against the {insights.WINDOW_DAYS} days before it.")
+            for line in insights.messages(found): st.write(line)
+            with st.expander("Forecasts & anomalies"):
+                st.dataframe(found["forecast"], hide_index=True, use_container_width=True)
+                st.dataframe(found["anomalies"], hide_index=True, use_container_width=True)
+    st.markdown("---")
+    st.subheader("📋 Recent Debtors List")
+    st.dataframe(recent, use_container_width=True)
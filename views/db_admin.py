@@ -0,0 +1,26 @@
+import streamlit as st
+import database as db
+
+# === MODULE H: DATABASE ADMIN ===
+def render():
+    st.markdown("## 🔧 Database Administrator")
+    st.warning("⚠️ Be careful! Changes here are permanent.")
+    table = st.selectbox("Select Table to Edit", db.ADMIN_TABLES)
+    # Page through the table; the editor key changes per page and after each save so edits never replay
+    if st.session_state.get("admin_table") != table:
+        st.session_state.admin_table = table
+        st.session_state.admin_cursors = [None]
+    if 'admin_rev' not in st.session_state: st.session_state.admin_rev = 0
+    cursors = st.session_state.admin_cursors
+    df, next_after = db.get_table_page(table, cursors[-1])
+    st.markdown(f"### Editing: {table} (page {len(cursors)})")
+    edited_df = st.data_editor(df, num_rows="dynamic", use_container_width=True, key=f"editor_{table}_{len(cursors)}_{st.session_state.admin_rev}")
+    b1, b2, b3 = st.columns([1, 1, 3])
+    if b1.button("⬅️ Previous", disabled=len(cursors) == 1): cursors.pop(); st.rerun()
+    if b2.button("Next ➡️", disabled=next_after is None): cursors.append(next_after); st.rerun()
+    if st.button("💾 SAVE CHANGES TO DATABASE", type="primary"):
+        try:
+            counts = db.apply_changes(table, df, edited_df, st.session_state.user)
+            st.session_state.admin_rev += 1
+            st.success(f"Database Updated Successfully! {counts['inserted']} added, {counts['updated']} updated, {counts['deleted']} deleted.")
+        except Exception as e: st.error(f"Error: {e}")
@@ -0,0 +1,46 @@
+import streamlit as st
+import database as db
+import ledger
+
+# === MODULE F: DEBT RECOVERY ===
+def render():
+    st.markdown("## 💰 Debt Recovery")
+    balances = ledger.customer_balances()
+    aging = ledger.aging_summary()
+    cols = st.columns(len(aging))
+    for col, (bucket, amount) in zip(cols, aging.items()): col.metric(f"{bucket} days", f"₦{amount:,.2f}")
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        st.subheader("Customer Balances")
+        if not balances.empty: st.dataframe(balances, use_container_width=True, hide_index=True)
+        else: st.success("No debts!")
+    with c2:
+        st.subheader("Pay Off Customer")
+        with st.form("customer_repay_form", clear_on_submit=True):
+            cust = st.selectbox("Customer", balances['customer_name'].tolist() if not balances.empty else [])
+            c_amt = st.number_input("Amount (₦)", min_value=0.0, key="cust_repay_amt")
+            st.caption("Applied to the oldest open debts first.")
+            if st.form_submit_button("APPLY PAYMENT", type="primary"):
+                if cust and c_amt > 0:
+                    success, msg = ledger.repay_customer(cust, c_amt, st.session_state.user)
+                    if success: st.success(msg); st.rerun()
+                    else: st.error(msg)
+                else: st.warning("Enter details.")
+    st.markdown("---")
+    debts = db.get_unpaid_debts()
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        st.subheader("Outstanding Debts")
+        if not debts.empty: st.dataframe(debts, use_container_width=True)
+        else: st.success("No debts!")
+    with c2:
+        st.subheader("Record Repayment")
+        with st.form("repay_form", clear_on_submit=True):
+            r_id = st.number_input("Debt ID", min_value=0, step=1)
+            r_amt = st.number_input("Amount (₦)", min_value=0.0)
+            if st.form_submit_button("PROCESS PAYMENT", type="primary"):
+                if r_id > 0 and r_amt > 0:
+                    success, msg = db.process_debt_repayment(r_id, r_amt, st.session_state.user)
+                    if success: st.success(msg); st.rerun()
+                    else: st.error(msg)
+                else: st.warning("Enter details.")
@@ -0,0 +1,34 @@
+import streamlit as st
+import database as db
+from views.common import history_browser
+
+def clear_farm():
+    st.session_state.farm_cart = [{"Product": "Crates of Eggs", "Qty": 1, "Unit Price": 3500}]
+    for k in ['farm_cust', 'farm_phone', 'farm_note']: st.session_state[k] = ""
+    st.session_state.farm_paid = 0.0
+
+# === MODULE E: FARM ===
+def render():
+    st.markdown("## 🚜 Farm Operations")
+    c1, c2 = st.columns([3, 1])
+    with c1: staff = st.text_input("Staff Name", value=st.session_state.user.upper(), key="farm_st")
+    with c2: 
+        if st.button("🔄 Next Customer"): clear_farm(); st.rerun()
+    c1, c2 = st.columns([2, 1])
+    with c1: cust = st.text_input("Customer", key="farm_cust")
+    with c2: ph = st.text_input("Phone", key="farm_phone")
+    if 'farm_cart' not in st.session_state: st.session_state.farm_cart = [{"Product": "Eggs", "Qty": 1, "Unit Price": 0}]
+    cart = st.data_editor(st.session_state.farm_cart, num_rows="dynamic", use_container_width=True, key="farm_ed")
+    total = sum([r.get("Qty",0)*r.get("Unit Price",0) for r in cart])
+    st.markdown(f"<h3 style='text-align: right; color: #0d47a1;'>TOTAL: ₦{total:,.2f}</h3>", unsafe_allow_html=True)
+    c1, c2, c3 = st.columns(3)
+    with c1: paid = st.number_input("Amount Paid", key="farm_paid")
+    with c2: mode = st.selectbox("Mode", ["Cash", "POS", "Transfer", "Credit"], key="farm_mode")
+    with c3: bal = total - paid; st.metric("Balance", f"₦{bal:,.2f}")
+    note = st.text_input("Note", key="farm_note")
+    if st.button("💾 SAVE SALE", type="primary"):
+        items = ", ".join([f"{r['Qty']}x {r['Product']}" for r in cart if r.get("Product")])
+        lines = [{"product": r["Product"], "qty": r.get("Qty", 0), "unit_price": r.get("Unit Price", 0)} for r in cart if r.get("Product")]
+        db.save_farm_entry({"date": db.datetime.now().strftime("%Y-%m-%d %H:%M"), "staff": staff, "customer": cust, "items": items, "total": total, "paid": paid, "mode": mode, "balance": bal, "note": note, "line_items": lines})
+        st.success("Saved!")
+    with st.expander("History"): history_browser("farm_records", ("staff", "customer"))
@@ -0,0 +1,47 @@
+import streamlit as st
+import database as db
+import reconcile
+from views.common import history_browser, manage_debtors
+
+def clear_fuel():
+    for k in ['read_p1_open', 'read_p1_close', 'read_p2_open', 'read_p2_close', 'fuel_cash', 'fuel_pos']: st.session_state[k] = 0.0
+    st.session_state.fuel_debtors = [{"name": "", "amount": 0.0}]
+
+# === MODULE C: FUEL ===
+def render():
+    if 'fuel_staff' not in st.session_state: st.session_state.fuel_staff = st.session_state.user.upper()
+    if 'p1_setup' not in st.session_state: st.session_state.p1_setup = "Pump 1"
+    if 'p2_setup' not in st.session_state: st.session_state.p2_setup = "Pump 2"
+    current_fuel_price = db.get_prices().get("Fuel Unit Price", 700.0)
+    st.markdown("## ⛽ Fuel Operations")
+    c1, c2 = st.columns([3, 1])
+    with c1: staff = st.text_input("Staff Name", value=st.session_state.user.upper(), key="fuel_staff")
+    with c2: 
+        if st.button("🔄 Start New Shift"): clear_fuel(); st.rerun()
+    with st.container():
+        st.markdown(f"**{st.session_state.p1_setup}**")
+        c1, c2 = st.columns(2)
+        p1_op = c1.number_input("Opening", key="read_p1_open")
+        p1_cl = c2.number_input("Closing", key="read_p1_close")
+        st.markdown(f"**{st.session_state.p2_setup}**")
+        c1, c2 = st.columns(2)
+        p2_op = c1.number_input("Opening", key="read_p2_open")
+        p2_cl = c2.number_input("Closing", key="read_p2_close")
+    tot_lit = (p1_cl - p1_op) + (p2_cl - p2_op)
+    price = st.number_input("Price/Liter", value=current_fuel_price, disabled=True)
+    exp_rev = tot_lit * price
+    st.info(f"Target: **{tot_lit:.1f}L** | **₦{exp_rev:,.2f}**")
+    c1, c2 = st.columns(2)
+    with c1: cash = st.number_input("Cash", key="fuel_cash")
+    with c2: pos = st.number_input("POS", key="fuel_pos")
+    debtors, credit = manage_debtors("fuel")
+    st.metric("Total Credit", f"₦{credit:,.2f}")
+    diff = (cash + pos + credit) - exp_rev
+    if (cash + pos + credit) > 0:
+        if abs(diff) <= reconcile.tolerance("shift_balance"): st.success("✅ Balanced!")
+        elif diff > 0: st.warning(f"⚠️ Surplus: {diff:.2f}")
+        else: st.error(f"🚨 Shortage: {diff:.2f}")
+    if st.button("💾 SAVE RECORD", type="primary"):
+        db.save_fuel_entry({"date": db.datetime.now().strftime("%Y-%m-%d %H:%M"), "staff": staff, "p1_name": st.session_state.p1_setup, "pA_open": p1_op, "pA_close": p1_cl, "p2_name": st.session_state.p2_setup, "pB_open": p2_op, "pB_close": p2_cl, "total_liters": tot_lit, "price": price, "expected": exp_rev, "cash": cash, "pos": pos, "credit": credit, "diff": diff, "debtors_list": debtors})
+        st.success("Saved!")
+    with st.expander("History"): history_browser("fuel_records")
@@ -0,0 +1,50 @@
+import streamlit as st
+import pandas as pd
+import database as db
+import profiling
+from datetime import datetime
+
+# === MODULE K: PERFORMANCE ===
+# Numbers come from this server process only (all sessions), since it started or was last cleared.
+def render():
+    st.markdown("## 📈 Performance")
+    st.caption("Where rerun time goes: data functions (database/charts/ledger), SQLite statements, and the rest "
+               "(pandas shaping, Plotly, Streamlit). Percentiles are over the last "
+               f"{profiling.CALL_BUFFER:,} calls and {profiling.RERUN_BUFFER:,} reruns.")
+    reruns = list(profiling.reruns)
+    times = sorted(r["ms"] for r in reruns)
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Reruns recorded", f"{len(reruns):,}")
+    c2.metric("Rerun p50", f"{profiling._percentile(times, 50):,.0f} ms" if times else "–")
+    c3.metric("Rerun p95", f"{profiling._percentile(times, 95):,.0f} ms" if times else "–")
+    c4.metric("Last rerun (you)", f"{st.session_state.get('last_rerun_ms', 0):,.0f} ms")
+
+    st.markdown("#### ⏱️ Per Page")
+    pages = profiling.summary(reruns, key="page")
+    if pages: st.dataframe(pd.DataFrame(pages).drop(columns=["avg_rows", "avg_bytes"]), hide_index=True, use_container_width=True)
+    else: st.info("No reruns recorded yet.")
+
+    st.markdown("#### 🧮 Per Function")
+    functions = profiling.summary()
+    if functions:
+        df = pd.DataFrame(functions)
+        df["avg_kb"] = (df.pop("avg_bytes") / 1024).round(1)
+        st.dataframe(df, hide_index=True, use_container_width=True)
+    else: st.info("No calls recorded yet.")
+
+    st.markdown("#### 🐢 Slowest Recent Reruns")
+    slow = profiling.slowest_reruns()
+    if slow:
+        df = pd.DataFrame(slow)
+        df["other_ms"] = (df["ms"] - df["data_ms"]).clip(lower=0).round(1)
+        df["ts"] = pd.to_datetime(df["ts"], unit="s").dt.strftime("%H:%M:%S")
+        st.dataframe(df[["ts", "page", "user", "ms", "page_ms", "data_ms", "sql_ms", "queries", "other_ms"]], hide_index=True, use_container_width=True)
+
+    st.markdown("#### 🗄️ SQL Statements")
+    statements = profiling.summary(db.get_query_stats(), key="sql", value="run_ms")
+    if statements: st.dataframe(pd.DataFrame(statements).drop(columns=["avg_rows", "avg_bytes"]).head(50), hide_index=True, use_container_width=True)
+
+    b1, b2 = st.columns([1, 4])
+    b1.download_button("⬇️ Download JSON", data=profiling.dump, mime="application/json",
+                       file_name=f"okeb_profile_{datetime.now().strftime('%Y%m%d_%H%M')}.json")
+    if b2.button("🧹 Clear"): profiling.clear(); st.rerun()
@@ -0,0 +1,44 @@
+import streamlit as st
+import database as db
+import reconcile
+from views.common import history_browser
+
+# === MODULE B: POS ===
+def render():
+    st.markdown("## 🏧 POS Terminal Operations")
+    staff = st.text_input("Staff Name", value=st.session_state.user.upper(), key="pos_st")
+    with st.form("pos_form"):
+        st.markdown("### 1. Opening Balance")
+        c1, c2, c3 = st.columns(3)
+        with c1: mach = st.text_input("Terminal Name")
+        with c2: op_cash = st.number_input("Opening Cash", step=1000.0)
+        with c3: op_wall = st.number_input("Opening Wallet", step=1000.0)
+        cap = st.number_input("Capital Given", step=1000.0)
+        st.markdown("### 2. Transaction Volume")
+        c1, c2, c3, c4 = st.columns(4)
+        with c1: dep = st.number_input("Deposits", min_value=0.0)
+        with c2: wit = st.number_input("Withdrawals", min_value=0.0)
+        with c3: other = st.number_input("Utility/Bill Txns", min_value=0.0)
+        with c4: free_vol = st.number_input("Free/Exempted", min_value=0.0)
+        total_vol = dep + wit + other; chargeable = total_vol - free_vol
+        st.info(f"📊 Volume: **₦{total_vol:,.2f}** | Chargeable: **₦{chargeable:,.2f}**")
+        st.markdown("### 3. Profit Analysis")
+        exp_comm = chargeable * 0.02
+        c1, c2, c3 = st.columns(3)
+        with c1: st.metric("Std Commission (2%)", f"₦{exp_comm:,.2f}")
+        with c2: act_comm = st.number_input("Actual Charges Collected", min_value=0.0)
+        with c3: bank = st.number_input("Bank Charges", min_value=0.0)
+        net_profit = act_comm - bank
+        st.metric("NET PROFIT", f"₦{net_profit:,.2f}", delta=f"{act_comm - exp_comm:,.2f} vs Std")
+        st.markdown("### 4. Closing")
+        c1, c2, c3 = st.columns(3)
+        with c1: cl_cash = st.number_input("Closing Cash", min_value=0.0)
+        with c2: cl_wall = st.number_input("Closing Wallet", min_value=0.0)
+        with c3: remit = st.number_input("Remitted Cash", min_value=0.0)
+        if st.form_submit_button("CLOSE ACCOUNT", type="primary"):
+            start = op_cash + op_wall + cap; end = cl_cash + cl_wall + remit
+            expected_end = start + net_profit; diff = end - expected_end
+            status = "✅ BALANCED" if abs(diff) <= reconcile.tolerance("shift_balance") else ("⚠️ SURPLUS" if diff > 0 else "🚨 SHORTAGE")
+            db.save_pos_entry({"date": db.datetime.now().strftime("%Y-%m-%d %H:%M"), "staff": staff, "machine": mach, "open_cash": op_cash, "open_wallet": op_wall, "capital": cap, "deposits": dep, "withdrawals": wit, "free": free_vol, "volume": total_vol, "expected": exp_comm, "actual": act_comm, "bank": bank, "profit": net_profit, "close_cash": cl_cash, "close_wallet": cl_wall, "balance": diff, "status": status})
+            st.success(f"Saved! Status: {status}")
+    with st.expander("View History"): history_browser("pos_records", ("staff", "machine"))
@@ -0,0 +1,65 @@
+import streamlit as st
+import database as db
+import pricing
+from datetime import datetime
+
+# === MODULE G: SETTINGS ===
+def render():
+    st.markdown("## ⚙️ Product Price Settings")
+    current_prices = db.get_prices()
+    with st.form("price_update_form"):
+        cols = st.columns(3)
+        updated_prices = {}
+        i = 0
+        for item, price in current_prices.items():
+            with cols[i % 3]: 
+                new_val = st.number_input(f"{item}", value=float(price), step=50.0)
+                updated_prices[item] = new_val
+            i += 1
+        # A change entered late can be backdated; past shifts are only repriced from the section below
+        now = datetime.now()
+        c1, c2 = st.columns(2)
+        eff_day = c1.date_input("Effective from", value=now.date(), max_value=now.date())
+        eff_time = c2.time_input("Time", value=now.time().replace(second=0, microsecond=0))
+        if st.form_submit_button("UPDATE PRICES", type="primary"):
+            changed = {item: p for item, p in updated_prices.items() if p != current_prices[item]}
+            try: count = db.set_prices(changed, datetime.combine(eff_day, eff_time), st.session_state.user)
+            except ValueError as e: st.error(str(e))
+            else:
+                st.success(f"✅ {count} price(s) updated!")
+                st.rerun()
+    with st.expander("🕒 Price History"):
+        history = db.get_price_history()
+        if history.empty: st.info("No price changes recorded yet.")
+        else: st.dataframe(history.drop(columns=["id"]).iloc[::-1], hide_index=True, use_container_width=True)
+    with st.expander("🔁 Reprice Past Shifts"):
+        st.caption("Recomputes expected revenue and shortage/surplus of past shifts at the prices in force when they were "
+                   "recorded. Shifts from before an item's first recorded change keep their price; archived months are not changed.")
+        # Repricing reads every shift in range, so it only runs once asked for, not on each visit
+        with st.form("reprice_form"):
+            c1, c2, c3 = st.columns(3)
+            dept = c1.selectbox("Department", pricing.DEPARTMENTS, format_func=str.title)
+            date_from = c2.date_input("From", value=None, key="reprice_from")
+            date_to = c3.date_input("To", value=None, key="reprice_to")
+            if st.form_submit_button("Preview"): st.session_state.reprice = (dept, date_from, date_to)
+        if st.session_state.get("reprice"):
+            dept, date_from, date_to = st.session_state.reprice
+            preview = pricing.reprice(dept, date_from, date_to)
+            moved = preview[preview["difference"].abs() >= 0.005]
+            st.write(f"{dept.title()}: {len(moved):,} of {len(preview):,} shifts change; net expected revenue **₦{moved['difference'].sum():+,.2f}**")
+            if not moved.empty:
+                st.dataframe(moved[["id", "date", "expected_revenue", "expected_asof", "difference"]].head(200), hide_index=True, use_container_width=True)
+                if st.button(f"Apply to {len(moved):,} shifts", key="reprice_apply"):
+                    del st.session_state.reprice
+                    st.success(f"✅ {pricing.apply(dept, date_from, date_to):,} shifts repriced.")
+    st.markdown("#### 💵 Unit Costs")
+    st.caption("What one unit costs to make or buy; used for product margins on sales recorded from now on.")
+    costs = db.get_products()
+    with st.form("unit_cost_form"):
+        edited = st.data_editor(costs[["name", "department", "unit_cost"]], disabled=["name", "department"],
+                                hide_index=True, use_container_width=True, key="unit_cost_editor")
+        if st.form_submit_button("UPDATE COSTS"):
+            changed = edited[edited["unit_cost"].fillna(-1) != costs["unit_cost"].fillna(-1)]
+            db.set_unit_costs(dict(zip(changed["name"], changed["unit_cost"].astype(float))))
+            st.success(f"✅ {len(changed)} cost(s) updated!")
+            st.rerun()
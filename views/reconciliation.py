@@ -0,0 +1,34 @@
+import streamlit as st
+import jobs
+import reconcile
+
+# === MODULE L: RECONCILIATION ===
+def render():
+    st.markdown("## 🔍 Reconciliation")
+    st.caption("Re-checks every stored shift: pump meter continuity, POS cash/wallet carry-over per terminal, "
+               "bakery stock carry-over and shift shortages/surpluses.")
+    counts = reconcile.discrepancy_counts()
+    cols = st.columns(len(reconcile.TOLERANCES))
+    for col, kind in zip(cols, reconcile.TOLERANCES): col.metric(kind.replace("_", " ").title(), f"{counts.get(kind, 0):,}")
+
+    with st.expander("⚙️ Tolerances"):
+        current = reconcile.tolerances()
+        with st.form("tolerances"):
+            values = {kind: st.number_input(f"{desc} ({unit})", min_value=0.0, value=current[kind], key=f"tol_{kind}")
+                      for kind, (_, unit, desc) in reconcile.TOLERANCES.items()}
+            if st.form_submit_button("Save tolerances"):
+                for kind, value in values.items():
+                    if value != current[kind]: reconcile.set_tolerance(kind, value)
+                st.success("Saved. Rescan to apply them to stored shifts.")
+
+    c1, c2 = st.columns([1, 3])
+    if c1.button("🔁 Rescan all shifts", type="primary"):
+        job_id = jobs.submit("reconcile", st.session_state.user)
+        c2.success(f"Queued as job #{job_id}; results appear here when it finishes (see Background Jobs).")
+
+    kind = st.selectbox("Show", ["All"] + list(reconcile.TOLERANCES))
+    found = reconcile.get_discrepancies(None if kind == "All" else kind)
+    if found.empty: st.info("No discrepancies found (or no rescan has run yet).")
+    else:
+        st.caption(f"Newest {len(found):,} shown; detected {found['detected_at'].iloc[0]}.")
+        st.dataframe(found.drop(columns=["id"]), hide_index=True, use_container_width=True)
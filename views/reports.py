@@ -0,0 +1,59 @@
+import streamlit as st
+import database as db
+import exports
+import products
+import jobs
+
+# === MODULE I: REPORTS & EXPORT ===
+# Files are generated when the download button is clicked (st.download_button runs the callable
+# on its own thread), streamed chunk by chunk into a temporary file. Big exports can go to the
+# background job queue instead and be downloaded from the Background Jobs page.
+def render():
+    st.markdown("## 📤 Reports & Export")
+    st.markdown("#### 🧾 End-of-Day Report")
+    with st.container(border=True):
+        c1, c2 = st.columns(2)
+        day = c1.date_input("Day", value=db.datetime.now().date(), key="eod_day")
+        eod_fmt = c2.selectbox("Format", list(exports.FORMATS), index=2, key="eod_fmt")
+        st.download_button("⬇️ Download End-of-Day Report",
+                           data=lambda: exports.export(exports.end_of_day_sections(day), eod_fmt, f"Okeb Nigeria Limited - End of Day {day}"),
+                           file_name=f"okeb_end_of_day_{day}.{eod_fmt}", mime=exports.FORMATS[eod_fmt], key="eod_download")
+        if st.button("⏳ Run in background", key="eod_job"):
+            job_id = jobs.submit("export", st.session_state.user, fmt=eod_fmt, report="end_of_day", day=str(day),
+                                 title=f"Okeb Nigeria Limited - End of Day {day}")
+            st.success(f"Queued as job #{job_id}. Download it from Background Jobs when it is done.")
+
+    st.markdown("#### 📦 Export a Table")
+    with st.container(border=True):
+        c1, c2, c3, c4 = st.columns(4)
+        table = c1.selectbox("Table", db.ADMIN_TABLES, key="exp_table")
+        date_from = c2.date_input("From", value=None, key="exp_from")
+        date_to = c3.date_input("To", value=None, key="exp_to")
+        fmt = c4.selectbox("Format", list(exports.FORMATS), key="exp_fmt")
+        departments = None
+        if table == "daily_sales":
+            departments = st.multiselect("Departments (all if empty)", ["POS", "FUEL", "BAKERY", "FARM", "DEBT_RECOVERY"], key="exp_depts") or None
+        st.download_button(f"⬇️ Download {table}",
+                           data=lambda: exports.export(exports.table_sections(table, date_from, date_to, departments), fmt, f"Okeb Nigeria Limited - {table}"),
+                           file_name=f"okeb_{table}.{fmt}", mime=exports.FORMATS[fmt], key="exp_download")
+        if st.button("⏳ Run in background", key="exp_job"):
+            job_id = jobs.submit("export", st.session_state.user, fmt=fmt, table=table, departments=departments,
+                                 date_from=str(date_from) if date_from else None, date_to=str(date_to) if date_to else None,
+                                 title=f"Okeb Nigeria Limited - {table}")
+            st.success(f"Queued as job #{job_id}. Download it from Background Jobs when it is done.")
+
+    st.markdown("#### 🥖 Product Performance")
+    with st.container(border=True):
+        c1, c2, c3 = st.columns(3)
+        p_from = c1.date_input("From", value=db.datetime.now().date() - db.timedelta(days=29), key="prod_from")
+        p_to = c2.date_input("To", value=db.datetime.now().date(), key="prod_to")
+        p_dept = c3.selectbox("Department", ["All", "BAKERY", "FARM"], key="prod_dept")
+        dept = None if p_dept == "All" else p_dept
+        report = products.product_report(str(p_from), str(p_to), dept)
+        if report.empty: st.info("No product sales in this period.")
+        else:
+            st.dataframe(report, hide_index=True, use_container_width=True)
+            import plotly.express as px
+            trend, resolution = products.product_trend(str(p_from), str(p_to), dept)
+            st.plotly_chart(px.line(trend, x="period", y="quantity", color="product", title=f"Units sold per product ({resolution})"),
+                            use_container_width=True)